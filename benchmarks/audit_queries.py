@@ -0,0 +1,288 @@
+"""Аудит планов запросов Database и подсказки по индексам.
+
+Запуск: python benchmarks/audit_queries.py [--managers 50] [--clients 2000] [-v]
+
+Заполняет временную БД синтетическими данными, вызывает каждый публичный
+метод Database, перехватывает выполненные SQL-запросы (trace callback) и
+прогоняет их через EXPLAIN QUERY PLAN. Полный просмотр таблицы (SCAN) и
+сортировка во временном B-дереве (USE TEMP B-TREE) считаются проблемой:
+для них печатается предлагаемый индекс. Отдельно ищутся избыточные индексы
+(префикс другого индекса той же таблицы).
+
+Завершается с кодом 1, если нашлась проблема, не внесённая в ALLOWED, или
+если у Database появился метод, которого нет в CALLS, — так запрос,
+скатившийся к полному просмотру, ловится до выката.
+"""
+import argparse
+import inspect
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from database import Database
+from db_pool import ConnectionPool
+from init_db import init_database
+
+# Осознанные полные просмотры: метод -> причина
+ALLOWED = {
+    'get_all_last_bot_messages': "загружает все ID сообщений один раз при старте",
+}
+
+# Служебные запросы, которые не нужно разбирать
+SKIP_PREFIXES = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SELECT 1', '--')
+
+
+class TracingPool(ConnectionPool):
+    """Пул, записывающий все выполненные запросы"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements = []
+
+    def _create(self):
+        conn = super()._create()
+        conn.set_trace_callback(self.statements.append)
+        return conn
+
+
+def build_calls(manager_id: int, telegram_id: int, client_id: int, phone: str, reminder_ids):
+    """Вызов каждого публичного метода Database с правдоподобными аргументами"""
+    key = (1, telegram_id, telegram_id, 0, 'default')
+    return OrderedDict([
+        ('get_manager', lambda db: db.get_manager(telegram_id)),
+        ('create_manager', lambda db: db.create_manager(10 ** 9, 'Аудит', 'auto', '+79990000001')),
+        ('update_manager_step', lambda db: db.update_manager_step(telegram_id, 2)),
+        ('complete_registration', lambda db: db.complete_registration(telegram_id)),
+        ('save_last_bot_message', lambda db: db.save_last_bot_message(telegram_id, 1)),
+        ('get_last_bot_message', lambda db: db.get_last_bot_message(telegram_id)),
+        ('save_last_bot_messages', lambda db: db.save_last_bot_messages([(telegram_id, 2)])),
+        ('get_all_last_bot_messages', lambda db: db.get_all_last_bot_messages()),
+        ('get_client', lambda db: db.get_client(manager_id, phone)),
+        ('get_client_by_id', lambda db: db.get_client_by_id(manager_id, client_id)),
+        ('create_client', lambda db: db.create_client(manager_id, 'Аудит', '+79990000002')),
+        ('get_clients', lambda db: db.get_clients(manager_id, limit=10)),
+        ('get_clients_page', lambda db: (
+            db.get_clients_page(manager_id, 10),
+            db.get_clients_page(manager_id, 10, after_id=client_id),
+            db.get_clients_page(manager_id, 10, before_id=client_id),
+        )),
+        ('search_clients', lambda db: db.search_clients(manager_id, phone[-4:])),
+        ('bulk_insert_clients', lambda db: db.bulk_insert_clients(manager_id, [('Аудит', '+79990000003')])),
+        ('iter_clients_export', lambda db: list(db.iter_clients_export(manager_id))),
+        ('get_templates', lambda db: db.get_templates(manager_id)),
+        ('create_default_templates', lambda db: db.create_default_templates(manager_id, 'Аудит', 'auto')),
+        ('update_template', lambda db: db.update_template(manager_id, 1, 'Текст')),
+        ('create_reminder', lambda db: db.create_reminder(manager_id, client_id, 'call', 'Аудит', '2030-01-01 10:00:00')),
+        ('get_pending_reminder_keys', lambda db: db.get_pending_reminder_keys(0, 100)),
+        ('get_reminders_for_dispatch', lambda db: db.get_reminders_for_dispatch(reminder_ids)),
+        ('claim_reminders', lambda db: db.claim_reminders(reminder_ids[:1])),
+        ('get_upcoming_reminders', lambda db: db.get_upcoming_reminders(manager_id)),
+        ('iter_reminders_export', lambda db: list(db.iter_reminders_export(manager_id))),
+        ('delete_client', lambda db: db.delete_client(manager_id, client_id)),
+        ('get_fsm_record', lambda db: db.get_fsm_record(key, 0)),
+        ('save_fsm_records', lambda db: db.save_fsm_records([(key, 'State:x', {'a': 1}, time.time())])),
+        ('delete_expired_fsm_records', lambda db: db.delete_expired_fsm_records(0)),
+    ])
+
+
+def populate(db: Database, managers: int, clients: int):
+    with db._connection() as conn:
+        for m in range(managers):
+            cursor = conn.execute(
+                "INSERT INTO managers (telegram_id, full_name, industry, phone, terms_accepted) "
+                "VALUES (?, ?, 'auto', ?, TRUE)",
+                (1000 + m, f'Менеджер {m}', f'+7999{m:07d}')
+            )
+            manager_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO clients (manager_id, name, phone, status, last_contact) "
+                "VALUES (?, ?, ?, ?, datetime('now', ?))",
+                [(manager_id, f'Клиент {i}', f'+79{m:03d}{i:06d}', ('new', 'hot', 'lost')[i % 3], f'-{i} minutes')
+                 for i in range(clients)]
+            )
+            conn.executemany(
+                "INSERT INTO reminders (manager_id, client_id, type, text, due_date, is_done) "
+                "VALUES (?, NULL, 'call', 'Позвонить', datetime('now', ?), ?)",
+                [(manager_id, f'+{i} hours', i % 2) for i in range(20)]
+            )
+            conn.executemany(
+                "INSERT INTO templates (manager_id, name, content, is_active) VALUES (?, ?, 'Текст', ?)",
+                [(manager_id, f'Шаблон {i}', i % 4 != 0) for i in range(8)]
+            )
+            conn.execute("INSERT INTO bot_messages (telegram_id, last_message_id) VALUES (?, 1)", (1000 + m,))
+            conn.execute(
+                "INSERT INTO fsm_states (bot_id, chat_id, user_id, destiny, state, data, updated_at) "
+                "VALUES (1, ?, ?, 'default', NULL, '{}', ?)",
+                (1000 + m, 1000 + m, time.time())
+            )
+        conn.commit()
+
+
+def normalize(sql: str) -> str:
+    """Запрос без значений параметров — для группировки одинаковых"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    return ' '.join(sql.split())
+
+
+def explain(conn, sql: str):
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+
+
+def find_issues(plan):
+    issues = []
+    for detail in plan:
+        if detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail and 'CONSTANT ROW' not in detail:
+            issues.append(detail)
+        elif detail.startswith('USE TEMP B-TREE'):
+            issues.append(detail)
+    return issues
+
+
+def suggest_index(sql: str, issue: str):
+    """Грубая подсказка: равенства из WHERE, затем ORDER BY, затем диапазоны"""
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(?!WHERE|ON|SET|JOIN|LEFT|ORDER|LIMIT)(\w+))?', sql, re.I):
+        aliases[alias or table] = table
+        aliases[table] = table
+
+    match = re.match(r'SCAN (\w+)', issue)
+    if match:
+        name = match.group(1)
+    else:
+        name = next(iter(aliases), None)
+    table = aliases.get(name)
+    if table is None:
+        return None
+
+    def own(prefix):
+        return prefix in ('', name, table) or (not prefix and len(set(aliases.values())) == 1)
+
+    where = re.search(r'\bWHERE\b(.*?)(?:\bORDER BY\b|\bGROUP BY\b|\bLIMIT\b|$)', sql, re.I | re.S)
+    equal, ranges = [], []
+    if where:
+        for prefix, column, op in re.findall(r'(?:(\w+)\.)?(\w+)\s*(=|IN\b|<=|>=|<|>)', where.group(1), re.I):
+            if not own(prefix) or column.upper() in ('AND', 'OR', 'NOT'):
+                continue
+            target = equal if op.upper() in ('=', 'IN') else ranges
+            if column not in equal + ranges:
+                target.append(column)
+
+    order = re.search(r'\bORDER BY\b(.*?)(?:\bLIMIT\b|$)', sql, re.I | re.S)
+    ordered = []
+    if order:
+        for prefix, column in re.findall(r'(?:(\w+)\.)?(\w+)(?:\s+(?:ASC|DESC))?', order.group(1), re.I):
+            if own(prefix) and column.upper() not in ('ASC', 'DESC') and column not in equal + ordered:
+                ordered.append(column)
+
+    columns = equal + ordered + [c for c in ranges if c not in ordered]
+    if not columns:
+        return None
+    return f"CREATE INDEX idx_{table}_{'_'.join(columns)} ON {table}({', '.join(columns)})"
+
+
+def redundant_indexes(conn):
+    """Индексы, столбцы которых — префикс другого индекса той же таблицы"""
+    found = []
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND sql NOT LIKE 'CREATE VIRTUAL%'"
+    )]
+    for table in tables:
+        indexes = {}
+        for _, name, unique, origin, partial in conn.execute(f'PRAGMA index_list({table})'):
+            columns = tuple(row[2] for row in conn.execute(f'PRAGMA index_info({name})'))
+            indexes[name] = (columns, unique, partial)
+        for name, (columns, unique, partial) in indexes.items():
+            if unique or partial:
+                continue
+            for other, (other_columns, _, other_partial) in indexes.items():
+                if other != name and not other_partial and other_columns[:len(columns)] == columns:
+                    found.append(f"{name}{columns} избыточен: покрывается {other}{other_columns}")
+                    break
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--managers', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=2000, help="клиентов на менеджера")
+    parser.add_argument('-v', '--verbose', action='store_true', help="печатать планы всех запросов")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'audit.db')
+        init_database(path)
+        db = Database(path)
+        db.pool.close()
+        db.pool = TracingPool(path)
+        populate(db, args.managers, args.clients)
+
+        with db._connection() as conn:
+            client = conn.execute('SELECT id, manager_id, phone FROM clients ORDER BY id LIMIT 1 OFFSET 500').fetchone()
+            telegram_id = conn.execute('SELECT telegram_id FROM managers WHERE id = ?', (client['manager_id'],)).fetchone()[0]
+            reminder_ids = [row[0] for row in conn.execute(
+                'SELECT id FROM reminders WHERE manager_id = ? LIMIT 5', (client['manager_id'],)
+            )]
+        calls = build_calls(client['manager_id'], telegram_id, client['id'], client['phone'], reminder_ids)
+
+        public = {
+            name for name, _ in inspect.getmembers(Database, inspect.isfunction)
+            if not name.startswith('_') and name != 'close'
+        }
+        missing = sorted(public - set(calls))
+
+        problems = 0
+        with db._connection() as conn:
+            for method, call in calls.items():
+                db.pool.statements.clear()
+                db.manager_cache.clear()
+                call(db)
+
+                seen = OrderedDict()
+                for sql in db.pool.statements:
+                    # Служебные запросы SQLite к теневым таблицам FTS5 ('main'.'clients_fts_config')
+                    if sql.lstrip().upper().startswith(SKIP_PREFIXES) or "'main'." in sql:
+                        continue
+                    seen.setdefault(normalize(sql), sql)
+
+                for sql in seen.values():
+                    plan = explain(conn, sql)
+                    issues = find_issues(plan)
+                    allowed = method in ALLOWED
+                    if issues and not allowed:
+                        problems += 1
+                    if issues or args.verbose:
+                        mark = '⚠️ ' if issues and not allowed else ('ℹ️ ' if issues else '✅')
+                        print(f"{mark} {method}: {' '.join(sql.split())[:160]}")
+                        for detail in plan:
+                            print(f"      {detail}")
+                        if issues and allowed:
+                            print(f"      разрешено: {ALLOWED[method]}")
+                        suggestions = {suggest_index(sql, issue) for issue in issues} if not allowed else set()
+                        for suggestion in sorted(filter(None, suggestions)):
+                            print(f"      💡 {suggestion}")
+
+            redundant = redundant_indexes(conn)
+        db.close()
+
+    for line in redundant:
+        print(f"⚠️  {line}")
+    for name in missing:
+        print(f"⚠️  Метод Database.{name} не покрыт аудитом: добавьте его в build_calls()")
+
+    total = problems + len(redundant) + len(missing)
+    if total:
+        print(f"❌ Найдено проблем: {total}")
+        sys.exit(1)
+    print(f"✅ Все запросы {len(calls)} методов Database используют индексы")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Нагрузочный бенчмарк: p99 задержки обработчика с Database и AsyncDatabase.
+
+Запуск: python benchmarks/bench_async_db.py [--updates 2000] [--concurrency 100]
+
+Имитирует апдейты, которые делают те же запросы, что и process_phone_input
+(get_manager → get_client → create_client → save_last_bot_message), плюс
+"сетевой" вызов Bot API. Половина апдейтов — "лёгкие" (без БД, как
+process_name): пока синхронные запросы выполняются прямо в event loop, они
+стоят в очереди за чужими запросами к SQLite.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from database import Database
+from async_database import AsyncDatabase
+from init_db import init_database
+
+API_LATENCY = 0.005  # имитация round-trip к Telegram
+
+
+async def _call(db, method, *args):
+    result = getattr(db, method)(*args)
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+async def simulated_update(db, telegram_id: int, phone: str, latencies: list):
+    started = time.perf_counter()
+    manager = await _call(db, 'get_manager', telegram_id)
+    client = await _call(db, 'get_client', manager['id'], phone)
+    if not client:
+        await _call(db, 'create_client', manager['id'], 'Клиент', phone)
+    await asyncio.sleep(API_LATENCY)
+    await _call(db, 'save_last_bot_message', telegram_id, telegram_id + 1)
+    latencies.append(time.perf_counter() - started)
+
+
+async def light_update(latencies: list):
+    started = time.perf_counter()
+    await asyncio.sleep(API_LATENCY)
+    latencies.append(time.perf_counter() - started)
+
+
+async def run(db, managers: int, updates: int, concurrency: int):
+    heavy, light = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int):
+        async with semaphore:
+            if i % 2:
+                await light_update(light)
+            else:
+                telegram_id = 1000 + i % managers
+                await simulated_update(db, telegram_id, f'+7916{i:07d}', heavy)
+
+    await asyncio.gather(*(worker(i) for i in range(updates)))
+    return heavy, light
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def prepare(path: str, managers: int) -> Database:
+    init_database(path)
+    database = Database(path)
+    for i in range(managers):
+        database.create_manager(1000 + i, f'Менеджер {i}', 'auto', f'+7999{i:07d}')
+    return database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--managers', type=int, default=50)
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name in ('sync', 'async'):
+            database = prepare(os.path.join(tmp, f'{name}.db'), args.managers)
+            db = database if name == 'sync' else AsyncDatabase(database, args.workers)
+            started = time.perf_counter()
+            heavy, light = asyncio.run(run(db, args.managers, args.updates, args.concurrency))
+            elapsed = time.perf_counter() - started
+            if name == 'async':
+                db.close()
+            results[name] = (heavy, light, elapsed)
+
+    print(f"\n{'режим':<8}{'upd/s':>8}{'БД p50':>10}{'БД p99':>10}{'без БД p99':>12}  (мс)")
+    for name, (heavy, light, elapsed) in results.items():
+        print(f"{name:<8}{(len(heavy) + len(light)) / elapsed:>8.0f}"
+              f"{percentile(heavy, 0.50) * 1000:>10.1f}"
+              f"{percentile(heavy, 0.99) * 1000:>10.1f}"
+              f"{percentile(light, 0.99) * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
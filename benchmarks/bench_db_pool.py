@@ -0,0 +1,83 @@
+"""Микробенчмарк: ops/sec get_manager/get_client с пулом соединений и без.
+
+Запуск: python benchmarks/bench_db_pool.py [--ops 20000] [--threads 4]
+
+"Без пула" — прежнее поведение: sqlite3.connect() и close() на каждый запрос.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from database import Database
+from init_db import init_database
+
+
+class UnpooledDatabase(Database):
+    """Database с новым соединением на каждый запрос"""
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def populate(db: Database, managers: int, clients: int):
+    for i in range(managers):
+        manager_id = db.create_manager(1000 + i, f'Менеджер {i}', 'auto', f'+7999{i:07d}')
+        for j in range(clients):
+            db.create_client(manager_id, f'Клиент {j}', f'+7916{i:03d}{j:04d}')
+
+
+def measure(db: Database, ops: int, threads: int, managers: int, clients: int) -> float:
+    def work(start: int):
+        for i in range(start, ops, threads):
+            manager = db.get_manager(1000 + i % managers)
+            db.get_client(manager['id'], f'+7916{i % managers:03d}{i % clients:04d}')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(work, range(threads)))
+    # Каждая итерация — два запроса
+    return ops * 2 / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ops', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--managers', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        init_database(path)
+        pooled = Database(path, pool_size=args.threads)
+        populate(pooled, args.managers, args.clients)
+
+        results = {
+            'без пула': measure(UnpooledDatabase(path), args.ops, args.threads, args.managers, args.clients),
+            'с пулом': measure(pooled, args.ops, args.threads, args.managers, args.clients),
+        }
+        pooled.close()
+
+    print()
+    for name, rate in results.items():
+        print(f"{name:<10}{rate:>12.0f} ops/s")
+
+
+if __name__ == '__main__':
+    main()
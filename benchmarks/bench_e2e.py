@@ -0,0 +1,357 @@
+"""Сквозной нагрузочный тест бота: настоящий router, поддельный Bot API.
+
+Запуск: python benchmarks/bench_e2e.py [--users 1000] [--clients 5] [--concurrency 100] [--json out.json]
+
+Прогоняет через Dispatcher с обработчиками из src/handlers.py синтетические
+апдейты: каждый менеджер регистрируется (/start, имя, сфера, контакт,
+правила), добавляет клиентов по номеру телефона и проходит по меню
+(клиенты, поиск, напоминания, шаблоны, настройки). Запросы к Bot API
+сериализуются и разбираются так же, как в настоящей сессии, но вместо
+сети отвечает FakeSession, которая ведёт счёт вызовам.
+
+Печатает upd/s, p50/p95/p99 времени обработки апдейта по шагам сценария
+(при --concurrency больше 1 оно включает ожидание event loop),
+обращения к Database и SQL-запросы на апдейт, вызовы Bot API на апдейт.
+Данные генерируются детерминированно (--seed), БД каждый раз новая, поэтому
+результаты разных прогонов можно сравнивать; --json сохраняет их в файл.
+Лимиты Telegram (API_*_RATE) по умолчанию сняты, чтобы мерить сам бот.
+С --metrics подключается сбор метрик, как в main.py (видна его цена).
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+FAKE_TOKEN = '123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA'
+BOT_ID = 123456
+
+# Служебные запросы, которые не считаем
+SKIP_PREFIXES = ('PRAGMA', 'SELECT 1')
+
+NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Сергей', 'Елена', 'Дмитрий', 'Наталья', 'Алексей')
+SURNAMES = ('Иванов', 'Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев', 'Козлов')
+
+
+def percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def build_session_class():
+    from aiogram.client.session.base import BaseSession
+    from aiogram.methods import EditMessageText, SendDocument, SendMessage
+
+    class FakeSession(BaseSession):
+        """Сессия Bot API без сети: сериализует запрос и разбирает готовый ответ"""
+
+        def __init__(self, latency: float = 0.0):
+            super().__init__()
+            self.latency = latency
+            self.calls = Counter()
+            self._message_ids = defaultdict(int)
+            # Последнее сообщение бота в чате — на нём пользователь нажимает кнопки
+            self.last_message_id = {}
+
+        def _message(self, chat_id: int, message_id: int, text: str = None) -> dict:
+            return {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': BOT_ID, 'is_bot': True, 'first_name': 'Bot'},
+                'text': text,
+            }
+
+        async def make_request(self, bot, method, timeout=None):
+            files = {}
+            payload = {
+                key: self.prepare_value(value, bot=bot, files=files)
+                for key, value in method.model_dump(warnings=False).items()
+            }
+            self.calls[method.__api_method__] += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            if isinstance(method, (SendMessage, SendDocument)):
+                chat_id = int(payload['chat_id'])
+                self._message_ids[chat_id] += 1
+                self.last_message_id[chat_id] = self._message_ids[chat_id]
+                result = self._message(chat_id, self._message_ids[chat_id], payload.get('text'))
+            elif isinstance(method, EditMessageText):
+                result = self._message(int(payload['chat_id']), int(payload['message_id']), payload['text'])
+            else:
+                # answerCallbackQuery, deleteMessage и прочие возвращают True
+                result = True
+
+            content = self.json_dumps({'ok': True, 'result': result})
+            return self.check_response(bot=bot, method=method, status_code=200, content=content).result
+
+        async def stream_content(self, url, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b''
+
+        async def close(self):
+            pass
+
+    return FakeSession
+
+
+class UpdateFactory:
+    """Синтетические апдейты с последовательными update_id"""
+
+    def __init__(self, session):
+        self.session = session
+        self.update_id = 0
+        self.message_id = 0
+
+    def _next(self) -> dict:
+        self.update_id += 1
+        return {'update_id': self.update_id}
+
+    def _user(self, user_id: int) -> dict:
+        return {'id': user_id, 'is_bot': False, 'first_name': 'Bench', 'language_code': 'ru'}
+
+    def message(self, user_id: int, text: str = None, contact: dict = None) -> dict:
+        self.message_id += 1
+        update = self._next()
+        update['message'] = {
+            'message_id': self.message_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': self._user(user_id),
+        }
+        if text is not None:
+            update['message']['text'] = text
+            if text.startswith('/'):
+                update['message']['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+        if contact is not None:
+            update['message']['contact'] = contact
+        return update
+
+    def callback(self, user_id: int, data: str) -> dict:
+        update = self._next()
+        update['callback_query'] = {
+            'id': str(self.update_id),
+            'from': self._user(user_id),
+            'chat_instance': str(user_id),
+            'data': data,
+            'message': {
+                'message_id': self.session.last_message_id.get(user_id, 1),
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': {'id': BOT_ID, 'is_bot': True, 'first_name': 'Bot'},
+                'text': '...',
+            },
+        }
+        return update
+
+
+def scenario(rng: random.Random, user_id: int, clients: int):
+    """Шаги одного менеджера: (название шага, тип апдейта, аргументы)"""
+    name = f"{rng.choice(NAMES)} {rng.choice(SURNAMES)}"
+    yield 'start', 'message', {'text': '/start'}
+    yield 'name', 'message', {'text': name}
+    yield 'industry', 'callback', {'data': rng.choice(('industry_auto', 'industry_real_estate'))}
+    yield 'contact', 'message', {'contact': {'phone_number': f'7916{user_id % 10_000_000:07d}', 'first_name': name}}
+    yield 'terms', 'callback', {'data': 'terms_accept'}
+
+    phones = []
+    for _ in range(clients):
+        phone = f'+7 (9{rng.randint(10, 99)}) {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}'
+        phones.append(phone)
+        yield 'client_phone', 'message', {'text': phone}
+        yield 'client_name', 'message', {'text': f"{rng.choice(NAMES)} {rng.choice(SURNAMES)}"}
+    if phones:
+        # Повторный ввод номера открывает карточку существующего клиента
+        yield 'client_card', 'message', {'text': rng.choice(phones)}
+
+    yield 'menu_clients', 'callback', {'data': 'menu_clients'}
+    yield 'search', 'callback', {'data': 'clients_search'}
+    yield 'search_query', 'message', {'text': rng.choice(SURNAMES)[:4]}
+    yield 'menu_reminders', 'callback', {'data': 'menu_reminders'}
+    yield 'menu_templates', 'callback', {'data': 'menu_templates'}
+    yield 'menu_settings', 'callback', {'data': 'menu_settings'}
+    yield 'main_menu', 'callback', {'data': 'main_menu'}
+
+
+async def run(args) -> dict:
+    import logging
+    from aiogram import Bot, Dispatcher
+    from aiogram.types import Update
+
+    import handlers
+    from db_pool import ConnectionPool
+    from fsm_storage import SQLiteStorage
+    from init_db import init_database
+
+    # Логи обработчиков на каждый апдейт искажают замер
+    logging.disable(logging.INFO)
+
+    class CountingPool(ConnectionPool):
+        """Пул, записывающий все выполненные запросы"""
+
+        def __init__(self, *pool_args, **kwargs):
+            super().__init__(*pool_args, **kwargs)
+            self.statements = []
+
+        def _create(self):
+            conn = super()._create()
+            conn.set_trace_callback(self.statements.append)
+            return conn
+
+    init_database(handlers.Config.DB_PATH)
+    database = handlers.db.database
+    pool = database.pool
+    pool.close()
+    database.pool = CountingPool(
+        pool.db_path, max_size=pool.max_size, cache_size_kb=pool.cache_size_kb, mmap_size=pool.mmap_size
+    )
+
+    # Считаем обращения к Database: все они идут через AsyncDatabase._run
+    db_calls = Counter()
+    run_in_pool = handlers.db._run
+
+    async def counting_run(func, *func_args, **kwargs):
+        db_calls[getattr(func, '__name__', 'other')] += 1
+        return await run_in_pool(func, *func_args, **kwargs)
+
+    handlers.db._run = counting_run
+
+    session = build_session_class()(latency=args.api_latency / 1000)
+    bot = Bot(token=FAKE_TOKEN, session=session)
+    storage = SQLiteStorage(handlers.db, flush_interval=handlers.Config.FSM_FLUSH_INTERVAL)
+    dp = Dispatcher(storage=storage)
+    dp.include_router(handlers.router)
+    if args.metrics:
+        handlers.metrics.setup(dp, bot)
+
+    rng = random.Random(args.seed)
+    factory = UpdateFactory(session)
+    user_ids = [1_000_000 + i for i in range(args.users)]
+    plans = {user_id: list(scenario(rng, user_id, args.clients)) for user_id in user_ids}
+
+    latencies = defaultdict(list)
+    errors = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def drive(user_id: int):
+        # Апдейты одного пользователя идут строго по порядку, как в Telegram
+        async with semaphore:
+            for step, kind, params in plans[user_id]:
+                raw = getattr(factory, kind)(user_id, **params)
+                update = Update.model_validate(raw, context={'bot': bot})
+                started = time.perf_counter()
+                try:
+                    await dp.feed_update(bot, update)
+                except Exception as e:
+                    errors[f"{step}: {type(e).__name__}: {e}"] += 1
+                latencies[step].append(time.perf_counter() - started)
+
+    await handlers.message_tracker.load()
+    started = time.perf_counter()
+    await asyncio.gather(*(drive(user_id) for user_id in user_ids))
+    await handlers.message_deleter.drain()
+    elapsed = time.perf_counter() - started
+
+    await storage.close()
+    await handlers.message_tracker.stop()
+    handlers.db.close()
+
+    statements = [sql for sql in database.pool.statements
+                  if not sql.lstrip().upper().startswith(SKIP_PREFIXES) and "'main'." not in sql]
+    updates = sum(len(values) for values in latencies.values())
+    all_latencies = [value for values in latencies.values() for value in values]
+    api_calls = sum(session.calls.values())
+
+    return {
+        'users': args.users,
+        'updates': updates,
+        'seconds': round(elapsed, 3),
+        'updates_per_second': round(updates / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(all_latencies, 50) * 1000, 3),
+            'p95': round(percentile(all_latencies, 95) * 1000, 3),
+            'p99': round(percentile(all_latencies, 99) * 1000, 3),
+        },
+        'steps': {
+            step: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p95_ms': round(percentile(values, 95) * 1000, 3),
+                'p99_ms': round(percentile(values, 99) * 1000, 3),
+            }
+            for step, values in latencies.items()
+        },
+        'db_calls_per_update': round(sum(db_calls.values()) / updates, 2),
+        'sql_per_update': round(len(statements) / updates, 2),
+        'api_calls_per_update': round(api_calls / updates, 2),
+        'db_calls': dict(db_calls.most_common()),
+        'api_calls': dict(session.calls.most_common()),
+        'errors': dict(errors),
+        'metrics': handlers.metrics.summary() if args.metrics else None,
+    }
+
+
+def report(result: dict):
+    print(f"\n📊 {result['updates']} апдейтов от {result['users']} менеджеров за {result['seconds']:.2f} с: "
+          f"{result['updates_per_second']:.0f} upd/s")
+    latency = result['latency_ms']
+    print(f"   задержка: p50 {latency['p50']:.2f} мс, p95 {latency['p95']:.2f} мс, p99 {latency['p99']:.2f} мс")
+    print(f"   на апдейт: {result['db_calls_per_update']} обращений к Database, "
+          f"{result['sql_per_update']} SQL-запросов, {result['api_calls_per_update']} вызовов Bot API")
+
+    print(f"\n{'шаг':<16}{'апдейтов':>10}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+    for step, stats in result['steps'].items():
+        print(f"{step:<16}{stats['count']:>10}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+    print("\nDatabase: " + ", ".join(f"{name} {count}" for name, count in result['db_calls'].items()))
+    print("Bot API:  " + ", ".join(f"{name} {count}" for name, count in result['api_calls'].items()))
+    if result['metrics']:
+        print("\n" + result['metrics'])
+    for error, count in result['errors'].items():
+        print(f"❌ {error} (×{count})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000, help='менеджеров в сценарии')
+    parser.add_argument('--clients', type=int, default=5, help='клиентов, добавляемых каждым менеджером')
+    parser.add_argument('--concurrency', type=int, default=100, help='менеджеров, работающих одновременно')
+    parser.add_argument('--api-latency', type=float, default=0.0, help='имитация задержки Bot API, мс')
+    parser.add_argument('--telegram-limits', action='store_true', help='соблюдать лимиты API_*_RATE из .env')
+    parser.add_argument('--metrics', action='store_true', help='подключить middleware метрик и вывести сводку')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='сохранить результаты в файл')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Config читает окружение при импорте handlers
+        os.environ['DB_PATH'] = os.path.join(tmp, 'bench.db')
+        if not args.telegram_limits:
+            for name in ('API_GLOBAL_RATE', 'API_CHAT_RATE', 'API_CHAT_BURST'):
+                os.environ[name] = '1000000'
+        # Database печатает каждое действие — в замер это не входит
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = asyncio.run(run(args))
+
+    report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Результаты сохранены в {args.json}")
+    if result['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
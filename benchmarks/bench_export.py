@@ -0,0 +1,99 @@
+"""Бенчмарк выгрузки клиентов: время и пиковая память (RSS).
+
+Запуск: python benchmarks/bench_export.py [--clients 500000] [--max-rss-mb 50]
+
+Заполняет менеджера клиентами, выгружает их в CSV (и в XLSX, если установлен
+openpyxl) через ClientExporter и сравнивает прирост пикового RSS с загрузкой
+всех строк списком, как это делает get_clients. Завершается с ошибкой,
+если потоковая выгрузка увеличила пиковый RSS больше чем на --max-rss-mb.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from database import Database
+from async_database import AsyncDatabase
+from init_db import init_database
+from exporters import ClientExporter, xlsx_available
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss — в КБ на Linux и в байтах на macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def populate(db: Database, manager_id: int, clients: int, batch_size: int = 10000):
+    for start in range(0, clients, batch_size):
+        db.bulk_insert_clients(manager_id, [
+            (f'Клиент {i} с довольно длинным именем', f'+7916{i:07d}')
+            for i in range(start, min(start + batch_size, clients))
+        ])
+
+
+async def export(db: AsyncDatabase, manager_id: int, fmt: str, chunk_size: int):
+    exporter = ClientExporter(db, chunk_size=chunk_size)
+    if fmt == 'xlsx':
+        return await exporter.export_xlsx(manager_id)
+    return await exporter.export_csv(manager_id)
+
+
+def measure(title: str, func):
+    before = peak_rss_mb()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    growth = peak_rss_mb() - before
+    print(f"{title:<28} {elapsed:7.2f} с, прирост пикового RSS {growth:7.1f} МБ")
+    return result, growth
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=500000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--max-rss-mb', type=float, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        init_database(path)
+        # Без mmap: страницы отображённого файла БД тоже попадают в RSS
+        database = Database(path, mmap_size=0)
+        manager_id = database.create_manager(1000, 'Менеджер', 'auto', '+79990000000')
+        print(f"Заполнение: {args.clients} клиентов...")
+        populate(database, manager_id, args.clients)
+        db = AsyncDatabase(database)
+
+        formats = ['csv'] + (['xlsx'] if xlsx_available() else [])
+        worst = 0.0
+        # Потоковые выгрузки — до материализации списка, иначе пик уже поднят
+        for fmt in formats:
+            (buffer, rows), growth = measure(
+                f"выгрузка {fmt.upper()}",
+                lambda: asyncio.run(export(db, manager_id, fmt, args.chunk_size))
+            )
+            buffer.seek(0, os.SEEK_END)
+            print(f"{'':<28} строк {rows}, файл {buffer.tell() / 1024 / 1024:.1f} МБ")
+            buffer.close()
+            worst = max(worst, growth)
+
+        measure("get_clients (весь список)", lambda: database.get_clients(manager_id, limit=args.clients))
+        db.close()
+
+    if worst > args.max_rss_mb:
+        print(f"❌ Пиковый RSS вырос на {worst:.1f} МБ (> {args.max_rss_mb} МБ)")
+        sys.exit(1)
+    print(f"✅ Пиковый RSS при выгрузке вырос не больше чем на {args.max_rss_mb} МБ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Бенчмарк импорта клиентов из CSV/vCard.
+
+Запуск: python benchmarks/bench_import.py [--rows 100000] [--format csv|vcf]
+
+Генерирует файл с контактами (часть номеров повторяется, часть невалидна)
+и импортирует его через ClientImporter так же, как обработчик загрузки файла.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from database import Database
+from async_database import AsyncDatabase
+from init_db import init_database
+from importers import ClientImporter, open_text, iter_csv_contacts, iter_vcard_contacts
+
+
+def generate(rows: int, fmt: str) -> bytes:
+    rnd = random.Random(1)
+    out = io.StringIO()
+    if fmt == 'csv':
+        out.write('Имя;Телефон;Комментарий\n')
+    for i in range(rows):
+        # ~5% повторов и ~2% мусора вместо номера
+        n = rnd.randrange(rows) if rnd.random() < 0.05 else i
+        phone = 'нет' if rnd.random() < 0.02 else f'8 (916) {n // 10000:03d}-{n // 100 % 100:02d}-{n % 100:02d}'
+        name = f'иван петров {i}'
+        if fmt == 'csv':
+            out.write(f'{name};{phone};импорт\n')
+        else:
+            out.write(f'BEGIN:VCARD\r\nVERSION:3.0\r\nFN:{name}\r\nTEL;TYPE=CELL:{phone}\r\nEND:VCARD\r\n')
+    return out.getvalue().encode('utf-8')
+
+
+async def run(db: AsyncDatabase, manager_id: int, data: bytes, fmt: str, batch_size: int):
+    importer = ClientImporter(db, batch_size=batch_size)
+    parse = iter_csv_contacts if fmt == 'csv' else iter_vcard_contacts
+    stream = open_text(io.BytesIO(data))
+    return await importer.run(manager_id, parse(stream))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--format', choices=('csv', 'vcf'), default='csv')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    data = generate(args.rows, args.format)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        init_database(path)
+        database = Database(path)
+        manager_id = database.create_manager(1000, 'Менеджер', 'auto', '+79990000000')
+        db = AsyncDatabase(database)
+
+        for attempt in ('первый импорт', 'повторный импорт'):
+            started = time.perf_counter()
+            stats = asyncio.run(run(db, manager_id, data, args.format, args.batch_size))
+            elapsed = time.perf_counter() - started
+            print(f"{attempt}: {stats.total} строк за {elapsed:.2f} с ({stats.total / elapsed:.0f} строк/с), "
+                  f"добавлено {stats.imported}, повторов {stats.duplicates}, ошибок {stats.invalid}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
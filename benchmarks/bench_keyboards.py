@@ -0,0 +1,98 @@
+"""Бенчмарк клавиатур: общие закэшированные разметки против сборки на каждый вызов.
+
+Запуск: python benchmarks/bench_keyboards.py [--calls 20000]
+
+Для каждой клавиатуры из Keyboards сравнивает сборку заново (исходная
+функция под lru_cache, `__wrapped__`) с закэшированной разметкой: время на
+вызов и память, которую оставляет каждый вызов (tracemalloc). Отдельно
+меряется «вызов обработчика» целиком — клавиатура, SendMessage и его
+сериализация, как в сессии Bot API, — чтобы видеть долю клавиатуры.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from aiogram.methods import SendMessage
+from aiogram.types import InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from callbacks import CLIENTS_NEXT, CLIENTS_PREV
+from keyboards import Keyboards
+
+
+def build_clients_menu(page: int = 1, prev_id: int = None, next_id: int = None):
+    """Меню списка клиентов целиком через builder, как до кэширования"""
+    builder = InlineKeyboardBuilder()
+    navigation = []
+    if prev_id is not None:
+        navigation.append(InlineKeyboardButton(text="⬅️", callback_data=CLIENTS_PREV.pack(prev_id, page - 1)))
+    if next_id is not None:
+        navigation.append(InlineKeyboardButton(text="➡️", callback_data=CLIENTS_NEXT.pack(next_id, page + 1)))
+    builder.add(*navigation)
+    builder.add(
+        InlineKeyboardButton(text="🔍 Поиск", callback_data="clients_search"),
+        InlineKeyboardButton(text="📥 Импорт контактов", callback_data="clients_import"),
+        InlineKeyboardButton(text="📤 Выгрузка", callback_data="clients_export"),
+        InlineKeyboardButton(text="↩️ Назад", callback_data="main_menu")
+    )
+    builder.adjust(*filter(None, [len(navigation), 1, 2, 1]))
+    return builder.as_markup()
+
+
+CASES = [
+    ('get_main_menu', Keyboards.get_main_menu.__wrapped__, Keyboards.get_main_menu, ()),
+    ('get_client_actions', Keyboards.get_client_actions.__wrapped__, Keyboards.get_client_actions, (42,)),
+    ('get_industry_keyboard', Keyboards.get_industry_keyboard.__wrapped__, Keyboards.get_industry_keyboard, ()),
+    ('get_back_button', Keyboards.get_back_button.__wrapped__, Keyboards.get_back_button, ('main_menu',)),
+    ('get_clients_menu', build_clients_menu, Keyboards.get_clients_menu, ()),
+    ('get_clients_menu(стр.)', build_clients_menu, Keyboards.get_clients_menu, (2, 10, 20)),
+]
+
+
+def measure(func, args, calls: int):
+    """Время на вызов (мкс) и память, оставленная вызовом (байт)"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    per_call = (time.perf_counter() - started) / calls * 1e6
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [func(*args) for _ in range(1000)]
+    retained = (tracemalloc.get_traced_memory()[0] - before) / len(kept)
+    tracemalloc.stop()
+    return per_call, retained
+
+
+def handler_call(keyboard, args):
+    """Клавиатура + запрос sendMessage + его сериализация, как в сессии"""
+    method = SendMessage(chat_id=1, text="🏠 *Главное меню*", reply_markup=keyboard(*args), parse_mode="Markdown")
+    return json.dumps(method.model_dump(warnings=False, exclude_none=True), ensure_ascii=False, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'клавиатура':<24}{'сборка, мкс':>13}{'кэш, мкс':>10}{'сборка, Б':>11}{'кэш, Б':>8}")
+    for name, build, cached, call_args in CASES:
+        assert build(*call_args) == cached(*call_args), name
+        build_time, build_memory = measure(build, call_args, args.calls)
+        cached_time, cached_memory = measure(cached, call_args, args.calls)
+        print(f"{name:<24}{build_time:>13.2f}{cached_time:>10.2f}{build_memory:>11.0f}{cached_memory:>8.0f}")
+
+    print("\nВызов обработчика (клавиатура + sendMessage + сериализация), get_main_menu:")
+    for title, keyboard in (('сборка', Keyboards.get_main_menu.__wrapped__), ('кэш', Keyboards.get_main_menu)):
+        per_call, retained = measure(lambda: handler_call(keyboard, ()), (), args.calls)
+        print(f"   {title:<8}{per_call:8.2f} мкс, {retained:.0f} Б на вызов")
+
+
+if __name__ == '__main__':
+    main()
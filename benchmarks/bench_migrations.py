@@ -0,0 +1,138 @@
+"""Бенчмарк миграций: обновление заполненной БД и холостой запуск.
+
+Запуск: python benchmarks/bench_migrations.py [--clients 200000] [--chunk-size 5000]
+
+Создаёт БД версии 1 (схема до миграций) с клиентами без last_contact,
+прерывает миграцию посреди заполнения FTS (миграция 5), затем посреди
+перестройки индекса с префиксом менеджера (миграция 8), доводит схему до
+последней версии и проверяет результат: last_contact заполнен, в индексе
+FTS столько же строк, сколько клиентов, поиск находит клиентов из порций
+до и после сбоя, индекс FTS цел. В конце меряет холостой запуск migrate(), когда
+схема уже актуальна.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+import migrations
+from migrations import migrate, LATEST_VERSION
+from database import Database
+
+
+class Interrupted(Exception):
+    pass
+
+
+def populate(path: str, clients: int, batch_size: int = 10000):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO managers (telegram_id, full_name, industry, phone) VALUES (1000, 'Менеджер', 'auto', '+79990000000')")
+    for start in range(0, clients, batch_size):
+        conn.executemany(
+            'INSERT INTO clients (manager_id, name, phone) VALUES (1, ?, ?)',
+            [(f'Клиент {i}', f'+7916{i:07d}') for i in range(start, min(start + batch_size, clients))]
+        )
+    conn.commit()
+    conn.close()
+
+
+def interrupt_after(name: str, chunks: int):
+    """Подменить заполнение name так, чтобы оно упало после chunks порций"""
+    table, fill = migrations.BACKFILLS[name]
+    calls = []
+
+    def failing(cursor, after_id, upto_id):
+        if len(calls) == chunks:
+            raise Interrupted()
+        calls.append(upto_id)
+        fill(cursor, after_id, upto_id)
+
+    migrations.BACKFILLS[name] = (table, failing)
+    return lambda: migrations.BACKFILLS.__setitem__(name, (table, fill))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        migrate(path, target=1)
+        populate(path, args.clients)
+        print(f"БД версии 1 с {args.clients} клиентами")
+
+        # Прерываем заполнение FTS на середине
+        restore = interrupt_after('clients_fts', args.clients // args.chunk_size // 2)
+        started = time.perf_counter()
+        try:
+            migrate(path, chunk_size=args.chunk_size)
+        except Interrupted:
+            pass
+        restore()
+        conn = sqlite3.connect(path)
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        progress = conn.execute('SELECT last_id, max_id FROM schema_backfills').fetchone()
+        print(f"Прервано: версия {version}, заполнение FTS {progress[0]}/{progress[1]}")
+
+        # Пока заполнение не завершено, бот продолжает менять клиентов
+        conn.execute("UPDATE clients SET name = 'Переименован' WHERE id IN (1, ?)", (args.clients,))
+        conn.execute('DELETE FROM clients WHERE id = 2')
+        conn.commit()
+        conn.close()
+
+        # Прерываем перестройку индекса с префиксом менеджера: повторный
+        # запуск должен продолжить её, а не пересоздать таблицу заново
+        restore = interrupt_after('clients_fts_manager', args.clients // args.chunk_size // 2)
+        try:
+            migrate(path, chunk_size=args.chunk_size)
+        except Interrupted:
+            pass
+        restore()
+        conn = sqlite3.connect(path)
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        progress = conn.execute('SELECT last_id, max_id FROM schema_backfills').fetchone()
+        print(f"Прервано: версия {version}, перестройка FTS {progress[0]}/{progress[1]}")
+        conn.execute('DELETE FROM clients WHERE id = 3')
+        conn.commit()
+        conn.close()
+
+        version = migrate(path, chunk_size=args.chunk_size)
+        print(f"Миграция до версии {version}: {time.perf_counter() - started:.2f} с")
+        assert version == LATEST_VERSION
+
+        conn = sqlite3.connect(path)
+        assert conn.execute('SELECT COUNT(*) FROM clients WHERE last_contact IS NULL').fetchone()[0] == 0
+        assert conn.execute('SELECT COUNT(*) FROM schema_backfills').fetchone()[0] == 0
+        conn.execute("INSERT INTO clients_fts(clients_fts, rank) VALUES ('integrity-check', 1)")
+        indexed = conn.execute('SELECT COUNT(*) FROM clients_fts_docsize').fetchone()[0]
+        assert indexed == conn.execute('SELECT COUNT(*) FROM clients').fetchone()[0], indexed
+        conn.close()
+
+        db = Database(path)
+        last = args.clients - 1
+        assert [c['id'] for c in db.search_clients(1, f'{last:07d}'[-4:])][:1] == [args.clients]
+        assert {c['id'] for c in db.search_clients(1, 'Переименован')} == {1, args.clients}
+        assert not db.search_clients(1, f'Клиент {args.clients - 1}')
+        assert not db.search_clients(1, '0000001')
+        assert not db.search_clients(1, '0000002')
+        # Клиент из первой порции, проиндексированной до сбоя миграции 8
+        assert [c['id'] for c in db.search_clients(1, '+79160000003')] == [4]
+        db.close()
+        print("✅ Данные после миграции корректны")
+
+        started = time.perf_counter()
+        for _ in range(100):
+            migrate(path)
+        print(f"Холостой запуск migrate(): {(time.perf_counter() - started) * 10:.3f} мс")
+
+
+if __name__ == '__main__':
+    main()
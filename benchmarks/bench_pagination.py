@@ -0,0 +1,102 @@
+"""Бенчмарк списка клиентов: keyset-пагинация против OFFSET.
+
+Запуск: python benchmarks/bench_pagination.py [--clients 100000] [--page-size 10]
+
+Клиенты добавляются пачками, как при импорте, поэтому у многих одинаковый
+last_contact. Скрипт проверяет, что листание вперёд и назад через
+get_clients_page проходит всех клиентов в том же порядке, что и OFFSET,
+и сравнивает время выборки N-й страницы.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from database import Database
+from init_db import init_database
+
+
+def populate(db: Database, manager_id: int, clients: int, batch_size: int = 10000):
+    with db._connection() as conn:
+        for start in range(0, clients, batch_size):
+            # Одна метка времени на пачку — как у импорта из файла
+            timestamp = f'2026-01-{start // batch_size % 28 + 1:02d} 12:00:00'
+            conn.executemany(
+                'INSERT INTO clients (manager_id, name, phone, last_contact) VALUES (?, ?, ?, ?)',
+                [(manager_id, f'Клиент {i}', f'+7916{i:07d}', timestamp)
+                 for i in range(start, min(start + batch_size, clients))]
+            )
+        conn.commit()
+
+
+def offset_page(db: Database, manager_id: int, page: int, page_size: int):
+    with db._connection() as conn:
+        return [row[0] for row in conn.execute('''
+        SELECT id FROM clients WHERE manager_id = ?
+        ORDER BY last_contact DESC, id DESC
+        LIMIT ? OFFSET ?
+        ''', (manager_id, page_size, (page - 1) * page_size))]
+
+
+def timed(func, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        init_database(path)
+        db = Database(path)
+        manager_id = db.create_manager(1000, 'Менеджер', 'auto', '+79990000000')
+        populate(db, manager_id, args.clients)
+
+        # Проход всех страниц вперёд, затем назад
+        with db._connection() as conn:
+            expected = [row[0] for row in conn.execute(
+                'SELECT id FROM clients WHERE manager_id = ? ORDER BY last_contact DESC, id DESC',
+                (manager_id,)
+            )]
+        pages = []
+        clients, has_more = db.get_clients_page(manager_id, args.page_size)
+        pages.append(clients)
+        started = time.perf_counter()
+        while has_more:
+            clients, has_more = db.get_clients_page(manager_id, args.page_size, after_id=clients[-1]['id'])
+            pages.append(clients)
+        forward = time.perf_counter() - started
+        walked = [client['id'] for page in pages for client in page]
+        assert walked == expected, "листание вперёд не совпало с ORDER BY"
+
+        clients = pages[-1]
+        for page in reversed(pages[:-1]):
+            clients, has_more = db.get_clients_page(manager_id, args.page_size, before_id=clients[0]['id'])
+            assert [c['id'] for c in clients] == [c['id'] for c in page], "листание назад не совпало"
+        assert not has_more
+        print(f"✅ {len(pages)} страниц пройдены вперёд и назад ({forward:.2f} с вперёд)")
+
+        print(f"{'страница':>10} {'keyset, мс':>12} {'OFFSET, мс':>12}")
+        for number in (1, 10, 100, 1000, len(pages)):
+            if number > len(pages):
+                continue
+            after_id = pages[number - 2][-1]['id'] if number > 1 else None
+            keyset = timed(lambda: db.get_clients_page(manager_id, args.page_size, after_id=after_id))
+            offset = timed(lambda: offset_page(db, manager_id, number, args.page_size))
+            print(f"{number:>10} {keyset:>12.3f} {offset:>12.3f}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Бенчмарк нормализации телефонов: PhoneUtils.standardize_phone до и после.
+
+Запуск: python benchmarks/bench_phone.py [--calls 200000]
+
+Корпус — типичный ввод менеджеров (89161234567, +7 916 123-45-67,
+9161234567, городские и зарубежные номера) и произвольный текст.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import phonenumbers
+from utils import PhoneUtils
+
+
+def baseline_standardize(phone_input):
+    """Прежняя реализация: regex + phonenumbers на каждый вызов"""
+    if not phone_input:
+        return None
+    try:
+        cleaned = re.sub(r'[^\d+]', '', phone_input)
+        if cleaned.startswith('8'):
+            cleaned = '+7' + cleaned[1:]
+        elif cleaned.startswith('7') and not cleaned.startswith('+7'):
+            cleaned = '+' + cleaned
+        if not cleaned.startswith('+'):
+            cleaned = '+7' + cleaned
+        parsed = phonenumbers.parse(cleaned, None)
+        if phonenumbers.is_valid_number(parsed):
+            return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+        return None
+    except Exception:
+        return None
+
+
+def build_corpus(size: int, seed: int = 42) -> list:
+    rnd = random.Random(seed)
+    junk = ['привет', 'Позвонить завтра', 'ок', 'Иван Петров', '???', 'спасибо!', '12']
+    corpus = []
+    for _ in range(size):
+        digits = '9' + ''.join(rnd.choice('0123456789') for _ in range(9))
+        kind = rnd.random()
+        if kind < 0.25:
+            corpus.append('8' + digits)
+        elif kind < 0.45:
+            corpus.append(f'+7 {digits[:3]} {digits[3:6]}-{digits[6:8]}-{digits[8:]}')
+        elif kind < 0.6:
+            corpus.append(digits)
+        elif kind < 0.7:
+            corpus.append(f'8 (495) {rnd.randint(100, 999)}-{rnd.randint(10, 99)}-{rnd.randint(10, 99)}')
+        elif kind < 0.75:
+            corpus.append(f'+44 20 7946 {rnd.randint(1000, 9999)}')
+        else:
+            corpus.append(rnd.choice(junk))
+    return corpus
+
+
+def measure(func, corpus: list) -> float:
+    started = time.perf_counter()
+    for value in corpus:
+        func(value)
+    return (time.perf_counter() - started) / len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--unique', type=int, default=50000, help='уникальных строк в корпусе')
+    args = parser.parse_args()
+
+    unique = build_corpus(args.unique)
+    corpus = [unique[i % len(unique)] for i in range(args.calls)]
+
+    mismatches = [v for v in unique if baseline_standardize(v) != PhoneUtils.standardize_phone(v)]
+    assert not mismatches, mismatches[:5]
+
+    fast_path = PhoneUtils.standardize_phone.__wrapped__
+    results = {
+        'прежний': measure(baseline_standardize, corpus),
+        'быстрый путь': measure(fast_path, corpus),
+    }
+    PhoneUtils.standardize_phone.cache_clear()
+    results['с кэшем'] = measure(PhoneUtils.standardize_phone, corpus)
+
+    print(f"\nКорпус: {args.calls} вызовов, {len(unique)} уникальных строк")
+    for name, cost in results.items():
+        print(f"{name:<14}{cost * 1e6:>8.2f} мкс/вызов")
+    print(f"Кэш: {PhoneUtils.standardize_phone.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
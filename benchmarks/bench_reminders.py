@@ -0,0 +1,102 @@
+"""Бенчмарк планировщика напоминаний.
+
+Запуск: python benchmarks/bench_reminders.py [--pending 200000] [--due 5000]
+
+Измеряет загрузку N невыполненных напоминаний в кучу, стоимость add(),
+точность пробуждения (опоздание относительно due_date) и пропускную
+способность отправки пачками на фоне большой кучи.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from database import Database
+from async_database import AsyncDatabase
+from init_db import init_database
+from reminders import ReminderScheduler
+
+
+def utc(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def populate(database: Database, pending: int) -> int:
+    manager_id = database.create_manager(1000, 'Менеджер', 'auto', '+79990000000')
+    far = datetime.now(timezone.utc) + timedelta(days=30)
+    with database._connection() as conn:
+        conn.executemany(
+            'INSERT INTO reminders (manager_id, type, text, due_date) VALUES (?, ?, ?, ?)',
+            ((manager_id, 'call', f'Позвонить #{i}', utc(far + timedelta(seconds=i))) for i in range(pending))
+        )
+        conn.commit()
+    return manager_id
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(db: AsyncDatabase, manager_id: int, due: int, batch_size: int):
+    lateness = []
+
+    async def notify(reminder):
+        due_at = datetime.fromisoformat(reminder['due_date']).replace(tzinfo=timezone.utc).timestamp()
+        lateness.append(time.time() - due_at)
+
+    scheduler = ReminderScheduler(db, notify, batch_size=batch_size, poll_interval=3600)
+
+    started = time.perf_counter()
+    await scheduler.load()
+    print(f"Загрузка {len(scheduler)} напоминаний: {time.perf_counter() - started:.2f} с")
+
+    # Напоминания, срабатывающие через 1–2 секунды (due_date с точностью до секунды)
+    soon = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(seconds=2)
+    ids = []
+    for i in range(due):
+        due_date = utc(soon + timedelta(seconds=i % 2))
+        ids.append((await db.create_reminder(manager_id, None, 'call', f'Срочно #{i}', due_date), due_date))
+
+    started = time.perf_counter()
+    for reminder_id, due_date in ids:
+        scheduler.add(reminder_id, due_date)
+    add_cost = (time.perf_counter() - started) / len(ids)
+    print(f"add(): {add_cost * 1e6:.1f} мкс на напоминание (куча: {len(scheduler)})")
+
+    scheduler.start()
+    started = time.perf_counter()
+    while scheduler.dispatched < due and time.perf_counter() - started < 60:
+        await asyncio.sleep(0.05)
+    await scheduler.stop()
+
+    print(f"Отправлено {scheduler.dispatched} из {due}; опоздание p50 "
+          f"{percentile(lateness, 0.5) * 1000:.0f} мс, p99 {percentile(lateness, 0.99) * 1000:.0f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pending', type=int, default=200000)
+    parser.add_argument('--due', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        init_database(path)
+        database = Database(path)
+        manager_id = populate(database, args.pending)
+        db = AsyncDatabase(database)
+        asyncio.run(run(db, manager_id, args.due, args.batch_size))
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
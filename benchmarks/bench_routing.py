@@ -0,0 +1,135 @@
+"""Бенчмарк маршрутизации: перебор фильтров aiogram против индекса DispatchIndex.
+
+Запуск: python benchmarks/bench_routing.py [--handlers 10 50 250] [--updates 1000]
+
+Для каждого числа обработчиков собирает два Dispatcher с одинаковыми
+пустыми обработчиками: половина — кнопки с точным callback_data
+(F.data == ...), четверть — кнопки по префиксу (F.data.startswith),
+четверть — текст в своём состоянии FSM (StateFilter + F.text). Первый
+регистрирует их на роутере как обычно, второй — через DispatchIndex.
+Апдейты идут через Dispatcher.feed_update целиком (с FSM-middleware), сеть
+не используется. Меряется время на апдейт для обработчика, который
+зарегистрирован последним (худший случай перебора), и для апдейта без
+обработчика.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.filters import StateFilter
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from routing import DispatchIndex
+
+BOT_TOKEN = '42:BENCHMARK'
+USER_ID = 1001
+
+
+async def noop(event, state=None):
+    return None
+
+
+def split(handlers: int):
+    """Число обработчиков: точные кнопки, кнопки по префиксу, состояния"""
+    states = max(1, handlers // 4)
+    prefixes = max(1, handlers // 4)
+    return handlers - states - prefixes, prefixes, states
+
+
+def build_filters(handlers: int) -> Dispatcher:
+    exact, prefixes, states = split(handlers)
+    router = Router()
+    for i in range(exact):
+        router.callback_query(F.data == f"action_{i}")(noop)
+    for i in range(prefixes):
+        router.callback_query(F.data.startswith(f"group{i}_"))(noop)
+    for i in range(states):
+        router.message(StateFilter(f"Bench:state_{i}"), F.text)(noop)
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    return dispatcher
+
+
+def build_index(handlers: int) -> Dispatcher:
+    exact, prefixes, states = split(handlers)
+    index = DispatchIndex()
+    for i in range(exact):
+        index.callback(f"action_{i}")(noop)
+    for i in range(prefixes):
+        index.callback(prefix=f"group{i}_")(noop)
+    for i in range(states):
+        index.message(f"Bench:state_{i}", "text")(noop)
+    router = Router()
+    index.register(router)
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    return dispatcher
+
+
+def make_updates(handlers: int):
+    exact, prefixes, states = split(handlers)
+    user = User(id=USER_ID, is_bot=False, first_name='Bench')
+    chat = Chat(id=USER_ID, type='private')
+
+    def callback(data: str) -> Update:
+        return Update(update_id=1, callback_query=CallbackQuery(
+            id='1', from_user=user, chat_instance='1', data=data
+        ))
+
+    message = Update(update_id=1, message=Message(
+        message_id=1, date=0, chat=chat, from_user=user, text='Иван Петров'
+    ))
+    return {
+        'кнопка': callback(f"action_{exact - 1}"),
+        'префикс': callback(f"group{prefixes - 1}_77"),
+        'состояние': message,
+        'без обработчика': callback('unknown'),
+    }, f"Bench:state_{states - 1}"
+
+
+async def measure(dispatcher: Dispatcher, bot: Bot, update: Update, count: int) -> float:
+    """Время на апдейт, мкс"""
+    for _ in range(100):
+        await dispatcher.feed_update(bot, update)
+    started = time.perf_counter()
+    for _ in range(count):
+        await dispatcher.feed_update(bot, update)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+async def run(args):
+    bot = Bot(BOT_TOKEN)
+    key = StorageKey(bot_id=bot.id, chat_id=USER_ID, user_id=USER_ID)
+
+    print(f"{'обработчиков':<14}{'апдейт':<18}{'фильтры, мкс':>14}{'индекс, мкс':>13}{'ускорение':>11}")
+    for handlers in args.handlers:
+        updates, state = make_updates(handlers)
+        dispatchers = {'filters': build_filters(handlers), 'index': build_index(handlers)}
+        for dispatcher in dispatchers.values():
+            await dispatcher.storage.set_state(key, state)
+
+        for title, update in updates.items():
+            filters_time = await measure(dispatchers['filters'], bot, update, args.updates)
+            index_time = await measure(dispatchers['index'], bot, update, args.updates)
+            print(f"{handlers:<14}{title:<18}{filters_time:>14.1f}{index_time:>13.1f}"
+                  f"{filters_time / index_time:>10.1f}x")
+    await bot.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--handlers', type=int, nargs='+', default=[10, 50, 250])
+    parser.add_argument('--updates', type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Бенчмарк поиска клиентов: FTS5 (clients_fts) против LIKE.
+
+Запуск: python benchmarks/bench_search.py [--clients 200000] [--managers 1000]
+
+Заполняет базу клиентами (индекс clients_fts строится триггерами при
+вставке) и сравнивает среднее время Database.search_clients с поиском
+через LIKE по имени и номеру для нескольких типичных запросов. Клиенты
+распределены между --managers менеджерами: время поиска должно зависеть
+от числа клиентов менеджера, а не от размера всей таблицы.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from database import Database
+from init_db import init_database
+
+FIRST_NAMES = ['Иван', 'Пётр', 'Анна', 'Мария', 'Сергей', 'Ольга', 'Дмитрий', 'Елена', 'Алексей', 'Наталья']
+LAST_NAMES = ['Иванов', 'Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев', 'Козлов', 'Новиков', 'Морозов']
+
+
+def populate(db: Database, manager_ids, clients: int, batch_size: int = 50000):
+    rnd = random.Random(1)
+    for start in range(0, clients, batch_size):
+        batch = {manager_id: [] for manager_id in manager_ids}
+        for i in range(start, min(start + batch_size, clients)):
+            name = f'{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {i}'
+            batch[manager_ids[i % len(manager_ids)]].append((name, f'+79{rnd.randrange(10 ** 9):09d}'))
+        for manager_id, rows in batch.items():
+            db.bulk_insert_clients(manager_id, rows)
+
+
+def like_search(db: Database, manager_id: int, text: str, limit: int = 20):
+    pattern = f'%{text}%'
+    with db._connection() as conn:
+        return conn.execute('''
+        SELECT id, name, phone FROM clients
+        WHERE manager_id = ? AND (name LIKE ? OR phone LIKE ? OR notes LIKE ?)
+        LIMIT ?
+        ''', (manager_id, pattern, pattern, pattern, limit)).fetchall()
+
+
+def timed(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=200000)
+    parser.add_argument('--managers', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        init_database(path)
+        db = Database(path)
+        manager_ids = [
+            db.create_manager(1000 + i, f'Менеджер {i}', 'auto', f'+7999{i:07d}')
+            for i in range(args.managers)
+        ]
+        started = time.perf_counter()
+        populate(db, manager_ids, args.clients)
+        print(f"Заполнение {args.clients} клиентов с индексом FTS: {time.perf_counter() - started:.1f} с")
+
+        manager_id = manager_ids[0]
+        with db._connection() as conn:
+            sample = conn.execute(
+                'SELECT name, phone FROM clients WHERE manager_id = ? ORDER BY id DESC LIMIT 1',
+                (manager_id,)
+            ).fetchone()
+        number = sample['name'].split()[-1]
+        queries = [
+            ('последние 4 цифры', sample['phone'][-4:]),
+            ('номер целиком', '8' + sample['phone'][2:]),
+            ('имя и номер клиента', f"{sample['name'].split()[1]} {number}"),
+            ('частое имя', 'Иван'),
+            ('нет совпадений', 'Аристарх'),
+        ]
+
+        print(f"{'запрос':<22} {'FTS5, мс':>10} {'LIKE, мс':>10} {'найдено':>8}")
+        for title, text in queries:
+            found = db.search_clients(manager_id, text)
+            fts = timed(lambda: db.search_clients(manager_id, text), args.repeat)
+            like = timed(lambda: like_search(db, manager_id, text), max(1, args.repeat // 20))
+            print(f"{title:<22} {fts:>10.3f} {like:>10.3f} {len(found):>8}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Бенчмарк режима нескольких процессов: пропускная способность от числа шардов.
+
+Запуск: python benchmarks/bench_shards.py [--workers 1 2 4] [--users 400] [--clients 5]
+
+Для каждого числа шардов запускает ShardSupervisor с процессами-обработчиками
+на настоящем router из src/handlers.py и FakeSession вместо Bot API (как в
+bench_e2e.py), раздаёт им сценарий bench_e2e для --users менеджеров —
+апдейты разных пользователей вперемешку, как они приходят из Telegram — и
+ждёт, пока шарды всё обработают и завершатся. Апдейты раздаются, когда
+все процессы запущены; время считается от первого принятого шардом
+апдейта до последнего обработанного. После прогона проверяется, что все
+менеджеры зарегистрированы и все клиенты сохранены: при нарушении порядка
+апдейтов пользователя сценарий бы сломался.
+
+Масштабирование ограничено числом ядер (os.cpu_count()) и записью в общий
+файл SQLite: на одном ядре несколько шардов лишь делят его между собой.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from bench_e2e import FAKE_TOKEN, UpdateFactory, build_session_class, scenario
+
+STATS_ENV = 'BENCH_SHARD_STATS'
+
+
+async def run_worker():
+    """Процесс-обработчик: тот же запуск, что в main.py, но с FakeSession"""
+    import logging
+    from aiogram import Bot, Dispatcher
+
+    # Логи обработчиков на каждый апдейт искажают замер
+    logging.disable(logging.INFO)
+
+    import handlers
+    from fsm_storage import SQLiteStorage
+    from sharding import ShardWorker
+
+    class TimedWorker(ShardWorker):
+        first = None
+        last = None
+
+        async def _process(self, update, previous):
+            if self.first is None:
+                self.first = time.time()
+            await super()._process(update, previous)
+            self.last = time.time()
+
+    bot = Bot(token=FAKE_TOKEN, session=build_session_class()())
+    storage = SQLiteStorage(handlers.db, flush_interval=handlers.Config.FSM_FLUSH_INTERVAL)
+    dp = Dispatcher(storage=storage)
+    dp.include_router(handlers.router)
+
+    await handlers.message_tracker.load()
+    stats_dir = os.environ[STATS_ENV]
+    # Процесс готов: замер начнётся, когда будут готовы все шарды
+    open(os.path.join(stats_dir, f"ready{handlers.Config.SHARD_INDEX}"), 'w').close()
+    worker = TimedWorker(dp, bot, max_concurrency=handlers.Config.SHARD_MAX_CONCURRENCY)
+    await worker.run()
+    await handlers.message_deleter.drain()
+    await storage.close()
+    await handlers.message_tracker.stop()
+    handlers.db.close()
+
+    path = os.path.join(stats_dir, f"shard{handlers.Config.SHARD_INDEX}.json")
+    with open(path, 'w') as f:
+        json.dump({'first': worker.first, 'last': worker.last,
+                   'processed': worker.processed, 'failed': worker.failed}, f)
+
+
+def make_updates(users: int, clients: int, seed: int):
+    """Апдейты сценария: по порядку для каждого пользователя, вперемешку между пользователями"""
+    rng = random.Random(seed)
+
+    class NoSession:
+        last_message_id = {}
+
+    factory = UpdateFactory(NoSession())
+    plans = [
+        [getattr(factory, kind)(user_id, **params) for _, kind, params in scenario(rng, user_id, clients)]
+        for user_id in range(1_000_000, 1_000_000 + users)
+    ]
+    updates = []
+    for step in range(max(map(len, plans))):
+        updates.extend(plan[step] for plan in plans if step < len(plan))
+    return updates
+
+
+async def run_shards(shards: int, updates, tmp: str) -> dict:
+    from sharding import ShardSupervisor
+
+    stats_dir = os.path.join(tmp, f"stats{shards}")
+    os.makedirs(stats_dir)
+    supervisor = ShardSupervisor(
+        shards,
+        [sys.executable, os.path.abspath(__file__), '--worker'],
+        env={STATS_ENV: stats_dir, 'WORKERS': str(shards)}
+    )
+    await supervisor.start()
+    while len([name for name in os.listdir(stats_dir) if name.startswith('ready')]) < shards:
+        await asyncio.sleep(0.05)
+    for update in updates:
+        supervisor.route(update)
+    await supervisor.stop()
+
+    results = []
+    for index in range(shards):
+        with open(os.path.join(stats_dir, f"shard{index}.json")) as f:
+            results.append(json.load(f))
+    first = min(r['first'] for r in results if r['first'])
+    last = max(r['last'] for r in results if r['last'])
+    return {
+        'shards': shards,
+        'seconds': last - first,
+        'processed': sum(r['processed'] for r in results),
+        'failed': sum(r['failed'] for r in results),
+        'per_shard': [r['processed'] for r in results],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--users', type=int, default=400)
+    parser.add_argument('--clients', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            asyncio.run(run_worker())
+        return
+
+    from init_db import init_database
+
+    updates = make_updates(args.users, args.clients, args.seed)
+    print(f"🧩 {len(updates)} апдейтов от {args.users} менеджеров, ядер: {os.cpu_count()}")
+    print(f"{'шардов':<8}{'апдейтов':>10}{'время, с':>10}{'upd/s':>9}{'ускорение':>11}  по шардам")
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for shards in args.workers:
+            db_path = os.path.join(tmp, f"bench{shards}.db")
+            os.environ['DB_PATH'] = db_path
+            for name in ('API_GLOBAL_RATE', 'API_CHAT_RATE', 'API_CHAT_BURST'):
+                os.environ[name] = '1000000'
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                init_database(db_path)
+
+            result = asyncio.run(run_shards(shards, updates, tmp))
+            throughput = result['processed'] / result['seconds']
+            baseline = baseline or throughput
+            print(f"{shards:<8}{result['processed']:>10}{result['seconds']:>10.2f}{throughput:>9.0f}"
+                  f"{throughput / baseline:>10.2f}x  {result['per_shard']}")
+
+            with contextlib.closing(sqlite3.connect(db_path)) as conn:
+                managers = conn.execute('SELECT COUNT(*) FROM managers WHERE terms_accepted = 1').fetchone()[0]
+                clients = conn.execute('SELECT COUNT(*) FROM clients').fetchone()[0]
+            if result['failed'] or managers != args.users or clients != args.users * args.clients:
+                print(f"❌ ошибок: {result['failed']}, менеджеров: {managers}/{args.users}, "
+                      f"клиентов: {clients}/{args.users * args.clients}")
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Бенчмарк холодного старта бота на основе `python -X importtime`.
+
+Запуск: python benchmarks/bench_startup.py [--runs 5] [--top 15]
+
+В отдельном процессе повторяет подготовку из main.py вплоть до запуска
+polling (импорты, инициализация БД, создание Bot и Dispatcher) и печатает:
+медианное время до готовности, суммарное время импортов и модули,
+которые дольше всего импортируются.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP = '''
+import time
+started = time.perf_counter()
+import sys
+sys.path[:0] = [{src!r}, {database!r}]
+from aiogram import Bot, Dispatcher
+from config import Config
+from handlers import router, db
+from fsm_storage import SQLiteStorage
+from reminders import ReminderScheduler
+from init_db import init_database
+init_database(Config.DB_PATH)
+bot = Bot(token=Config.BOT_TOKEN)
+dp = Dispatcher(storage=SQLiteStorage(db))
+dp.include_router(router)
+print("READY", time.perf_counter() - started)
+'''
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_startup(env: dict, importtime: bool = False):
+    code = STARTUP.format(src=os.path.join(ROOT, 'src'), database=os.path.join(ROOT, 'database'))
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    result = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    ready = float(re.search(r'READY ([\d.]+)', result.stdout).group(1))
+    return ready, result.stderr
+
+
+def parse_importtime(stderr: str):
+    """[(модуль, собственное время, суммарное время, уровень вложенности)], мкс"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DB_PATH=os.path.join(tmp, 'bench.db'),
+            BOT_TOKEN='123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA',
+        )
+        # Первый запуск прогревает кэш байткода и файловый кэш ОС
+        run_startup(env)
+        timings = [run_startup(env)[0] for _ in range(args.runs)]
+        _, stderr = run_startup(env, importtime=True)
+
+    rows = parse_importtime(stderr)
+    total = sum(cumulative for _, _, cumulative, level in rows if level == 0)
+
+    print(f"\nГотовность к polling: медиана {statistics.median(timings) * 1000:.0f} мс "
+          f"(мин {min(timings) * 1000:.0f}, макс {max(timings) * 1000:.0f}, запусков {args.runs})")
+    print(f"Импорты суммарно: {total / 1000:.0f} мс, модулей: {len(rows)}")
+
+    print(f"\nТоп-{args.top} пакетов верхнего уровня (суммарное время, мс):")
+    top_level = sorted((r for r in rows if r[3] == 0), key=lambda r: -r[2])
+    for name, _, cumulative, _ in top_level[:args.top]:
+        print(f"  {cumulative / 1000:>8.1f}  {name}")
+
+    print(f"\nТоп-{args.top} модулей (собственное время, мс):")
+    for name, self_us, _, _ in sorted(rows, key=lambda r: -r[1])[:args.top]:
+        print(f"  {self_us / 1000:>8.1f}  {name}")
+
+
+if __name__ == '__main__':
+    main()
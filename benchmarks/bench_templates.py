@@ -0,0 +1,116 @@
+"""Бенчмарк рендеринга шаблонов: TemplateEngine против разбора на каждый вызов.
+
+Запуск: python benchmarks/bench_templates.py [--renders 10000]
+
+Рендерит шаблон по умолчанию (из create_default_templates) и визитку
+Messages.BUSINESS_CARD_TEXT для --renders клиентов четырьмя способами:
+str.format (разбирает шаблон при каждом вызове), re.sub по плейсхолдерам,
+CompiledTemplate.render по одному и render_many пачкой. Отдельно меряется
+TemplateEngine.render поверх настоящей БД: шаблон читается и разбирается
+один раз, остальные вызовы идут из кэша.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'database'))
+
+from async_database import AsyncDatabase
+from database import Database
+from init_db import init_database
+from messages import Messages
+from template_engine import TemplateEngine, compile_template
+
+NAMES = ['Иван', 'Пётр', 'Анна', 'Мария', 'Сергей', 'Ольга', 'Дмитрий', 'Елена']
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+def make_values(count: int):
+    rnd = random.Random(1)
+    return [
+        {
+            'имя_клиента': rnd.choice(NAMES),
+            'client_name': rnd.choice(NAMES),
+            'manager_name': 'Алексей Смирнов',
+            'company_info': 'ООО «Автомир»',
+            'address': 'Москва, ул. Ленина, 1',
+            'company_phone': '+7 (495) 123-45-67',
+            'website': 'automir.example',
+            'interest': rnd.choice(['Kia Rio', 'Hyundai Solaris', 'Lada Vesta']),
+        }
+        for _ in range(count)
+    ]
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def bench_source(title: str, source: str, rows):
+    compiled = compile_template(source)
+    expected = [source.format(**values) for values in rows]
+
+    results = {
+        'str.format': lambda: [source.format(**values) for values in rows],
+        're.sub': lambda: [PLACEHOLDER.sub(lambda m: str(values[m.group(1)]), source) for values in rows],
+        'render': lambda: [compiled.render(values) for values in rows],
+        'render_many': lambda: compiled.render_many(rows),
+    }
+    assert compiled.render_many(rows) == expected
+
+    print(f"\n{title} ({len(source)} символов, переменных: {len(compiled.variables)})")
+    baseline = None
+    for name, func in results.items():
+        seconds = min(timed(func) for _ in range(5))
+        baseline = baseline or seconds
+        print(f"   {name:<12} {seconds * 1000:8.2f} мс  {seconds / len(rows) * 1e6:6.2f} мкс/рендер  "
+              f"x{baseline / seconds:.1f}")
+
+
+async def bench_engine(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        init_database(path)
+        db = AsyncDatabase(Database(path))
+        manager_id = await db.create_manager(1, 'Алексей Смирнов', 'auto', '+79990000000')
+        await db.create_default_templates(manager_id, 'Алексей Смирнов', 'Автосалон')
+        template_id = (await db.get_templates(manager_id))[0]['id']
+        engine = TemplateEngine(db)
+
+        started = time.perf_counter()
+        for values in rows:
+            await engine.render(manager_id, template_id, values)
+        elapsed = time.perf_counter() - started
+        stats = engine.cache.stats()
+        print(f"\nTemplateEngine.render (БД + кэш): {elapsed * 1000:.2f} мс на {len(rows)} рендеров, "
+              f"чтений из БД: {stats['misses']}, из кэша: {stats['hits']}")
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--renders', type=int, default=10000)
+    args = parser.parse_args()
+
+    rows = make_values(args.renders)
+    default_template = (
+        "👋 Добрый день, {имя_клиента}!\n\nМеня зовут Алексей Смирнов, я менеджер по продажам. "
+        "Отправляю вам контакты.\n\n📍 Адрес: укажите адрес\n📞 Телефон: укажите телефон\n"
+        "🌐 Сайт: укажите сайт\n\nС уважением, Алексей Смирнов"
+    )
+    bench_source("Шаблон по умолчанию", default_template, rows)
+    bench_source("Визитка BUSINESS_CARD_TEXT", Messages.BUSINESS_CARD_TEXT, rows)
+    asyncio.run(bench_engine(rows))
+
+
+if __name__ == '__main__':
+    main()
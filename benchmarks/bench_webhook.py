@@ -0,0 +1,114 @@
+"""Тестовый стенд webhook-режима: отправляет синтетические апдейты на endpoint.
+
+Запуск:
+    python benchmarks/bench_webhook.py                     # локальный сервер со stub-обработчиком
+    python benchmarks/bench_webhook.py --url http://127.0.0.1:8080/webhook
+
+Без --url поднимает WebhookRequestHandler в этом же процессе с обработчиком,
+имитирующим работу (asyncio.sleep), и измеряет пропускную способность приёма
+и время до полной обработки всех апдейтов. С --url бьёт в запущенного бота
+(RUN_MODE=webhook) и после отправки печатает его /health.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from aiohttp import ClientSession, web
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.types import Message
+
+from webhook import WebhookRequestHandler
+
+FAKE_TOKEN = '123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA'
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Bench'},
+            'text': f'+7916{update_id % 10_000_000:07d}',
+        },
+    }
+
+
+async def start_local_server(port: int, concurrency: int, work: float):
+    router = Router()
+
+    @router.message(F.text)
+    async def handle(message: Message):
+        await asyncio.sleep(work)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot(token=FAKE_TOKEN)
+
+    app = web.Application()
+    handler = WebhookRequestHandler(dp, bot, max_concurrency=concurrency)
+    handler.register(app, path='/webhook')
+    app.router.add_get('/health', handler.health)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner, handler
+
+
+async def post_updates(url: str, updates: int, users: int, clients: int):
+    async with ClientSession() as session:
+        queue = asyncio.Queue()
+        for i in range(updates):
+            queue.put_nowait(make_update(i + 1, 1000 + i % users))
+
+        async def client():
+            while not queue.empty():
+                async with session.post(url, json=queue.get_nowait()) as response:
+                    assert response.status == 200, response.status
+
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url')
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--clients', type=int, default=50, help='параллельных HTTP-соединений')
+    parser.add_argument('--concurrency', type=int, default=100, help='WEBHOOK_MAX_CONCURRENCY')
+    parser.add_argument('--work', type=float, default=0.01, help='время обработки апдейта, с')
+    parser.add_argument('--port', type=int, default=8099)
+    args = parser.parse_args()
+
+    runner = handler = None
+    url = args.url
+    if not url:
+        runner, handler = await start_local_server(args.port, args.concurrency, args.work)
+        url = f'http://127.0.0.1:{args.port}/webhook'
+
+    started = time.perf_counter()
+    await post_updates(url, args.updates, args.users, args.clients)
+    accepted = time.perf_counter() - started
+    print(f"\nПринято {args.updates} апдейтов за {accepted:.2f} с: {args.updates / accepted:.0f} upd/s")
+
+    if handler is not None:
+        await handler.drain(timeout=60)
+        done = time.perf_counter() - started
+        print(f"Обработано за {done:.2f} с: {handler.processed / done:.0f} upd/s "
+              f"(ошибок: {handler.failed})")
+        await runner.cleanup()
+    else:
+        health_url = url.rsplit('/', 1)[0] + '/health'
+        async with ClientSession() as session:
+            async with session.get(health_url) as response:
+                print(f"/health: {await response.text()}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
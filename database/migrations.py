@@ -0,0 +1,460 @@
+"""Версионные миграции схемы БД.
+
+Версия схемы хранится в PRAGMA user_version. При запуске применяются только
+миграции с номером больше текущей версии, каждая — в своей транзакции;
+если схема актуальна, миграции не выполняют ни одного запроса к таблицам.
+
+Заполнение больших таблиц (backfill) выполняется порциями по диапазонам id,
+каждая порция — отдельная короткая транзакция, поэтому другие процессы
+бота могут писать в БД между порциями. Прогресс хранится в schema_backfills:
+прерванное заполнение продолжается с места остановки, а номер версии
+повышается только после его завершения.
+"""
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional
+
+# Длины суффиксов номера для поиска: "4567*" находит номер по последним
+# цифрам или любому фрагменту (+79161234567 -> 567, 4567, ...)
+PHONE_SUFFIX_LENGTHS = range(3, 16)
+
+
+class Migration:
+    """Миграция схемы: номер версии, описание и функция изменения схемы"""
+
+    def __init__(self, version: int, description: str, apply: Callable[[sqlite3.Cursor], None]):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+MIGRATIONS: List[Migration] = []
+
+# Порционные заполнения: имя -> (таблица, функция(cursor, after_id, upto_id))
+BACKFILLS: Dict[str, tuple] = {}
+
+
+def migration(version: int, description: str):
+    """Зарегистрировать функцию как миграцию с номером version"""
+    def decorator(func):
+        MIGRATIONS.append(Migration(version, description, func))
+        return func
+    return decorator
+
+
+def backfill(name: str, table: str):
+    """Зарегистрировать порционное заполнение строк table (по id)"""
+    def decorator(func):
+        BACKFILLS[name] = (table, func)
+        return func
+    return decorator
+
+
+def start_backfill(cursor: sqlite3.Cursor, name: str):
+    """Запланировать заполнение для строк, существующих на момент миграции.
+
+    Строки, добавленные позже, обрабатываются триггерами или кодом бота.
+    Повторный вызов (после прерванного запуска) прогресс не сбрасывает.
+    """
+    table, _ = BACKFILLS[name]
+    cursor.execute(f'''
+    INSERT OR IGNORE INTO schema_backfills (name, last_id, max_id)
+    SELECT ?, 0, MAX(id) FROM {table} HAVING MAX(id) IS NOT NULL
+    ''', (name,))
+
+
+# ========== Миграции ==========
+
+@migration(1, "Базовая схема")
+def _base_schema(cursor: sqlite3.Cursor):
+    # Таблица менеджеров
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS managers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        telegram_id INTEGER UNIQUE NOT NULL,
+        full_name TEXT NOT NULL,
+        industry TEXT NOT NULL,
+        industry_custom TEXT,
+        phone TEXT NOT NULL,
+        terms_accepted BOOLEAN DEFAULT FALSE,
+        terms_accepted_at TIMESTAMP,
+        is_active BOOLEAN DEFAULT FALSE,
+        registration_complete BOOLEAN DEFAULT FALSE,
+        registration_step INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Таблица клиентов
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS clients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        manager_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        status TEXT DEFAULT 'new',
+        notes TEXT,
+        interest_model TEXT,
+        last_contact TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (manager_id) REFERENCES managers(id),
+        UNIQUE(manager_id, phone)
+    )
+    ''')
+
+    # Таблица шаблонов
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        manager_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        content TEXT NOT NULL,
+        variables TEXT,
+        is_active BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (manager_id) REFERENCES managers(id)
+    )
+    ''')
+
+    # Таблица напоминаний
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS reminders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        manager_id INTEGER NOT NULL,
+        client_id INTEGER,
+        type TEXT NOT NULL,
+        text TEXT NOT NULL,
+        due_date TIMESTAMP NOT NULL,
+        is_done BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (manager_id) REFERENCES managers(id),
+        FOREIGN KEY (client_id) REFERENCES clients(id)
+    )
+    ''')
+
+    # Таблица для хранения ID последних сообщений бота
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS bot_messages (
+        telegram_id INTEGER PRIMARY KEY,
+        last_message_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_clients_manager_phone ON clients(manager_id, phone)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_clients_status ON clients(status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_due_date ON reminders(due_date, is_done)')
+
+
+@migration(2, "Состояния FSM в SQLite")
+def _fsm_states(cursor: sqlite3.Cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS fsm_states (
+        bot_id INTEGER NOT NULL,
+        chat_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        thread_id INTEGER NOT NULL DEFAULT 0,
+        destiny TEXT NOT NULL,
+        state TEXT,
+        data TEXT,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (bot_id, chat_id, user_id, thread_id, destiny)
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fsm_states_updated_at ON fsm_states(updated_at)')
+
+
+@migration(3, "Индекс невыполненных напоминаний")
+def _pending_reminders(cursor: sqlite3.Cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders(id) WHERE is_done = FALSE')
+
+
+@migration(4, "Постраничный список клиентов")
+def _clients_page(cursor: sqlite3.Cursor):
+    # Покрывающий индекс для keyset-пагинации по (last_contact, id)
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_clients_manager_page '
+        'ON clients(manager_id, last_contact, id, name, phone)'
+    )
+    # Клиенты без last_contact не попадали бы в листание по нему
+    start_backfill(cursor, 'clients_last_contact')
+
+
+@backfill('clients_last_contact', 'clients')
+def _fill_last_contact(cursor: sqlite3.Cursor, after_id: int, upto_id: int):
+    cursor.execute('''
+    UPDATE clients SET last_contact = COALESCE(created_at, CURRENT_TIMESTAMP)
+    WHERE id > ? AND id <= ? AND last_contact IS NULL
+    ''', (after_id, upto_id))
+
+
+def _fts_values(row: str) -> str:
+    """Значения строки clients_fts для записи clients (new/old в триггерах)"""
+    suffixes = " || ' ' || ".join(f"substr({row}.phone, -{n})" for n in PHONE_SUFFIX_LENGTHS)
+    # «ё» индексируется как «е» (unicode61 не снимает с неё диакритику)
+    name = f"replace(replace({row}.name, 'ё', 'е'), 'Ё', 'Е')"
+    return f"{row}.id, {name}, {row}.notes, {row}.interest_model, {suffixes}"
+
+
+def _create_fts_triggers(cursor: sqlite3.Cursor, values: Callable[[str], str], backfill_name: str):
+    """Триггеры clients_fts; строки из незавершённого заполнения backfill_name не трогают"""
+    columns = "rowid, name, notes, interest_model, phone"
+    indexed = f'''NOT EXISTS (
+            SELECT 1 FROM schema_backfills
+            WHERE name = '{backfill_name}' AND {{row}}.id > last_id AND {{row}}.id <= max_id
+        )'''
+    # Пересоздаём: в базах до миграций триггеры создавались без проверки заполнения
+    for trigger in ('clients_fts_insert', 'clients_fts_delete', 'clients_fts_update'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    cursor.execute(f'''
+    CREATE TRIGGER clients_fts_insert AFTER INSERT ON clients BEGIN
+        INSERT INTO clients_fts({columns}) VALUES ({values('new')});
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER clients_fts_delete AFTER DELETE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, {columns})
+        SELECT 'delete', {values('old')} WHERE {indexed.format(row='old')};
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER clients_fts_update
+    AFTER UPDATE OF name, notes, interest_model, phone ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, {columns})
+        SELECT 'delete', {values('old')} WHERE {indexed.format(row='old')};
+        INSERT INTO clients_fts({columns})
+        SELECT {values('new')} WHERE {indexed.format(row='new')};
+    END
+    ''')
+
+
+@migration(5, "Полнотекстовый поиск клиентов")
+def _clients_fts(cursor: sqlite3.Cursor):
+    """Таблица без собственного содержимого (content=''): хранит только
+    индекс, а строки и manager_id берутся из clients по rowid.
+
+    Пока идёт заполнение, триггеры не трогают ещё не проиндексированные
+    строки (id в диапазоне незавершённого заполнения): удаление из
+    contentless-таблицы значений, которых в ней нет, портит индекс, а
+    актуальные значения таких строк проиндексирует само заполнение.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clients_fts'"
+    ).fetchone()
+
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+        name, notes, interest_model, phone,
+        content = '',
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    ''')
+
+    _create_fts_triggers(cursor, _fts_values, 'clients_fts')
+
+    if not exists:
+        start_backfill(cursor, 'clients_fts')
+
+
+@backfill('clients_fts', 'clients')
+def _fill_clients_fts(cursor: sqlite3.Cursor, after_id: int, upto_id: int):
+    cursor.execute(f'''
+    INSERT INTO clients_fts(rowid, name, notes, interest_model, phone)
+    SELECT {_fts_values('clients')} FROM clients
+    WHERE id > ? AND id <= ?
+    ''', (after_id, upto_id))
+
+
+@migration(6, "Индексы по итогам аудита запросов")
+def _audit_indexes(cursor: sqlite3.Cursor):
+    # get_templates: WHERE manager_id AND is_active ORDER BY name
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_templates_manager_active '
+        'ON templates(manager_id, is_active, name)'
+    )
+    # get_upcoming_reminders и выгрузка напоминаний менеджера
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_reminders_manager_due '
+        'ON reminders(manager_id, is_done, due_date)'
+    )
+    # Статус клиента всегда выбирается в пределах менеджера
+    cursor.execute('DROP INDEX IF EXISTS idx_clients_status')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_clients_manager_status ON clients(manager_id, status)')
+    # Дублирует индекс ограничения UNIQUE(manager_id, phone)
+    cursor.execute('DROP INDEX IF EXISTS idx_clients_manager_phone')
+
+
+@migration(7, "Индекс напоминаний по клиенту")
+def _reminders_client(cursor: sqlite3.Cursor):
+    # delete_client отвязывает напоминания удаляемого клиента
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_client ON reminders(client_id)')
+
+
+# Разделители слов, которые заменяются пробелом перед индексацией: так
+# префикс менеджера получает каждое слово, как в build_search_query (\w+).
+# Только частые: каждый — вложенный replace(), а глубина выражения в SQLite
+# ограничена (parser stack overflow около 30 уровней)
+FTS_SEPARATORS = '-.,;:()/"\'«»\t\n'
+
+
+def _fts_manager_words(row: str, text: str) -> str:
+    """Выражение SQL: слова text с префиксом менеджера строки (m<manager_id>_слово)"""
+    for char in FTS_SEPARATORS:
+        text = f"replace({text}, char({ord(char)}), ' ')"
+    prefix = f"'m' || {row}.manager_id || '_'"
+    return f"{prefix} || replace({text}, ' ', ' ' || {prefix})"
+
+
+def _fts_manager_values(row: str) -> str:
+    """Значения строки clients_fts со словами, привязанными к менеджеру"""
+    phone = f"replace({row}.phone, '+', '')"
+    suffixes = " || ' ' || ".join(
+        f"'m' || {row}.manager_id || '_' || substr({phone}, -{n})" for n in PHONE_SUFFIX_LENGTHS
+    )
+    name = f"replace(replace({row}.name, 'ё', 'е'), 'Ё', 'Е')"
+    return (f"{row}.id, {_fts_manager_words(row, name)}, {_fts_manager_words(row, f'{row}.notes')}, "
+            f"{_fts_manager_words(row, f'{row}.interest_model')}, {suffixes}")
+
+
+@migration(8, "Поиск клиентов в пределах менеджера")
+def _clients_fts_manager(cursor: sqlite3.Cursor):
+    """Каждое слово индексируется с префиксом менеджера (m12_иван), и
+    префиксный запрос читает только записи своего менеджера. Раньше
+    MATCH находил совпадения у всех менеджеров, а manager_id проверялся
+    уже по найденным строкам: поиск «Иван» стоил как поиск по всей таблице.
+
+    Таблица пересоздаётся в одной транзакции с записью о заполнении, поэтому
+    незавершённое заполнение означает, что она уже новая: при повторном
+    запуске её не трогаем, иначе заполнение продолжилось бы с last_id и
+    строки, проиндексированные до сбоя, пропали бы из индекса.
+    """
+    pending = cursor.execute(
+        "SELECT 1 FROM schema_backfills WHERE name = 'clients_fts_manager'"
+    ).fetchone()
+    if pending:
+        _create_fts_triggers(cursor, _fts_manager_values, 'clients_fts_manager')
+        return
+
+    cursor.execute('DROP TABLE IF EXISTS clients_fts')
+    # '_' — часть слова: префикс и слово остаются одним токеном
+    cursor.execute('''
+    CREATE VIRTUAL TABLE clients_fts USING fts5(
+        name, notes, interest_model, phone,
+        content = '',
+        tokenize = "unicode61 remove_diacritics 2 tokenchars '_'"
+    )
+    ''')
+    _create_fts_triggers(cursor, _fts_manager_values, 'clients_fts_manager')
+    start_backfill(cursor, 'clients_fts_manager')
+
+
+@backfill('clients_fts_manager', 'clients')
+def _fill_clients_fts_manager(cursor: sqlite3.Cursor, after_id: int, upto_id: int):
+    cursor.execute(f'''
+    INSERT INTO clients_fts(rowid, name, notes, interest_model, phone)
+    SELECT {_fts_manager_values('clients')} FROM clients
+    WHERE id > ? AND id <= ?
+    ''', (after_id, upto_id))
+
+
+@migration(9, "Код сферы «Недвижимость»")
+def _real_estate_industry(cursor: sqlite3.Cursor):
+    # Кнопка industry_real_estate разбиралась по первому '_' и сохранялась как 'real'
+    cursor.execute("UPDATE managers SET industry = 'real_estate' WHERE industry = 'real'")
+
+
+# ========== Применение ==========
+
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def _run_backfills(conn: sqlite3.Connection, chunk_size: int):
+    """Выполнить незавершённые заполнения порциями"""
+    for name, last_id, max_id in conn.execute(
+        'SELECT name, last_id, max_id FROM schema_backfills'
+    ).fetchall():
+        table, fill = BACKFILLS[name]
+        started = time.perf_counter()
+        print(f"   ⏳ Заполнение {name}: id {last_id}..{max_id}")
+        while last_id < max_id:
+            upto_id = min(last_id + chunk_size, max_id)
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                fill(conn.cursor(), last_id, upto_id)
+                conn.execute(
+                    'UPDATE schema_backfills SET last_id = ? WHERE name = ?',
+                    (upto_id, name)
+                )
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            last_id = upto_id
+
+        conn.execute('DELETE FROM schema_backfills WHERE name = ?', (name,))
+        print(f"   ✅ Заполнение {name} завершено за {time.perf_counter() - started:.1f} с")
+
+
+def migrate(db_path: str, target: Optional[int] = None, chunk_size: int = 5000) -> int:
+    """Привести схему БД к версии target (по умолчанию — последней).
+
+    Возвращает итоговую версию схемы.
+    """
+    target = LATEST_VERSION if target is None else target
+    # isolation_level=None: транзакциями управляем сами (BEGIN IMMEDIATE)
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    try:
+        version = get_version(conn)
+        if version >= target:
+            return version
+
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_backfills (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            max_id INTEGER NOT NULL
+        )
+        ''')
+
+        for m in sorted(MIGRATIONS, key=lambda m: m.version):
+            if m.version <= version or m.version > target:
+                continue
+
+            started = time.perf_counter()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                m.apply(conn.cursor())
+                pending = conn.execute('SELECT 1 FROM schema_backfills LIMIT 1').fetchone()
+                if not pending:
+                    conn.execute(f'PRAGMA user_version = {m.version}')
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+            if pending:
+                # Версию повышаем только после заполнения: при сбое миграция
+                # повторится (она идемпотентна) и продолжит заполнение
+                _run_backfills(conn, chunk_size)
+                conn.execute(f'PRAGMA user_version = {m.version}')
+            version = m.version
+            print(f"   ✅ Миграция {m.version}: {m.description} ({time.perf_counter() - started:.2f} с)")
+
+        return version
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'sales_assistant.db'
+    to = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    print(f"🗄️  Версия схемы: {migrate(path, to)}")
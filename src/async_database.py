@@ -0,0 +1,202 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, AsyncIterator, Iterator, Tuple
+
+from database import Database
+
+_DONE = object()
+
+
+class AsyncDatabase:
+    """Асинхронная обёртка над Database.
+
+    Все обращения к SQLite выполняются в отдельном пуле потоков, поэтому
+    event loop продолжает обрабатывать апдейты, пока база занята.
+    """
+
+    def __init__(self, database: Database, max_workers: int = 4, metrics=None):
+        self.database = database
+        # Metrics: время каждого вызова и число вызовов за апдейт
+        self.metrics = metrics
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="db"
+        )
+        print(f"🔧 AsyncDatabase: пул из {max_workers} потоков")
+
+    async def _run(self, func, *args, **kwargs):
+        """Выполнить синхронный метод Database в пуле потоков"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        if self.metrics is None:
+            return await loop.run_in_executor(self._executor, call)
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.metrics.observe_db(func.__name__, time.perf_counter() - started, failed)
+
+    async def _iterate(self, iterator: Iterator):
+        """Обойти синхронный генератор Database, получая элементы в пуле потоков"""
+        try:
+            while True:
+                item = await self._run(next, iterator, _DONE)
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            # Закрываем генератор, чтобы он вернул соединение в пул
+            await self._run(iterator.close)
+
+    def close(self):
+        """Остановить пул потоков (дожидается текущих запросов) и закрыть соединения"""
+        self._executor.shutdown(wait=True)
+        self.database.close()
+
+    # ========== Менеджеры ==========
+
+    async def get_manager(self, telegram_id: int) -> Optional[Dict]:
+        """Получить менеджера по telegram_id"""
+        return await self._run(self.database.get_manager, telegram_id)
+
+    async def create_manager(self, telegram_id: int, full_name: str, industry: str,
+                             phone: str, industry_custom: str = None) -> int:
+        """Создать нового менеджера"""
+        return await self._run(
+            self.database.create_manager,
+            telegram_id, full_name, industry, phone, industry_custom
+        )
+
+    async def update_manager_step(self, telegram_id: int, step: int):
+        """Обновить шаг регистрации менеджера"""
+        return await self._run(self.database.update_manager_step, telegram_id, step)
+
+    async def complete_registration(self, telegram_id: int):
+        """Завершить регистрацию менеджера"""
+        return await self._run(self.database.complete_registration, telegram_id)
+
+    # ========== Сообщения бота ==========
+
+    async def save_last_bot_message(self, telegram_id: int, message_id: int):
+        """Сохранить ID последнего сообщения бота"""
+        return await self._run(self.database.save_last_bot_message, telegram_id, message_id)
+
+    async def get_last_bot_message(self, telegram_id: int) -> Optional[int]:
+        """Получить ID последнего сообщения бота"""
+        return await self._run(self.database.get_last_bot_message, telegram_id)
+
+    async def save_last_bot_messages(self, items: List[tuple]):
+        """Сохранить ID последних сообщений бота пачкой"""
+        return await self._run(self.database.save_last_bot_messages, items)
+
+    async def get_all_last_bot_messages(self) -> Dict[int, int]:
+        """Получить ID последних сообщений бота для всех пользователей"""
+        return await self._run(self.database.get_all_last_bot_messages)
+
+    # ========== Клиенты ==========
+
+    async def get_client(self, manager_id: int, phone: str) -> Optional[Dict]:
+        """Получить клиента по номеру телефона"""
+        return await self._run(self.database.get_client, manager_id, phone)
+
+    async def get_client_by_id(self, manager_id: int, client_id: int) -> Optional[Dict]:
+        """Получить клиента менеджера по ID"""
+        return await self._run(self.database.get_client_by_id, manager_id, client_id)
+
+    async def delete_client(self, manager_id: int, client_id: int) -> bool:
+        """Удалить клиента"""
+        return await self._run(self.database.delete_client, manager_id, client_id)
+
+    async def create_client(self, manager_id: int, name: str, phone: str) -> int:
+        """Создать нового клиента"""
+        return await self._run(self.database.create_client, manager_id, name, phone)
+
+    async def get_clients(self, manager_id: int, limit: int = 100) -> List[Dict]:
+        """Получить список клиентов менеджера"""
+        return await self._run(self.database.get_clients, manager_id, limit)
+
+    async def get_clients_page(self, manager_id: int, limit: int = 10, after_id: Optional[int] = None,
+                               before_id: Optional[int] = None) -> Tuple[List[Dict], bool]:
+        """Страница клиентов (keyset-пагинация по last_contact, id)"""
+        return await self._run(self.database.get_clients_page, manager_id, limit, after_id, before_id)
+
+    async def search_clients(self, manager_id: int, text: str, limit: int = 20) -> List[Dict]:
+        """Полнотекстовый поиск клиентов менеджера"""
+        return await self._run(self.database.search_clients, manager_id, text, limit)
+
+    async def bulk_insert_clients(self, manager_id: int, clients: List[tuple]) -> int:
+        """Добавить клиентов пачкой, пропуская существующие номера"""
+        return await self._run(self.database.bulk_insert_clients, manager_id, clients)
+
+    def iter_clients_export(self, manager_id: int, chunk_size: int = 1000) -> AsyncIterator[List[tuple]]:
+        """Клиенты менеджера для выгрузки порциями по chunk_size строк"""
+        return self._iterate(self.database.iter_clients_export(manager_id, chunk_size))
+
+    # ========== Шаблоны ==========
+
+    async def get_templates(self, manager_id: int) -> List[Dict]:
+        """Получить шаблоны менеджера"""
+        return await self._run(self.database.get_templates, manager_id)
+
+    async def create_default_templates(self, manager_id: int, full_name: str, industry: str):
+        """Создать шаблоны по умолчанию для нового менеджера"""
+        return await self._run(
+            self.database.create_default_templates,
+            manager_id, full_name, industry
+        )
+
+    async def update_template(self, manager_id: int, template_id: int, content: str) -> bool:
+        """Изменить текст шаблона менеджера"""
+        return await self._run(self.database.update_template, manager_id, template_id, content)
+
+    # ========== Напоминания ==========
+
+    async def create_reminder(self, manager_id: int, client_id: Optional[int], reminder_type: str,
+                              text: str, due_date: str) -> int:
+        """Создать напоминание"""
+        return await self._run(
+            self.database.create_reminder,
+            manager_id, client_id, reminder_type, text, due_date
+        )
+
+    async def get_pending_reminder_keys(self, after_id: int = 0, limit: int = 10000,
+                                        shards: int = 1, shard_index: int = 0) -> List[tuple]:
+        """Невыполненные напоминания с id > after_id (при shards > 1 — только шарда shard_index)"""
+        return await self._run(self.database.get_pending_reminder_keys, after_id, limit, shards, shard_index)
+
+    async def get_reminders_for_dispatch(self, reminder_ids: List[int]) -> List[Dict]:
+        """Невыполненные напоминания по списку id"""
+        return await self._run(self.database.get_reminders_for_dispatch, reminder_ids)
+
+    async def claim_reminders(self, reminder_ids: List[int]) -> List[int]:
+        """Отметить напоминания выполненными и вернуть отмеченные этим вызовом"""
+        return await self._run(self.database.claim_reminders, reminder_ids)
+
+    async def get_upcoming_reminders(self, manager_id: int, limit: int = 10) -> List[Dict]:
+        """Ближайшие невыполненные напоминания менеджера"""
+        return await self._run(self.database.get_upcoming_reminders, manager_id, limit)
+
+    def iter_reminders_export(self, manager_id: int, chunk_size: int = 1000) -> AsyncIterator[List[tuple]]:
+        """Напоминания менеджера для выгрузки порциями по chunk_size строк"""
+        return self._iterate(self.database.iter_reminders_export(manager_id, chunk_size))
+
+    # ========== Состояния FSM ==========
+
+    async def get_fsm_record(self, key: tuple, min_updated_at: float) -> Optional[Dict]:
+        """Получить состояние и данные FSM"""
+        return await self._run(self.database.get_fsm_record, key, min_updated_at)
+
+    async def save_fsm_records(self, records: List[tuple]):
+        """Сохранить пачку состояний FSM одной транзакцией"""
+        return await self._run(self.database.save_fsm_records, records)
+
+    async def delete_expired_fsm_records(self, min_updated_at: float) -> int:
+        """Удалить брошенные состояния FSM"""
+        return await self._run(self.database.delete_expired_fsm_records, min_updated_at)
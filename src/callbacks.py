@@ -0,0 +1,172 @@
+import base64
+import binascii
+import logging
+from collections import namedtuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram.types import CallbackQuery
+
+logger = logging.getLogger(__name__)
+
+# Telegram принимает callback_data не длиннее 64 байт
+MAX_CALLBACK_DATA = 64
+
+# Отличает упакованные данные от старых строк вида "menu_clients":
+# символа нет ни в алфавите base64url, ни в старых callback_data
+PREFIX = '~'
+
+
+def _write_varint(buffer: bytearray, value: int):
+    """Беззнаковое целое в формате varint (LEB128): 7 бит на байт"""
+    if value < 0:
+        raise ValueError(f"Отрицательное значение в callback_data: {value}")
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class CallbackSchema:
+    """Тип действия кнопки: код действия и целочисленные поля"""
+
+    __slots__ = ('codec', 'action', 'code', 'fields', 'type')
+
+    def __init__(self, codec: 'CallbackCodec', action: str, code: int, fields: Tuple[str, ...]):
+        self.codec = codec
+        self.action = action
+        self.code = code
+        self.fields = fields
+        # Разобранные данные — namedtuple с полями схемы: payload.client_id
+        self.type = namedtuple(action, fields)
+
+    def pack(self, *values: int) -> str:
+        """Упаковать значения полей в callback_data"""
+        return self.codec.encode(self, values)
+
+    def __repr__(self):
+        return f"<CallbackSchema {self.action}({', '.join(self.fields)})>"
+
+
+class CallbackCodec:
+    """Компактная версионированная упаковка callback_data.
+
+    Формат: PREFIX + base64url без выравнивания от байтов
+    [версия][код действия][поле 1]...[поле N], все числа — varint.
+    Действие с ID клиента и курсором страницы занимает около 10 символов
+    вместо строк вида "clients_next_123456_7" и всегда укладывается в лимит
+    Telegram. Кнопки со старой версией формата после обновления бота
+    распознаются как устаревшие, а не разбираются неправильно.
+    """
+
+    def __init__(self, version: int = 1):
+        self.version = version
+        self._schemas: Dict[int, CallbackSchema] = {}
+
+    def schema(self, action: str, code: int, *fields: str) -> CallbackSchema:
+        """Зарегистрировать действие; код менять нельзя — он уже в отправленных кнопках"""
+        if code in self._schemas:
+            raise ValueError(f"Код {code} уже занят действием {self._schemas[code].action}")
+        schema = CallbackSchema(self, action, code, fields)
+        self._schemas[code] = schema
+        return schema
+
+    def encode(self, schema: CallbackSchema, values) -> str:
+        if len(values) != len(schema.fields):
+            raise ValueError(f"{schema.action}: ожидается {len(schema.fields)} полей, передано {len(values)}")
+        buffer = bytearray()
+        _write_varint(buffer, self.version)
+        _write_varint(buffer, schema.code)
+        for value in values:
+            _write_varint(buffer, value)
+        data = PREFIX + base64.urlsafe_b64encode(bytes(buffer)).rstrip(b'=').decode('ascii')
+        if len(data) > MAX_CALLBACK_DATA:
+            raise ValueError(f"{schema.action}: callback_data длиннее {MAX_CALLBACK_DATA} байт")
+        return data
+
+    def decode(self, data: Optional[str]) -> Optional[Tuple[CallbackSchema, tuple]]:
+        """Разобрать callback_data: (схема, значения) или None для чужих и устаревших данных"""
+        if not data or not data.startswith(PREFIX):
+            return None
+        encoded = data[1:]
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            version, position = _read_varint(raw, 0)
+            if version != self.version:
+                return None
+            code, position = _read_varint(raw, position)
+            schema = self._schemas.get(code)
+            if schema is None:
+                return None
+            values = []
+            for _ in schema.fields:
+                value, position = _read_varint(raw, position)
+                values.append(value)
+        except (binascii.Error, IndexError, ValueError):
+            return None
+        if position != len(raw):
+            return None
+        return schema, schema.type(*values)
+
+
+ActionHandler = Callable[..., Awaitable[Any]]
+
+
+class ActionDispatcher:
+    """Один обработчик callback_query на все упакованные действия.
+
+    Обработчик действия выбирается по коду из словаря, а не перебором
+    строковых фильтров F.data == ... по очереди.
+    """
+
+    def __init__(self, codec: CallbackCodec, on_expired: ActionHandler = None):
+        self.codec = codec
+        self.on_expired = on_expired
+        self._handlers: Dict[int, ActionHandler] = {}
+
+    def on(self, schema: CallbackSchema):
+        """Декоратор: обработчик действия `handler(callback, state, payload)`"""
+        def decorator(handler: ActionHandler) -> ActionHandler:
+            self._handlers[schema.code] = handler
+            return handler
+        return decorator
+
+    async def dispatch(self, callback: CallbackQuery, state):
+        """Разобрать callback_data и вызвать обработчик действия"""
+        decoded = self.codec.decode(callback.data)
+        handler = self._handlers.get(decoded[0].code) if decoded is not None else None
+        if handler is None:
+            logger.warning(f"⚠️ Неизвестная кнопка: {callback.data}")
+            if self.on_expired is not None:
+                await self.on_expired(callback)
+            return
+        await handler(callback, state, decoded[1])
+
+    def register(self, index):
+        """Подключить диспетчер к индексу маршрутов: все данные с PREFIX"""
+        index.callback(prefix=PREFIX)(self.dispatch)
+
+
+# Действия кнопок. Коды зафиксированы: они уже могут быть в чатах пользователей
+codec = CallbackCodec(version=1)
+
+CLIENTS_NEXT = codec.schema('clients_next', 1, 'anchor_id', 'page')
+CLIENTS_PREV = codec.schema('clients_prev', 2, 'anchor_id', 'page')
+CLIENT_CARD = codec.schema('client_card', 3, 'client_id')
+CLIENT_SEND_CARD = codec.schema('client_send_card', 4, 'client_id')
+CLIENT_DELETE = codec.schema('client_delete', 5, 'client_id')
+CLIENT_DELETE_CONFIRM = codec.schema('client_delete_confirm', 6, 'client_id')
+CLIENT_ADD_NOTE = codec.schema('client_add_note', 7, 'client_id')
+CLIENT_ADD_REMINDER = codec.schema('client_add_reminder', 8, 'client_id')
+CLIENT_EDIT = codec.schema('client_edit', 9, 'client_id')
@@ -11,19 +11,112 @@ class Config:
     # Для bothost.ru используем /app/data/
     DB_PATH = os.getenv('DB_PATH', '/app/data/sales_assistant.db')
     
+    # Количество потоков для запросов к БД (не блокируют event loop)
+    DB_WORKERS = int(os.getenv('DB_WORKERS', 4))
+    
+    # Пул соединений с БД и настройки SQLite
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', DB_WORKERS))
+    DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 8192))
+    DB_MMAP_SIZE_MB = int(os.getenv('DB_MMAP_SIZE_MB', 64))
+    
+    # Кэш профилей менеджеров (записей и секунд жизни записи)
+    MANAGER_CACHE_SIZE = int(os.getenv('MANAGER_CACHE_SIZE', 1024))
+    MANAGER_CACHE_TTL = int(os.getenv('MANAGER_CACHE_TTL', 300))
+    
+    # Период сброса ID последних сообщений бота в БД (секунды)
+    BOT_MESSAGES_FLUSH_INTERVAL = float(os.getenv('BOT_MESSAGES_FLUSH_INTERVAL', 5))
+    
+    # Сначала отправлять новое сообщение, а старое удалять в фоне
+    SEND_BEFORE_DELETE = os.getenv('SEND_BEFORE_DELETE', 'true').lower() in ('1', 'true', 'yes')
+    DELETE_CONCURRENCY = int(os.getenv('DELETE_CONCURRENCY', 8))
+    
+    # Лимиты исходящих запросов к Bot API (сообщений в секунду)
+    API_GLOBAL_RATE = float(os.getenv('API_GLOBAL_RATE', 30))
+    API_CHAT_RATE = float(os.getenv('API_CHAT_RATE', 1))
+    API_CHAT_BURST = float(os.getenv('API_CHAT_BURST', 3))
+    
     # ID администратора
     ADMIN_ID = int(os.getenv('ADMIN_ID', 0))
     
     # Настройки
     TIMEZONE = os.getenv('TIMEZONE', 'Europe/Moscow')
     
+    # Хранилище состояний FSM в SQLite
+    FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', 1))
+    FSM_STATE_TTL = int(os.getenv('FSM_STATE_TTL', 7 * 24 * 3600))
+    FSM_CACHE_TTL = float(os.getenv('FSM_CACHE_TTL', 300))
+    FSM_CACHE_SIZE = int(os.getenv('FSM_CACHE_SIZE', 10000))
+    
+    # Планировщик напоминаний
+    REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 100))
+    REMINDER_POLL_INTERVAL = float(os.getenv('REMINDER_POLL_INTERVAL', 60))
+    
+    # Импорт клиентов из файлов
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 5000))
+    IMPORT_MAX_FILE_SIZE_MB = int(os.getenv('IMPORT_MAX_FILE_SIZE_MB', 20))
+    
+    # Клиентов на одной странице списка
+    CLIENTS_PAGE_SIZE = int(os.getenv('CLIENTS_PAGE_SIZE', 10))
+    
+    # Сколько клиентов показывать в результатах поиска
+    SEARCH_RESULTS_LIMIT = int(os.getenv('SEARCH_RESULTS_LIMIT', 20))
+    
+    # Выгрузка клиентов: строк на одно чтение из БД
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+    
+    # Кэш скомпилированных шаблонов сообщений (менеджеров и секунд жизни записи)
+    TEMPLATE_CACHE_SIZE = int(os.getenv('TEMPLATE_CACHE_SIZE', 1024))
+    TEMPLATE_CACHE_TTL = int(os.getenv('TEMPLATE_CACHE_TTL', 3600))
+    
+    # Метрики обработки апдейтов (время, обращения к БД и Bot API)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', 300))
+    METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')
+    
+    # Режим получения апдейтов: polling или webhook
+    RUN_MODE = os.getenv('RUN_MODE', 'polling').lower()
+    
+    # Настройки webhook-сервера
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+    WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET') or None
+    WEBHOOK_MAX_CONCURRENCY = int(os.getenv('WEBHOOK_MAX_CONCURRENCY', 100))
+    WEBHOOK_SHUTDOWN_TIMEOUT = float(os.getenv('WEBHOOK_SHUTDOWN_TIMEOUT', 30))
+    
+    # Несколько независимых webhook-процессов за балансировщиком. Кэш FSM, кэш
+    # профилей и ID последних сообщений бота хранятся в памяти процесса, поэтому
+    # балансировщик обязан направлять апдейты одного пользователя в один процесс
+    # (WEBHOOK_STICKY_ROUTING=true). Без такой привязки используйте WORKERS:
+    # один процесс принимает апдейты и сам раздаёт их обработчикам по telegram_id
+    WEBHOOK_INSTANCES = int(os.getenv('WEBHOOK_INSTANCES', 1))
+    WEBHOOK_STICKY_ROUTING = os.getenv('WEBHOOK_STICKY_ROUTING', 'false').lower() in ('1', 'true', 'yes')
+    
+    # Несколько процессов-обработчиков: апдейты делятся между ними по telegram_id
+    # (1 — всё в одном процессе). SHARD_INDEX и SHARD_COUNT задаёт супервизор своим процессам
+    WORKERS = int(os.getenv('WORKERS', 1))
+    SHARD_INDEX = int(os.getenv('SHARD_INDEX', -1))
+    SHARD_COUNT = int(os.getenv('SHARD_COUNT', WORKERS))
+    SHARD_MAX_CONCURRENCY = int(os.getenv('SHARD_MAX_CONCURRENCY', 100))
+    SHARD_SHUTDOWN_TIMEOUT = float(os.getenv('SHARD_SHUTDOWN_TIMEOUT', 30))
+    
     # Проверка конфигурации
     @classmethod
     def validate(cls):
         if not cls.BOT_TOKEN:
             raise ValueError("BOT_TOKEN не установлен. Добавьте его в переменные окружения на bothost.ru")
+        if cls.RUN_MODE not in ('polling', 'webhook'):
+            raise ValueError(f"Неизвестный RUN_MODE: {cls.RUN_MODE} (допустимо: polling, webhook)")
+        if cls.RUN_MODE == 'webhook' and cls.WEBHOOK_INSTANCES > 1 and not cls.WEBHOOK_STICKY_ROUTING:
+            raise ValueError(
+                f"WEBHOOK_INSTANCES={cls.WEBHOOK_INSTANCES} без привязки пользователей к процессам: "
+                "кэши в памяти процессов разойдутся. Настройте балансировщик по telegram_id и "
+                "установите WEBHOOK_STICKY_ROUTING=true или запустите один процесс с WORKERS"
+            )
         
         print(f"✅ Конфигурация проверена:")
         print(f"   • BOT_TOKEN: {'установлен' if cls.BOT_TOKEN else 'НЕТ!'}")
         print(f"   • DB_PATH: {cls.DB_PATH}")
         print(f"   • ADMIN_ID: {cls.ADMIN_ID}")
+        print(f"   • RUN_MODE: {cls.RUN_MODE}")
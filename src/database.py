@@ -1,195 +1,553 @@
 import sqlite3
 import json
+import re
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
+from db_pool import ConnectionPool
+from cache import LRUCache
+
+
+def build_search_query(manager_id: int, text: str) -> Optional[str]:
+    """Запрос FTS5 MATCH для поиска клиентов менеджера.
+    
+    Каждое слово ищется по префиксу; слова из цифр совпадают и с фрагментом
+    номера (в индексе лежат суффиксы номеров). Номер целиком в формате
+    8XXXXXXXXXX/7XXXXXXXXXX сводится к последним 10 цифрам, «ё» — к «е»,
+    как и в индексе. Слова в индексе хранятся с префиксом менеджера
+    (m12_иван), поэтому запрос читает только записи этого менеджера.
+    """
+    terms = []
+    for token in re.findall(r'\w+', text.lower().replace('ё', 'е')):
+        if token.isdigit() and len(token) == 11 and token[0] in '78':
+            token = token[1:]
+        terms.append(f'"m{manager_id}_{token}"*')
+    if not terms:
+        return None
+    return ' AND '.join(terms)
+
 
 class Database:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pool_size: int = 4, cache_size_kb: int = 8192,
+                 mmap_size: int = 64 * 1024 * 1024, manager_cache_size: int = 1024,
+                 manager_cache_ttl: float = 300.0):
         self.db_path = db_path
-        print(f"🔧 Инициализация Database с путем: {db_path}")
+        self.pool = ConnectionPool(
+            db_path,
+            max_size=pool_size,
+            cache_size_kb=cache_size_kb,
+            mmap_size=mmap_size
+        )
+        # Кэш профилей менеджеров: get_manager вызывается почти в каждом обработчике
+        self.manager_cache = LRUCache(max_size=manager_cache_size, ttl=manager_cache_ttl)
+        print(f"🔧 Инициализация Database с путем: {db_path} (пул: {pool_size})")
+    
+    def _connection(self):
+        """Получение соединения с БД из пула"""
+        return self.pool.connection()
     
-    def _get_connection(self):
-        """Получение соединения с БД"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def close(self):
+        """Закрыть соединения с БД"""
+        self.pool.close()
     
     # ========== Менеджеры ==========
     
     def get_manager(self, telegram_id: int) -> Optional[Dict]:
         """Получить менеджера по telegram_id"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        cached = self.manager_cache.get(telegram_id)
+        if cached is not LRUCache.MISSING:
+            return dict(cached) if cached else None
         
-        cursor.execute('SELECT * FROM managers WHERE telegram_id = ?', (telegram_id,))
-        row = cursor.fetchone()
+        generation = self.manager_cache.generation
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        conn.close()
-        return dict(row) if row else None
+            cursor.execute('SELECT * FROM managers WHERE telegram_id = ?', (telegram_id,))
+            row = cursor.fetchone()
+        
+        manager = dict(row) if row else None
+        # Кэшируем и отсутствие менеджера: новые пользователи тоже дергают get_manager
+        self.manager_cache.set(telegram_id, manager, generation)
+        return dict(manager) if manager else None
     
     def create_manager(self, telegram_id: int, full_name: str, industry: str, 
                       phone: str, industry_custom: str = None) -> int:
         """Создать нового менеджера"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        INSERT INTO managers (telegram_id, full_name, industry, industry_custom, phone)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (telegram_id, full_name, industry, industry_custom, phone))
+            cursor.execute('''
+            INSERT INTO managers (telegram_id, full_name, industry, industry_custom, phone)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (telegram_id, full_name, industry, industry_custom, phone))
         
-        manager_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+            manager_id = cursor.lastrowid
+            conn.commit()
+        self.manager_cache.invalidate(telegram_id)
         
         print(f"✅ Создан менеджер ID: {manager_id}, Telegram ID: {telegram_id}")
         return manager_id
     
     def update_manager_step(self, telegram_id: int, step: int):
         """Обновить шаг регистрации менеджера"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        UPDATE managers 
-        SET registration_step = ?, updated_at = CURRENT_TIMESTAMP
-        WHERE telegram_id = ?
-        ''', (step, telegram_id))
+            cursor.execute('''
+            UPDATE managers 
+            SET registration_step = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE telegram_id = ?
+            ''', (step, telegram_id))
         
-        conn.commit()
-        conn.close()
+            conn.commit()
+        self.manager_cache.invalidate(telegram_id)
     
     def complete_registration(self, telegram_id: int):
         """Завершить регистрацию менеджера"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        UPDATE managers 
-        SET terms_accepted = TRUE,
-            terms_accepted_at = CURRENT_TIMESTAMP,
-            is_active = TRUE,
-            registration_complete = TRUE,
-            registration_step = 5,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE telegram_id = ?
-        ''', (telegram_id,))
-        
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('''
+            UPDATE managers 
+            SET terms_accepted = TRUE,
+                terms_accepted_at = CURRENT_TIMESTAMP,
+                is_active = TRUE,
+                registration_complete = TRUE,
+                registration_step = 5,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE telegram_id = ?
+            ''', (telegram_id,))
+        
+            conn.commit()
+        self.manager_cache.invalidate(telegram_id)
         print(f"✅ Регистрация завершена для Telegram ID: {telegram_id}")
     
     # ========== Сообщения бота ==========
     
     def save_last_bot_message(self, telegram_id: int, message_id: int):
         """Сохранить ID последнего сообщения бота"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        INSERT OR REPLACE INTO bot_messages (telegram_id, last_message_id, updated_at)
-        VALUES (?, ?, CURRENT_TIMESTAMP)
-        ''', (telegram_id, message_id))
+            cursor.execute('''
+            INSERT OR REPLACE INTO bot_messages (telegram_id, last_message_id, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', (telegram_id, message_id))
         
-        conn.commit()
-        conn.close()
+            conn.commit()
     
     def get_last_bot_message(self, telegram_id: int) -> Optional[int]:
         """Получить ID последнего сообщения бота"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('SELECT last_message_id FROM bot_messages WHERE telegram_id = ?', (telegram_id,))
-        row = cursor.fetchone()
+            cursor.execute('SELECT last_message_id FROM bot_messages WHERE telegram_id = ?', (telegram_id,))
+            row = cursor.fetchone()
         
-        conn.close()
         return row['last_message_id'] if row else None
     
+    def save_last_bot_messages(self, items: List[tuple]):
+        """Сохранить ID последних сообщений бота пачкой [(telegram_id, message_id), ...]"""
+        with self._connection() as conn:
+            conn.executemany('''
+            INSERT OR REPLACE INTO bot_messages (telegram_id, last_message_id, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', items)
+            conn.commit()
+    
+    def get_all_last_bot_messages(self) -> Dict[int, int]:
+        """Получить ID последних сообщений бота для всех пользователей"""
+        with self._connection() as conn:
+            cursor = conn.execute('''
+            SELECT telegram_id, last_message_id FROM bot_messages
+            WHERE last_message_id IS NOT NULL
+            ''')
+            return {row['telegram_id']: row['last_message_id'] for row in cursor}
+    
     # ========== Клиенты ==========
     
     def get_client(self, manager_id: int, phone: str) -> Optional[Dict]:
         """Получить клиента по номеру телефона"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM clients 
-        WHERE manager_id = ? AND phone = ?
-        ''', (manager_id, phone))
+            cursor.execute('''
+            SELECT * FROM clients 
+            WHERE manager_id = ? AND phone = ?
+            ''', (manager_id, phone))
         
-        row = cursor.fetchone()
-        conn.close()
+            row = cursor.fetchone()
         return dict(row) if row else None
     
+    def get_client_by_id(self, manager_id: int, client_id: int) -> Optional[Dict]:
+        """Получить клиента менеджера по ID"""
+        with self._connection() as conn:
+            row = conn.execute(
+                'SELECT * FROM clients WHERE id = ? AND manager_id = ?',
+                (client_id, manager_id)
+            ).fetchone()
+        return dict(row) if row else None
+    
+    def delete_client(self, manager_id: int, client_id: int) -> bool:
+        """Удалить клиента; его напоминания остаются, но без привязки к клиенту"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'DELETE FROM clients WHERE id = ? AND manager_id = ?',
+                (client_id, manager_id)
+            )
+            deleted = cursor.rowcount > 0
+            if deleted:
+                conn.execute('UPDATE reminders SET client_id = NULL WHERE client_id = ?', (client_id,))
+            conn.commit()
+        if deleted:
+            print(f"🗑️ Удалён клиент ID: {client_id}, менеджер ID: {manager_id}")
+        return deleted
+    
     def create_client(self, manager_id: int, name: str, phone: str) -> int:
         """Создать нового клиента"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        INSERT INTO clients (manager_id, name, phone, last_contact)
-        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-        ''', (manager_id, name, phone))
+            cursor.execute('''
+            INSERT INTO clients (manager_id, name, phone, last_contact)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (manager_id, name, phone))
         
-        client_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+            client_id = cursor.lastrowid
+            conn.commit()
         
         print(f"✅ Создан клиент ID: {client_id}, менеджер ID: {manager_id}, имя: {name}")
         return client_id
     
     def get_clients(self, manager_id: int, limit: int = 100) -> List[Dict]:
         """Получить список клиентов менеджера"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT * FROM clients 
-        WHERE manager_id = ?
-        ORDER BY last_contact DESC
-        LIMIT ?
-        ''', (manager_id, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('''
+            SELECT * FROM clients 
+            WHERE manager_id = ?
+            ORDER BY last_contact DESC
+            LIMIT ?
+            ''', (manager_id, limit))
+        
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
+    def get_clients_page(self, manager_id: int, limit: int = 10, after_id: Optional[int] = None,
+                         before_id: Optional[int] = None) -> Tuple[List[Dict], bool]:
+        """Страница клиентов по убыванию (last_contact, id) — keyset-пагинация.
+        
+        after_id — следующая страница после клиента с этим id, before_id —
+        предыдущая страница перед ним, без обоих — первая страница.
+        Каждая выборка — поиск по индексу idx_clients_manager_page, поэтому
+        время не зависит от номера страницы (в отличие от OFFSET).
+        Возвращает клиентов в порядке показа и признак, что в направлении
+        листания есть ещё страница.
+        """
+        anchor_id = after_id if after_id is not None else before_id
+        backward = after_id is None and before_id is not None
+        with self._connection() as conn:
+            if anchor_id is None:
+                rows = conn.execute('''
+                SELECT id, name, phone, last_contact FROM clients
+                WHERE manager_id = ?
+                ORDER BY last_contact DESC, id DESC
+                LIMIT ?
+                ''', (manager_id, limit + 1)).fetchall()
+            else:
+                anchor = conn.execute(
+                    'SELECT last_contact FROM clients WHERE id = ? AND manager_id = ?',
+                    (anchor_id, manager_id)
+                ).fetchone()
+                if anchor is None:
+                    return [], False
+                
+                # Сначала клиенты с тем же last_contact (импорт даёт много
+                # одинаковых значений), затем остальные — два поиска по индексу
+                # вместо сравнения (last_contact, id), которое SQLite проверяет
+                # построчно внутри группы одинаковых last_contact
+                order = 'ASC' if backward else 'DESC'
+                op = '>' if backward else '<'
+                rows = conn.execute(f'''
+                SELECT id, name, phone, last_contact FROM clients
+                WHERE manager_id = ? AND last_contact = ? AND id {op} ?
+                ORDER BY id {order}
+                LIMIT ?
+                ''', (manager_id, anchor['last_contact'], anchor_id, limit + 1)).fetchall()
+                if len(rows) <= limit:
+                    rows += conn.execute(f'''
+                    SELECT id, name, phone, last_contact FROM clients
+                    WHERE manager_id = ? AND last_contact {op} ?
+                    ORDER BY last_contact {order}, id {order}
+                    LIMIT ?
+                    ''', (manager_id, anchor['last_contact'], limit + 1 - len(rows))).fetchall()
+        
+        has_more = len(rows) > limit
+        clients = [dict(row) for row in rows[:limit]]
+        if backward:
+            clients.reverse()
+        return clients, has_more
+    
+    def search_clients(self, manager_id: int, text: str, limit: int = 20) -> List[Dict]:
+        """Полнотекстовый поиск клиентов менеджера по имени, заметкам, интересу
+        и фрагменту номера (индекс clients_fts), сначала недавно добавленные.
+        
+        Сортировка по rowid идёт в порядке индекса FTS5 и останавливается
+        на limit совпадениях; ранжирование (rank) пришлось бы считать для
+        всех совпадений, а на коротких префиксах их десятки тысяч.
+        Проверка manager_id страхует от слов с чужим префиксом в тексте.
+        """
+        query = build_search_query(manager_id, text)
+        if query is None:
+            return []
+        
+        with self._connection() as conn:
+            cursor = conn.execute('''
+            SELECT c.id, c.name, c.phone, c.status, c.last_contact
+            FROM clients_fts f
+            JOIN clients c ON c.id = f.rowid
+            WHERE clients_fts MATCH ? AND c.manager_id = ?
+            ORDER BY f.rowid DESC
+            LIMIT ?
+            ''', (query, manager_id, limit))
+            return [dict(row) for row in cursor]
+    
+    def bulk_insert_clients(self, manager_id: int, clients: List[tuple]) -> int:
+        """Добавить клиентов пачкой [(name, phone), ...] одной транзакцией.
+        
+        Уже существующие номера пропускаются. Возвращает число добавленных.
+        """
+        with self._connection() as conn:
+            cursor = conn.executemany('''
+            INSERT INTO clients (manager_id, name, phone, last_contact)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(manager_id, phone) DO NOTHING
+            ''', ((manager_id, name, phone) for name, phone in clients))
+            conn.commit()
+            return cursor.rowcount
+    
+    def iter_clients_export(self, manager_id: int, chunk_size: int = 1000) -> Iterator[List[tuple]]:
+        """Клиенты менеджера для выгрузки порциями по chunk_size строк.
+        
+        Каждая порция читается отдельным коротким запросом с продолжением
+        после последнего телефона (WHERE phone > ?) по индексу
+        UNIQUE(manager_id, phone), поэтому память не зависит от числа
+        клиентов, а соединение пула занято только на время одной порции,
+        а не всей выгрузки.
+        """
+        last_phone = ''
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute('''
+                SELECT name, phone, status, notes, interest_model, last_contact, created_at
+                FROM clients
+                WHERE manager_id = ? AND phone > ?
+                ORDER BY phone
+                LIMIT ?
+                ''', (manager_id, last_phone, chunk_size)).fetchall()
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+            last_phone = rows[-1]['phone']
+    
     # ========== Шаблоны ==========
     
     def get_templates(self, manager_id: int) -> List[Dict]:
         """Получить шаблоны менеджера"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM templates 
-        WHERE manager_id = ? AND is_active = TRUE
-        ORDER BY name
-        ''', (manager_id,))
+            cursor.execute('''
+            SELECT * FROM templates 
+            WHERE manager_id = ? AND is_active = TRUE
+            ORDER BY name
+            ''', (manager_id,))
         
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
     def create_default_templates(self, manager_id: int, full_name: str, industry: str):
         """Создать шаблоны по умолчанию для нового менеджера"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        templates = [
-            {
-                'name': 'Первичный контакт',
-                'content': f"👋 Добрый день, {{имя_клиента}}!\n\nМеня зовут {full_name}, я менеджер по продажам. Отправляю вам контакты.\n\n📍 Адрес: укажите адрес\n📞 Телефон: укажите телефон\n🌐 Сайт: укажите сайт\n\nС уважением, {full_name}",
-                'variables': '["имя_клиента", "ваше_имя", "ваша_компания"]'
-            }
-        ]
-        
-        for template in templates:
-            cursor.execute('''
-            INSERT INTO templates (manager_id, name, content, variables)
-            VALUES (?, ?, ?, ?)
-            ''', (manager_id, template['name'], template['content'], template['variables']))
+        with self._connection() as conn:
+            cursor = conn.cursor()
+        
+            templates = [
+                {
+                    'name': 'Первичный контакт',
+                    # Имя менеджера — переменной {ваше_имя}, а не текстом: фигурные скобки
+                    # в имени сломали бы разбор шаблона (template_engine.py)
+                    'content': "👋 Добрый день, {имя_клиента}!\n\nМеня зовут {ваше_имя}, я менеджер по продажам. Отправляю вам контакты.\n\n📍 Адрес: укажите адрес\n📞 Телефон: укажите телефон\n🌐 Сайт: укажите сайт\n\nС уважением, {ваше_имя}",
+                    'variables': '["имя_клиента", "ваше_имя", "ваша_компания"]'
+                }
+            ]
         
-        conn.commit()
-        conn.close()
+            for template in templates:
+                cursor.execute('''
+                INSERT INTO templates (manager_id, name, content, variables)
+                VALUES (?, ?, ?, ?)
+                ''', (manager_id, template['name'], template['content'], template['variables']))
+        
+            conn.commit()
         print(f"✅ Созданы шаблоны по умолчанию для менеджера ID: {manager_id}")
+    
+    def update_template(self, manager_id: int, template_id: int, content: str) -> bool:
+        """Изменить текст шаблона менеджера"""
+        with self._connection() as conn:
+            cursor = conn.execute('''
+            UPDATE templates SET content = ?
+            WHERE id = ? AND manager_id = ?
+            ''', (content, template_id, manager_id))
+            conn.commit()
+        return cursor.rowcount > 0
+    
+    # ========== Напоминания ==========
+    
+    def create_reminder(self, manager_id: int, client_id: Optional[int], reminder_type: str,
+                        text: str, due_date: str) -> int:
+        """Создать напоминание (due_date в UTC: 'YYYY-MM-DD HH:MM:SS')"""
+        with self._connection() as conn:
+            cursor = conn.execute('''
+            INSERT INTO reminders (manager_id, client_id, type, text, due_date)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (manager_id, client_id, reminder_type, text, due_date))
+            reminder_id = cursor.lastrowid
+            conn.commit()
+        return reminder_id
+    
+    def get_pending_reminder_keys(self, after_id: int = 0, limit: int = 10000,
+                                  shards: int = 1, shard_index: int = 0) -> List[tuple]:
+        """Невыполненные напоминания с id > after_id: [(id, due_date), ...] по возрастанию id.
+        
+        При shards > 1 — только напоминания менеджеров шарда shard_index
+        (telegram_id % shards == shard_index, как делит апдейты супервизор).
+        """
+        with self._connection() as conn:
+            cursor = conn.execute('''
+            SELECT r.id, r.due_date FROM reminders r
+            JOIN managers m ON m.id = r.manager_id
+            WHERE r.id > ? AND r.is_done = FALSE AND m.telegram_id % ? = ?
+            ORDER BY r.id
+            LIMIT ?
+            ''', (after_id, shards, shard_index, limit))
+            return [(row['id'], row['due_date']) for row in cursor]
+    
+    def get_reminders_for_dispatch(self, reminder_ids: List[int]) -> List[Dict]:
+        """Невыполненные напоминания по списку id вместе с менеджером и клиентом"""
+        if not reminder_ids:
+            return []
+        placeholders = ','.join('?' * len(reminder_ids))
+        with self._connection() as conn:
+            cursor = conn.execute(f'''
+            SELECT r.id, r.type, r.text, r.due_date, r.client_id,
+                   m.telegram_id, c.name AS client_name, c.phone AS client_phone
+            FROM reminders r
+            JOIN managers m ON m.id = r.manager_id
+            LEFT JOIN clients c ON c.id = r.client_id
+            WHERE r.id IN ({placeholders}) AND r.is_done = FALSE
+            ''', reminder_ids)
+            return [dict(row) for row in cursor]
+    
+    def claim_reminders(self, reminder_ids: List[int]) -> List[int]:
+        """Отметить напоминания выполненными одной транзакцией и вернуть id,
+        которые отметил именно этот вызов (остальные уже забрал другой процесс)"""
+        claimed = []
+        with self._connection() as conn:
+            for reminder_id in reminder_ids:
+                cursor = conn.execute(
+                    'UPDATE reminders SET is_done = TRUE WHERE id = ? AND is_done = FALSE',
+                    (reminder_id,)
+                )
+                if cursor.rowcount:
+                    claimed.append(reminder_id)
+            conn.commit()
+        return claimed
+    
+    def get_upcoming_reminders(self, manager_id: int, limit: int = 10) -> List[Dict]:
+        """Ближайшие невыполненные напоминания менеджера"""
+        with self._connection() as conn:
+            cursor = conn.execute('''
+            SELECT r.*, c.name AS client_name
+            FROM reminders r
+            LEFT JOIN clients c ON c.id = r.client_id
+            WHERE r.manager_id = ? AND r.is_done = FALSE
+            ORDER BY r.due_date
+            LIMIT ?
+            ''', (manager_id, limit))
+            return [dict(row) for row in cursor]
+    
+    def iter_reminders_export(self, manager_id: int, chunk_size: int = 1000) -> Iterator[List[tuple]]:
+        """Напоминания менеджера для выгрузки порциями по chunk_size строк
+        (сначала невыполненные, по сроку — в порядке индекса idx_reminders_manager_due).
+        
+        Как и iter_clients_export, каждая порция — отдельный короткий запрос,
+        продолжающий с последней строки по ключу (is_done, due_date, id).
+        """
+        last_key = (-1, '', 0)
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute('''
+                SELECT r.due_date, r.type, r.text, c.name, c.phone, r.is_done, r.id
+                FROM reminders r
+                LEFT JOIN clients c ON c.id = r.client_id
+                WHERE r.manager_id = ? AND (r.is_done, r.due_date, r.id) > (?, ?, ?)
+                ORDER BY r.is_done, r.due_date, r.id
+                LIMIT ?
+                ''', (manager_id, *last_key, chunk_size)).fetchall()
+            if not rows:
+                break
+            yield [tuple(row)[:-1] for row in rows]
+            last = rows[-1]
+            last_key = (last['is_done'], last['due_date'], last['id'])
+    
+    # ========== Состояния FSM ==========
+    
+    def get_fsm_record(self, key: tuple, min_updated_at: float) -> Optional[Dict]:
+        """Получить состояние и данные FSM (без записей старше min_updated_at)"""
+        with self._connection() as conn:
+            cursor = conn.execute('''
+            SELECT state, data, updated_at FROM fsm_states
+            WHERE bot_id = ? AND chat_id = ? AND user_id = ? AND thread_id = ? AND destiny = ?
+              AND updated_at >= ?
+            ''', (*key, min_updated_at))
+            row = cursor.fetchone()
+        
+        if not row:
+            return None
+        return {
+            'state': row['state'],
+            'data': json.loads(row['data']) if row['data'] else {},
+            'updated_at': row['updated_at']
+        }
+    
+    def save_fsm_records(self, records: List[tuple]):
+        """Сохранить пачку состояний FSM одной транзакцией.
+        
+        records: [(key, state, data, updated_at), ...]; пустые состояния удаляются.
+        """
+        upserts = []
+        deletes = []
+        for key, state, data, updated_at in records:
+            if state is None and not data:
+                deletes.append(key)
+            else:
+                upserts.append((*key, state, json.dumps(data, ensure_ascii=False), updated_at))
+        
+        with self._connection() as conn:
+            conn.executemany('''
+            INSERT OR REPLACE INTO fsm_states
+                (bot_id, chat_id, user_id, thread_id, destiny, state, data, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', upserts)
+            conn.executemany('''
+            DELETE FROM fsm_states
+            WHERE bot_id = ? AND chat_id = ? AND user_id = ? AND thread_id = ? AND destiny = ?
+            ''', deletes)
+            conn.commit()
+    
+    def delete_expired_fsm_records(self, min_updated_at: float) -> int:
+        """Удалить брошенные состояния FSM"""
+        with self._connection() as conn:
+            cursor = conn.execute('DELETE FROM fsm_states WHERE updated_at < ?', (min_updated_at,))
+            conn.commit()
+            return cursor.rowcount
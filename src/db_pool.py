@@ -0,0 +1,120 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """Пул постоянных соединений с SQLite.
+
+    Каждое соединение открывается и настраивается (WAL, synchronous=NORMAL,
+    кэш страниц, mmap) один раз, после чего переиспользуется. Размер пула
+    ограничен; если все соединения заняты, запрос ждёт освобождения.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 4, cache_size_kb: int = 8192,
+                 mmap_size: int = 64 * 1024 * 1024, timeout: float = 5.0,
+                 health_check_interval: float = 30.0):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        # LIFO: горячие соединения (с прогретым кэшем) выдаются первыми
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._closed = False
+
+    def _create(self) -> sqlite3.Connection:
+        """Открыть и настроить новое соединение"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA cache_size = -{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """Проверка соединения перед выдачей"""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection):
+        """Закрыть соединение и освободить место в пуле"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._size -= 1
+
+    def acquire(self) -> sqlite3.Connection:
+        """Взять соединение из пула (или открыть новое, если есть место)"""
+        if self._closed:
+            raise RuntimeError("Пул соединений закрыт")
+
+        while True:
+            try:
+                conn, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._size < self.max_size
+                    if can_create:
+                        self._size += 1
+                if can_create:
+                    try:
+                        return self._create()
+                    except Exception:
+                        with self._lock:
+                            self._size -= 1
+                        raise
+                try:
+                    conn, released_at = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"Нет свободных соединений с БД за {self.timeout} с")
+
+            # Проверяем только давно простаивавшие соединения
+            if time.monotonic() - released_at < self.health_check_interval or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn: sqlite3.Connection):
+        """Вернуть соединение в пул"""
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер: взять соединение и вернуть его после работы"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Закрыть все простаивающие соединения"""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
@@ -0,0 +1,122 @@
+import asyncio
+import csv
+import io
+import tempfile
+from typing import IO, AsyncGenerator, AsyncIterator, List, Tuple
+
+from aiogram.types import InputFile
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # выгрузка в Excel необязательна
+    Workbook = None
+
+CLIENT_COLUMNS = ('Имя', 'Телефон', 'Статус', 'Заметки', 'Интерес', 'Последний контакт', 'Добавлен')
+REMINDER_COLUMNS = ('Срок', 'Тип', 'Текст', 'Клиент', 'Телефон клиента', 'Выполнено')
+
+# Файл держим в памяти, пока он небольшой, иначе — во временном файле
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def xlsx_available() -> bool:
+    """Установлен ли openpyxl для выгрузки в Excel"""
+    return Workbook is not None
+
+
+class SpooledInputFile(InputFile):
+    """Загрузка в Telegram из временного файла порциями, без чтения целиком"""
+
+    def __init__(self, file: IO[bytes], filename: str, chunk_size: int = 64 * 1024):
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.file = file
+
+    async def read(self, bot) -> AsyncGenerator[bytes, None]:
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+
+class ClientExporter:
+    """Потоковая выгрузка клиентов и напоминаний в CSV/XLSX.
+
+    Строки читаются из БД порциями и сразу дописываются во временный файл,
+    поэтому расход памяти не зависит от числа клиентов. Запись порций
+    выполняется в потоке, чтобы не блокировать event loop.
+    """
+
+    def __init__(self, db, chunk_size: int = 1000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    async def export_csv(self, manager_id: int, kind: str = 'clients') -> Tuple[IO[bytes], int]:
+        """Выгрузить клиентов (kind='clients') или напоминания (kind='reminders') в CSV.
+
+        Возвращает временный файл (закрывает вызывающий) и число строк.
+        CSV пишется в UTF-8 с BOM и разделителем «;», как его ждёт Excel.
+        """
+        if kind == 'reminders':
+            columns, chunks = REMINDER_COLUMNS, self.db.iter_reminders_export(manager_id, self.chunk_size)
+        else:
+            columns, chunks = CLIENT_COLUMNS, self.db.iter_clients_export(manager_id, self.chunk_size)
+
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        stream = io.TextIOWrapper(buffer, encoding='utf-8-sig', newline='')
+        writer = csv.writer(stream, delimiter=';')
+        try:
+            writer.writerow(columns)
+            rows = await self._write_chunks(chunks, writer.writerows)
+            stream.flush()
+        except BaseException:
+            # Сначала отвязываем обёртку: detach() после закрытия буфера
+            # бросил бы ValueError и скрыл исходную ошибку
+            try:
+                stream.detach()
+            finally:
+                buffer.close()
+            raise
+        stream.detach()
+        return buffer, rows
+
+    async def export_xlsx(self, manager_id: int) -> Tuple[IO[bytes], int]:
+        """Выгрузить клиентов и напоминания в XLSX (два листа).
+
+        Книга создаётся в режиме write_only: openpyxl не держит строки
+        в памяти. Возвращает временный файл и число клиентов.
+        """
+        if Workbook is None:
+            raise RuntimeError("Для выгрузки в Excel установите openpyxl")
+
+        workbook = Workbook(write_only=True)
+        clients_sheet = workbook.create_sheet('Клиенты')
+        clients_sheet.append(CLIENT_COLUMNS)
+        rows = await self._write_chunks(
+            self.db.iter_clients_export(manager_id, self.chunk_size),
+            lambda chunk: [clients_sheet.append(row) for row in chunk]
+        )
+
+        reminders_sheet = workbook.create_sheet('Напоминания')
+        reminders_sheet.append(REMINDER_COLUMNS)
+        await self._write_chunks(
+            self.db.iter_reminders_export(manager_id, self.chunk_size),
+            lambda chunk: [reminders_sheet.append(row) for row in chunk]
+        )
+
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            await asyncio.to_thread(workbook.save, buffer)
+        except BaseException:
+            buffer.close()
+            raise
+        return buffer, rows
+
+    @staticmethod
+    async def _write_chunks(chunks: AsyncIterator[List[tuple]], write) -> int:
+        rows = 0
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(write, chunk)
+                rows += len(chunk)
+        finally:
+            # При ошибке записи сразу возвращаем соединение в пул
+            await chunks.aclose()
+        return rows
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+logger = logging.getLogger(__name__)
+
+
+class _Record:
+    __slots__ = ('state', 'data', 'updated_at', 'cached_at')
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any], updated_at: float):
+        self.state = state
+        self.data = data
+        self.updated_at = updated_at
+        self.cached_at = time.monotonic()
+
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище FSM в SQLite (таблица fsm_states) вместо MemoryStorage.
+
+    Состояния переживают перезапуск и доступны всем процессам бота.
+    Чтения обслуживаются из кэша в памяти, записи копятся и сбрасываются
+    в БД одной транзакцией раз в `flush_interval` секунд и при закрытии.
+    Состояния, не менявшиеся дольше `state_ttl` секунд, считаются брошенными
+    и удаляются.
+
+    Кэш предполагает, что апдейты одного пользователя обрабатывает один
+    процесс (шардирование по telegram_id); при балансировке без привязки
+    пользователей к процессам кэш следует отключить (`cache_ttl=0`).
+    """
+
+    def __init__(self, db, flush_interval: float = 1.0, state_ttl: float = 7 * 24 * 3600,
+                 cache_ttl: float = 300.0, cache_size: int = 10000,
+                 cleanup_interval: float = 3600.0):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.state_ttl = state_ttl
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.cleanup_interval = cleanup_interval
+
+        self._cache: OrderedDict = OrderedDict()
+        self._dirty: Dict[tuple, _Record] = {}
+        self._flushing: Dict[tuple, _Record] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(key: StorageKey) -> tuple:
+        return (key.bot_id, key.chat_id, key.user_id, key.thread_id or 0, key.destiny)
+
+    async def _get_record(self, key: StorageKey) -> _Record:
+        storage_key = self._key(key)
+
+        record = self._dirty.get(storage_key) or self._flushing.get(storage_key)
+        if record is not None:
+            return record
+
+        record = self._cache.get(storage_key)
+        if record is not None:
+            expired = time.time() - record.updated_at > self.state_ttl
+            if not expired and time.monotonic() - record.cached_at <= self.cache_ttl:
+                self._cache.move_to_end(storage_key)
+                return record
+
+        row = await self.db.get_fsm_record(storage_key, time.time() - self.state_ttl)
+        if row:
+            record = _Record(row['state'], row['data'], row['updated_at'])
+        else:
+            record = _Record(None, {}, time.time())
+        self._remember(storage_key, record)
+        return record
+
+    def _remember(self, storage_key: tuple, record: _Record):
+        if self.cache_ttl <= 0:
+            return
+        self._cache[storage_key] = record
+        self._cache.move_to_end(storage_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _write(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        storage_key = self._key(key)
+        record = _Record(state, data, time.time())
+        self._dirty[storage_key] = record
+        self._remember(storage_key, record)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get_record(key)
+        state = state.state if isinstance(state, State) else state
+        self._write(key, state, record.data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._get_record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get_record(key)
+        self._write(key, record.state, data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._get_record(key)
+        return record.data.copy()
+
+    async def flush(self):
+        """Записать накопленные изменения в БД"""
+        if not self._dirty:
+            return
+
+        pending, self._dirty = self._dirty, {}
+        # Пока пачка пишется, чтения берут значения из неё, а не из БД
+        self._flushing = pending
+        records = [
+            (storage_key, record.state, record.data, record.updated_at)
+            for storage_key, record in pending.items()
+        ]
+        try:
+            await self.db.save_fsm_records(records)
+        except Exception as e:
+            for storage_key, record in pending.items():
+                self._dirty.setdefault(storage_key, record)
+            logger.error(f"❌ Не удалось сохранить состояния FSM: {e}")
+        finally:
+            self._flushing = {}
+
+    async def cleanup(self):
+        """Удалить брошенные состояния"""
+        deleted = await self.db.delete_expired_fsm_records(time.time() - self.state_ttl)
+        if deleted:
+            logger.info(f"🧹 Удалено брошенных состояний FSM: {deleted}")
+
+    async def _flush_loop(self):
+        last_cleanup = 0.0
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            if time.monotonic() - last_cleanup >= self.cleanup_interval:
+                last_cleanup = time.monotonic()
+                try:
+                    await self.cleanup()
+                except Exception as e:
+                    logger.error(f"❌ Ошибка очистки состояний FSM: {e}")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
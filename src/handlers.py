@@ -1,9 +1,11 @@
-from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, Contact
-from aiogram.filters import Command, StateFilter
+from aiogram import Router
+from aiogram.types import Message, CallbackQuery, Contact, InlineKeyboardMarkup
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 
 import logging
+import tempfile
+from datetime import datetime
 
 # Настройка логирования ПЕРЕД импортами
 logging.basicConfig(level=logging.INFO)
@@ -12,6 +14,19 @@ logger = logging.getLogger(__name__)
 # Импорты из текущей директории src (БЕЗ префикса src.)
 try:
     from database import Database
+    from async_database import AsyncDatabase
+    from message_tracker import LastMessageTracker
+    from message_cleanup import MessageDeleter
+    from throttling import OutboundScheduler, ThrottledBot
+    from importers import ClientImporter, open_text, iter_csv_contacts, iter_vcard_contacts
+    from exporters import ClientExporter, SpooledInputFile, xlsx_available
+    from metrics import Metrics
+    from template_engine import TemplateEngine
+    from routing import DispatchIndex
+    from callbacks import (
+        codec, ActionDispatcher, CLIENTS_NEXT, CLIENTS_PREV, CLIENT_CARD, CLIENT_SEND_CARD,
+        CLIENT_DELETE, CLIENT_DELETE_CONFIRM, CLIENT_ADD_NOTE, CLIENT_ADD_REMINDER, CLIENT_EDIT
+    )
     logger.info("✅ Database импортирован успешно")
 except ImportError as e:
     logger.error(f"❌ Ошибка импорта Database: {e}")
@@ -29,13 +44,47 @@ except ImportError as e:
     raise
 
 router = Router()
-db = Database(Config.DB_PATH)
+# Маршруты ищутся по словарям (callback_data, команда, состояние FSM) — см. routing.py
+index = DispatchIndex()
+metrics = Metrics()
+db = AsyncDatabase(
+    Database(
+        Config.DB_PATH,
+        pool_size=Config.DB_POOL_SIZE,
+        cache_size_kb=Config.DB_CACHE_SIZE_KB,
+        mmap_size=Config.DB_MMAP_SIZE_MB * 1024 * 1024,
+        manager_cache_size=Config.MANAGER_CACHE_SIZE,
+        manager_cache_ttl=Config.MANAGER_CACHE_TTL
+    ),
+    max_workers=Config.DB_WORKERS,
+    metrics=metrics if Config.METRICS_ENABLED else None
+)
+message_tracker = LastMessageTracker(db, flush_interval=Config.BOT_MESSAGES_FLUSH_INTERVAL)
+message_deleter = MessageDeleter(max_concurrency=Config.DELETE_CONCURRENCY)
+outbound = OutboundScheduler(
+    # Общий лимит бота делится между процессами-обработчиками
+    global_rate=Config.API_GLOBAL_RATE / Config.SHARD_COUNT,
+    chat_rate=Config.API_CHAT_RATE,
+    chat_burst=Config.API_CHAT_BURST
+)
+client_importer = ClientImporter(db, batch_size=Config.IMPORT_BATCH_SIZE)
+client_exporter = ClientExporter(db, chunk_size=Config.EXPORT_CHUNK_SIZE)
+template_engine = TemplateEngine(db, cache_size=Config.TEMPLATE_CACHE_SIZE, cache_ttl=Config.TEMPLATE_CACHE_TTL)
+
+
+async def _button_expired(callback: CallbackQuery):
+    await callback.answer(Messages.BUTTON_EXPIRED, show_alert=True)
+
+
+# Кнопки с упакованными данными (действие + ID клиента/курсор) — см. callbacks.py
+actions = ActionDispatcher(codec, on_expired=_button_expired)
 
 class BotHandler:
     """Основной обработчик бота"""
     
     def __init__(self, bot):
-        self.bot = bot
+        # Все отправки/удаления идут через планировщик с лимитами Telegram
+        self.bot = ThrottledBot(bot, outbound)
     
     async def _safe_delete_message(self, chat_id: int, message_id: int):
         """Безопасное удаление сообщения"""
@@ -47,11 +96,16 @@ class BotHandler:
             return False
     
     async def _send_and_save_message(self, chat_id: int, text: str, 
-                                   reply_markup=None, parse_mode="Markdown"):
-        """Отправить сообщение и сохранить его ID"""
+                                   reply_markup=None, parse_mode="Markdown", coalesce: bool = True):
+        """Отправить сообщение и сохранить его ID.
+        
+        coalesce=False — сообщение нельзя заменить более новым, пока оно ждёт
+        очереди на отправку (напоминания, прогресс импорта).
+        """
+        last_msg_id = message_tracker.get(chat_id)
+        
         # Пытаемся удалить предыдущее сообщение
-        last_msg_id = db.get_last_bot_message(chat_id)
-        if last_msg_id:
+        if last_msg_id and not Config.SEND_BEFORE_DELETE:
             await self._safe_delete_message(chat_id, last_msg_id)
         
         # Отправляем новое сообщение
@@ -59,24 +113,68 @@ class BotHandler:
             chat_id=chat_id,
             text=text,
             reply_markup=reply_markup,
-            parse_mode=parse_mode
+            parse_mode=parse_mode,
+            coalesce=coalesce
         )
         
         # Сохраняем ID нового сообщения
-        db.save_last_bot_message(chat_id, msg.message_id)
+        message_tracker.set(chat_id, msg.message_id)
+        
+        # Старое сообщение удаляем в фоне: ответ виден пользователю за один запрос
+        if last_msg_id and Config.SEND_BEFORE_DELETE and last_msg_id != msg.message_id:
+            message_deleter.schedule(self.bot, chat_id, last_msg_id)
         return msg
 
+    async def _render_callback(self, callback: CallbackQuery, text: str,
+                               reply_markup=None, parse_mode="Markdown"):
+        """Показать экран в ответ на нажатие кнопки.
+        
+        Если кнопка нажата в текущем сообщении бота, оно редактируется на месте
+        (один запрос к API вместо удаления и отправки). Иначе, а также для
+        reply-клавиатур, которые нельзя передать в редактирование, —
+        удаление и отправка нового сообщения.
+        """
+        message = callback.message
+        return await self._edit_or_send(message.chat.id, message.message_id, text, reply_markup, parse_mode)
+    
+    async def _edit_or_send(self, chat_id: int, message_id: int, text: str,
+                            reply_markup=None, parse_mode="Markdown"):
+        """Отредактировать сообщение бота, если оно текущее, иначе удалить и отправить новое"""
+        last_msg_id = message_tracker.get(chat_id)
+        
+        can_edit = (
+            (last_msg_id is None or last_msg_id == message_id)
+            and (reply_markup is None or isinstance(reply_markup, InlineKeyboardMarkup))
+        )
+        if can_edit:
+            try:
+                result = await self.bot.edit_message_text(
+                    text=text,
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    reply_markup=reply_markup,
+                    parse_mode=parse_mode
+                )
+                message_tracker.set(chat_id, message_id)
+                return result
+            except TelegramBadRequest as e:
+                if "message is not modified" in str(e):
+                    return None
+                logger.warning(f"Не удалось отредактировать сообщение {message_id}: {e}")
+        
+        return await self._send_and_save_message(chat_id, text, reply_markup, parse_mode)
+
 class RegistrationHandlers:
     """Обработчики регистрации"""
     
     @staticmethod
-    @router.message(Command("start"))
+    @index.command("start")
     async def cmd_start(message: Message, state: FSMContext):
         """Обработчик команды /start"""
         handler = BotHandler(message.bot)
         
         # Проверяем, есть ли пользователь в базе
-        manager = db.get_manager(message.from_user.id)
+        manager = await db.get_manager(message.from_user.id)
         
         if manager:
             if manager['terms_accepted']:
@@ -105,7 +203,7 @@ class RegistrationHandlers:
             await state.set_state(RegistrationStates.waiting_for_name)
     
     @staticmethod
-    @router.message(RegistrationStates.waiting_for_name)
+    @index.message(RegistrationStates.waiting_for_name)
     async def process_name(message: Message, state: FSMContext):
         """Обработка ввода имени"""
         handler = BotHandler(message.bot)
@@ -127,31 +225,27 @@ class RegistrationHandlers:
         await state.set_state(RegistrationStates.waiting_for_industry)
     
     @staticmethod
-    @router.callback_query(F.data.startswith("industry_"))
+    @index.callback(prefix="industry_")
     async def process_industry(callback: CallbackQuery, state: FSMContext):
         """Обработка выбора сферы деятельности"""
         handler = BotHandler(callback.bot)
-        industry = callback.data.split("_")[1]
+        industry = callback.data.split("_", 1)[1]
         
         if industry == "other":
             # Запрашиваем уточнение для "Другого"
-            await handler._send_and_save_message(
-                callback.message.chat.id,
+            await handler._render_callback(
+                callback,
                 Messages.STEP_2_OTHER,
                 Keyboards.remove_keyboard()
             )
             await state.set_state(RegistrationStates.waiting_for_industry_other)
         else:
             # Сохраняем выбранную сферу
-            industry_map = {
-                "auto": "Автосалон",
-                "real_estate": "Недвижимость"
-            }
-            await state.update_data(industry=industry, industry_display=industry_map.get(industry, "Другое"))
+            await state.update_data(industry=industry, industry_display=MessageUtils.industry_label(industry))
             
             # Переходим к следующему шагу
-            await handler._send_and_save_message(
-                callback.message.chat.id,
+            await handler._render_callback(
+                callback,
                 Messages.STEP_3_PHONE,
                 Keyboards.get_phone_keyboard()
             )
@@ -160,7 +254,7 @@ class RegistrationHandlers:
         await callback.answer()
     
     @staticmethod
-    @router.message(RegistrationStates.waiting_for_industry_other)
+    @index.message(RegistrationStates.waiting_for_industry_other)
     async def process_industry_other(message: Message, state: FSMContext):
         """Обработка ввода другой сферы деятельности"""
         handler = BotHandler(message.bot)
@@ -181,7 +275,7 @@ class RegistrationHandlers:
         await state.set_state(RegistrationStates.waiting_for_phone)
     
     @staticmethod
-    @router.message(RegistrationStates.waiting_for_phone, F.text)
+    @index.message(RegistrationStates.waiting_for_phone, "text")
     async def process_phone_invalid_text(message: Message, state: FSMContext):
         """Обработка текстового ввода вместо контакта"""
         handler = BotHandler(message.bot)
@@ -193,7 +287,7 @@ class RegistrationHandlers:
         )
     
     @staticmethod
-    @router.message(RegistrationStates.waiting_for_phone, F.contact)
+    @index.message(RegistrationStates.waiting_for_phone, "contact")
     async def process_phone_valid(message: Message, state: FSMContext):
         """Обработка валидного телефона (контакт)"""
         handler = BotHandler(message.bot)
@@ -216,7 +310,7 @@ class RegistrationHandlers:
         logger.info(f"📋 Данные состояния: {data}")
         
         # Создаем менеджера в базе данных
-        manager_id = db.create_manager(
+        manager_id = await db.create_manager(
             telegram_id=message.from_user.id,
             full_name=data['full_name'],
             industry=data['industry'],
@@ -227,7 +321,8 @@ class RegistrationHandlers:
         logger.info(f"✅ Менеджер создан с ID: {manager_id}")
         
         # Создаем шаблоны по умолчанию
-        db.create_default_templates(manager_id, data['full_name'], data['industry_display'])
+        await db.create_default_templates(manager_id, data['full_name'], data['industry_display'])
+        template_engine.invalidate(manager_id)
         
         # Переходим к правилам
         await handler._send_and_save_message(
@@ -238,20 +333,20 @@ class RegistrationHandlers:
         await state.set_state(RegistrationStates.waiting_for_terms)
     
     @staticmethod
-    @router.callback_query(F.data == "terms_accept")
+    @index.callback("terms_accept")
     async def process_terms_accept(callback: CallbackQuery, state: FSMContext):
         """Обработка принятия правил"""
         handler = BotHandler(callback.bot)
         
         # Завершаем регистрацию
-        db.complete_registration(callback.from_user.id)
+        await db.complete_registration(callback.from_user.id)
         
         # Получаем данные менеджера
-        manager = db.get_manager(callback.from_user.id)
+        manager = await db.get_manager(callback.from_user.id)
         
         # Показываем главное меню
-        await handler._send_and_save_message(
-            callback.message.chat.id,
+        await handler._render_callback(
+            callback,
             Messages.MAIN_MENU.format(name=manager['full_name']),
             Keyboards.get_main_menu()
         )
@@ -260,17 +355,17 @@ class RegistrationHandlers:
         await callback.answer("✅ Регистрация завершена!")
     
     @staticmethod
-    @router.callback_query(F.data == "terms_reject")
+    @index.callback("terms_reject")
     async def process_terms_reject(callback: CallbackQuery, state: FSMContext):
         """Обработка отказа от правил"""
         handler = BotHandler(callback.bot)
         
         # Обновляем статус менеджера
-        db.update_manager_step(callback.from_user.id, 0)
+        await db.update_manager_step(callback.from_user.id, 0)
         
         # Показываем сообщение об отмене
-        await handler._send_and_save_message(
-            callback.message.chat.id,
+        await handler._render_callback(
+            callback,
             Messages.REGISTRATION_CANCELLED,
             Keyboards.remove_keyboard()
         )
@@ -283,23 +378,17 @@ class ClientHandlers:
     """Обработчики работы с клиентами"""
     
     @staticmethod
-    @router.message(F.text)
+    @index.message(None, "text")
     async def process_phone_input(message: Message, state: FSMContext):
         """Обработка ввода номера телефона клиента"""
         handler = BotHandler(message.bot)
         
         # Проверяем, зарегистрирован ли пользователь
-        manager = db.get_manager(message.from_user.id)
+        manager = await db.get_manager(message.from_user.id)
         if not manager or not manager['terms_accepted']:
             await message.answer("ℹ️ Пожалуйста, сначала завершите регистрацию. Нажмите /start")
             return
         
-        # Проверяем, не в процессе ли мы регистрации
-        current_state = await state.get_state()
-        if current_state:
-            # Если есть активное состояние, игнорируем ввод телефона
-            return
-        
         # Стандартизируем номер телефона
         phone = PhoneUtils.standardize_phone(message.text)
         if not phone:
@@ -311,20 +400,14 @@ class ClientHandlers:
             return
         
         # Проверяем, есть ли такой клиент
-        client = db.get_client(manager['id'], phone)
+        client = await db.get_client(manager['id'], phone)
         
         if client:
             # Клиент уже существует - показываем карточку
             await handler._send_and_save_message(
                 message.chat.id,
-                Messages.CLIENT_CARD.format(
-                    name=client['name'],
-                    phone=PhoneUtils.format_phone_display(client['phone']),
-                    last_contact=MessageUtils.format_datetime(client['last_contact']),
-                    status=client['status'],
-                    notes=client['notes'] or "Нет заметок"
-                ),
-                Keyboards.get_client_actions()
+                ClientHandlers._card_text(client),
+                Keyboards.get_client_actions(client['id'])
             )
         else:
             # Новый клиент - запрашиваем имя
@@ -337,7 +420,18 @@ class ClientHandlers:
             await state.set_state(ClientStates.waiting_for_client_name)
     
     @staticmethod
-    @router.message(ClientStates.waiting_for_client_name)
+    def _card_text(client: dict) -> str:
+        """Текст карточки клиента"""
+        return Messages.CLIENT_CARD.format(
+            name=client['name'],
+            phone=PhoneUtils.format_phone_display(client['phone']),
+            last_contact=MessageUtils.format_datetime(client['last_contact']),
+            status=client['status'],
+            notes=client['notes'] or "Нет заметок"
+        )
+    
+    @staticmethod
+    @index.message(ClientStates.waiting_for_client_name)
     async def process_client_name(message: Message, state: FSMContext):
         """Обработка ввода имени клиента"""
         handler = BotHandler(message.bot)
@@ -352,16 +446,16 @@ class ClientHandlers:
         client_phone = data['client_phone']
         
         # Получаем менеджера
-        manager = db.get_manager(message.from_user.id)
+        manager = await db.get_manager(message.from_user.id)
         
         # Создаем клиента
-        client_id = db.create_client(manager['id'], client_name, client_phone)
+        client_id = await db.create_client(manager['id'], client_name, client_phone)
         
         # Показываем сообщение об успешном создании
         await handler._send_and_save_message(
             message.chat.id,
             Messages.CLIENT_SAVED.format(name=client_name),
-            Keyboards.get_new_client_actions()
+            Keyboards.get_new_client_actions(client_id)
         )
         
         # Сохраняем ID клиента для дальнейших действий
@@ -373,7 +467,7 @@ class MenuHandlers:
     """Обработчики меню"""
     
     @staticmethod
-    @router.callback_query(F.data == "main_menu")
+    @index.callback("main_menu")
     async def process_main_menu(callback: CallbackQuery, state: FSMContext):
         """Обработка перехода в главное меню"""
         handler = BotHandler(callback.bot)
@@ -382,14 +476,14 @@ class MenuHandlers:
         await state.clear()
         
         # Получаем данные менеджера
-        manager = db.get_manager(callback.from_user.id)
+        manager = await db.get_manager(callback.from_user.id)
         if not manager:
             await callback.answer("❌ Ошибка: пользователь не найден")
             return
         
         # Показываем главное меню
-        await handler._send_and_save_message(
-            callback.message.chat.id,
+        await handler._render_callback(
+            callback,
             Messages.MAIN_MENU.format(name=manager['full_name']),
             Keyboards.get_main_menu()
         )
@@ -399,105 +493,504 @@ class MainMenuHandlers:
     """Обработчики главного меню"""
     
     @staticmethod
-    @router.callback_query(F.data == "menu_clients")
+    @index.callback("menu_clients")
     async def menu_clients(callback: CallbackQuery, state: FSMContext):
         """Меню 'Мои клиенты'"""
+        # Возврат к списку отменяет ожидание файла или поискового запроса
+        await state.clear()
+        await MainMenuHandlers._show_clients_page(callback)
+    
+    @staticmethod
+    @actions.on(CLIENTS_NEXT)
+    async def clients_next(callback: CallbackQuery, state: FSMContext, payload):
+        """Следующая страница списка клиентов"""
+        await MainMenuHandlers._show_clients_page(callback, payload.page, after_id=payload.anchor_id)
+    
+    @staticmethod
+    @actions.on(CLIENTS_PREV)
+    async def clients_prev(callback: CallbackQuery, state: FSMContext, payload):
+        """Предыдущая страница списка клиентов"""
+        await MainMenuHandlers._show_clients_page(callback, payload.page, before_id=payload.anchor_id)
+    
+    @staticmethod
+    async def _show_clients_page(callback: CallbackQuery, page: int = 1,
+                                 after_id: int = None, before_id: int = None):
+        """Показать страницу списка клиентов"""
         handler = BotHandler(callback.bot)
         
         # Получаем данные менеджера
-        manager = db.get_manager(callback.from_user.id)
+        manager = await db.get_manager(callback.from_user.id)
         if not manager:
             await callback.answer("❌ Ошибка: пользователь не найден")
             return
         
-        # Получаем список клиентов
-        clients = db.get_clients(manager['id'], limit=10)
+        page_size = Config.CLIENTS_PAGE_SIZE
+        clients, has_more = await db.get_clients_page(
+            manager['id'], page_size, after_id=after_id, before_id=before_id
+        )
+        if not clients and page > 1:
+            # Клиент-курсор удалён — начинаем сначала
+            page = 1
+            clients, has_more = await db.get_clients_page(manager['id'], page_size)
         
         if not clients:
             message_text = "👥 *Мои клиенты*\n\nУ вас пока нет клиентов.\n\n📱 Отправьте номер телефона клиента, чтобы добавить его."
+            reply_markup = Keyboards.get_clients_menu()
         else:
+            offset = (page - 1) * page_size
             clients_list = []
-            for i, client in enumerate(clients[:10], 1):
+            for i, client in enumerate(clients, offset + 1):
                 clients_list.append(f"{i}. {client['name']} - {PhoneUtils.format_phone_display(client['phone'])}")
             
-            message_text = f"👥 *Мои клиенты* (последние 10)\n\n" + "\n".join(clients_list) + "\n\n📱 Отправьте номер телефона клиента, чтобы добавить или найти."
+            message_text = f"👥 *Мои клиенты* (страница {page})\n\n" + "\n".join(clients_list) + "\n\n📱 Отправьте номер телефона клиента, чтобы добавить или найти."
+            
+            # При листании назад has_more относится к предыдущим страницам
+            has_prev = has_more if before_id is not None else page > 1
+            has_next = True if before_id is not None else has_more
+            reply_markup = Keyboards.get_clients_menu(
+                page,
+                prev_id=clients[0]['id'] if has_prev else None,
+                next_id=clients[-1]['id'] if has_next else None,
+                client_buttons=[(i, client['id']) for i, client in enumerate(clients, offset + 1)]
+            )
         
-        await handler._send_and_save_message(
-            callback.message.chat.id,
-            message_text,
-            Keyboards.get_back_button("main_menu")
-        )
+        await handler._render_callback(callback, message_text, reply_markup)
         await callback.answer()
     
     @staticmethod
-    @router.callback_query(F.data == "menu_templates")
+    @index.callback("menu_templates")
     async def menu_templates(callback: CallbackQuery, state: FSMContext):
         """Меню 'Шаблоны сообщений'"""
         handler = BotHandler(callback.bot)
         
         # Получаем данные менеджера
-        manager = db.get_manager(callback.from_user.id)
+        manager = await db.get_manager(callback.from_user.id)
         if not manager:
             await callback.answer("❌ Ошибка: пользователь не найден")
             return
         
-        # Получаем шаблоны
-        templates = db.get_templates(manager['id'])
+        # Получаем шаблоны (разобранные заранее, из кэша)
+        templates = await template_engine.get_templates(manager['id'])
         
         if not templates:
             message_text = "📋 *Шаблоны сообщений*\n\nУ вас пока нет шаблонов."
         else:
             templates_list = []
-            for i, template in enumerate(templates, 1):
-                templates_list.append(f"{i}. {template['name']}")
+            for i, template in enumerate(templates.values(), 1):
+                # В Markdown подчёркивание в имени переменной — начало курсива
+                variables = ", ".join(f"`{{{name}}}`" for name in template.variables)
+                templates_list.append(f"{i}. {template.name}" + (f" ({variables})" if variables else ""))
             
             message_text = f"📋 *Шаблоны сообщений*\n\n" + "\n".join(templates_list) + "\n\n⚡ Эта функция находится в разработке."
         
-        await handler._send_and_save_message(
-            callback.message.chat.id,
+        await handler._render_callback(
+            callback,
             message_text,
             Keyboards.get_back_button("main_menu")
         )
         await callback.answer()
     
     @staticmethod
-    @router.callback_query(F.data == "menu_reminders")
+    @index.callback("menu_reminders")
     async def menu_reminders(callback: CallbackQuery, state: FSMContext):
         """Меню 'Мои напоминания'"""
         handler = BotHandler(callback.bot)
         
-        message_text = "🔔 *Мои напоминания*\n\n⚡ Эта функция находится в разработке.\n\nСкоро вы сможете создавать напоминания для звонков и встреч с клиентами."
+        # Получаем данные менеджера
+        manager = await db.get_manager(callback.from_user.id)
+        if not manager:
+            await callback.answer("❌ Ошибка: пользователь не найден")
+            return
         
-        await handler._send_and_save_message(
-            callback.message.chat.id,
+        reminders = await db.get_upcoming_reminders(manager['id'], limit=10)
+        
+        if not reminders:
+            message_text = Messages.REMINDERS_EMPTY
+        else:
+            reminders_list = []
+            for i, reminder in enumerate(reminders, 1):
+                client = f" — {reminder['client_name']}" if reminder['client_name'] else ""
+                reminders_list.append(
+                    f"{i}. {MessageUtils.format_datetime(reminder['due_date'])}{client}\n"
+                    f"   {TextUtils.truncate_text(reminder['text'], 60)}"
+                )
+            message_text = Messages.REMINDERS_LIST.format(reminders="\n".join(reminders_list))
+        
+        await handler._render_callback(
+            callback,
             message_text,
             Keyboards.get_back_button("main_menu")
         )
         await callback.answer()
     
     @staticmethod
-    @router.callback_query(F.data == "menu_settings")
+    @index.callback("menu_settings")
     async def menu_settings(callback: CallbackQuery, state: FSMContext):
         """Меню 'Настройки профиля'"""
         handler = BotHandler(callback.bot)
         
         # Получаем данные менеджера
-        manager = db.get_manager(callback.from_user.id)
+        manager = await db.get_manager(callback.from_user.id)
         if not manager:
             await callback.answer("❌ Ошибка: пользователь не найден")
             return
         
-        message_text = f"⚙️ *Настройки профиля*\n\n👤 Имя: {manager['full_name']}\n🏢 Сфера: {manager['industry_custom'] or manager['industry']}\n📱 Телефон: {PhoneUtils.format_phone_display(manager['phone'])}\n\n⚡ Редактирование профиля в разработке."
+        message_text = f"⚙️ *Настройки профиля*\n\n👤 Имя: {manager['full_name']}\n🏢 Сфера: {MessageUtils.industry_label(manager['industry'], manager['industry_custom'])}\n📱 Телефон: {PhoneUtils.format_phone_display(manager['phone'])}\n\n⚡ Редактирование профиля в разработке."
         
-        await handler._send_and_save_message(
-            callback.message.chat.id,
+        await handler._render_callback(
+            callback,
             message_text,
             Keyboards.get_back_button("main_menu")
         )
         await callback.answer()
 
+class SearchHandlers:
+    """Обработчики поиска клиентов"""
+    
+    @staticmethod
+    @index.callback("clients_search")
+    async def clients_search(callback: CallbackQuery, state: FSMContext):
+        """Запрос поисковой строки"""
+        handler = BotHandler(callback.bot)
+        
+        manager = await db.get_manager(callback.from_user.id)
+        if not manager:
+            await callback.answer("❌ Ошибка: пользователь не найден")
+            return
+        
+        await handler._render_callback(
+            callback,
+            Messages.SEARCH_PROMPT,
+            Keyboards.get_back_button("menu_clients")
+        )
+        await state.set_state(ClientStates.waiting_for_search_query)
+        await callback.answer()
+    
+    @staticmethod
+    @index.message(ClientStates.waiting_for_search_query, "text")
+    async def process_search_query(message: Message, state: FSMContext):
+        """Поиск клиентов по имени, заметкам и фрагменту номера"""
+        handler = BotHandler(message.bot)
+        
+        manager = await db.get_manager(message.from_user.id)
+        if not manager or not manager['terms_accepted']:
+            await message.answer("ℹ️ Пожалуйста, сначала завершите регистрацию. Нажмите /start")
+            return
+        
+        await state.clear()
+        clients = await db.search_clients(manager['id'], message.text, limit=Config.SEARCH_RESULTS_LIMIT)
+        
+        if not clients:
+            message_text = Messages.SEARCH_EMPTY
+        else:
+            clients_list = []
+            for i, client in enumerate(clients, 1):
+                clients_list.append(f"{i}. {client['name']} - {PhoneUtils.format_phone_display(client['phone'])}")
+            message_text = Messages.SEARCH_RESULTS.format(clients="\n".join(clients_list))
+        
+        await handler._send_and_save_message(
+            message.chat.id,
+            message_text,
+            Keyboards.get_clients_menu()
+        )
+
+
+class ImportHandlers:
+    """Обработчики импорта клиентов из файлов"""
+    
+    @staticmethod
+    @index.callback("clients_import")
+    async def clients_import(callback: CallbackQuery, state: FSMContext):
+        """Запрос файла с контактами"""
+        handler = BotHandler(callback.bot)
+        
+        # Получаем данные менеджера
+        manager = await db.get_manager(callback.from_user.id)
+        if not manager:
+            await callback.answer("❌ Ошибка: пользователь не найден")
+            return
+        
+        await handler._render_callback(
+            callback,
+            Messages.IMPORT_INSTRUCTIONS,
+            Keyboards.get_back_button("menu_clients")
+        )
+        await state.set_state(ClientStates.waiting_for_import_file)
+        await callback.answer()
+    
+    @staticmethod
+    @index.message(ClientStates.waiting_for_import_file, "document")
+    async def process_import_file(message: Message, state: FSMContext):
+        """Импорт клиентов из CSV/vCard"""
+        handler = BotHandler(message.bot)
+        
+        manager = await db.get_manager(message.from_user.id)
+        if not manager or not manager['terms_accepted']:
+            await message.answer("ℹ️ Пожалуйста, сначала завершите регистрацию. Нажмите /start")
+            return
+        
+        document = message.document
+        file_name = (document.file_name or "").lower()
+        if file_name.endswith('.csv'):
+            parse = iter_csv_contacts
+        elif file_name.endswith(('.vcf', '.vcard')):
+            parse = iter_vcard_contacts
+        else:
+            parse = None
+        
+        max_size = Config.IMPORT_MAX_FILE_SIZE_MB * 1024 * 1024
+        if parse is None or (document.file_size or 0) > max_size:
+            await handler._send_and_save_message(
+                message.chat.id,
+                Messages.IMPORT_BAD_FILE.format(max_size=Config.IMPORT_MAX_FILE_SIZE_MB),
+                Keyboards.get_back_button("menu_clients")
+            )
+            return
+        
+        await state.clear()
+        progress = await handler._send_and_save_message(message.chat.id, Messages.IMPORT_STARTED, coalesce=False)
+        
+        async def on_progress(stats):
+            await handler.bot.edit_message_text(
+                text=Messages.IMPORT_PROGRESS.format(total=stats.total, imported=stats.imported),
+                chat_id=message.chat.id,
+                message_id=progress.message_id,
+                parse_mode="Markdown"
+            )
+        
+        # Файл держим в памяти, пока он небольшой, иначе — во временном файле
+        with tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024) as buffer:
+            await message.bot.download(document, destination=buffer)
+            stream = open_text(buffer)
+            try:
+                stats = await client_importer.run(manager['id'], parse(stream), on_progress)
+            finally:
+                stream.detach()
+        
+        await handler._edit_or_send(
+            message.chat.id,
+            progress.message_id,
+            Messages.IMPORT_DONE.format(
+                total=stats.total,
+                imported=stats.imported,
+                duplicates=stats.duplicates,
+                invalid=stats.invalid
+            ),
+            Keyboards.get_clients_menu()
+        )
+
+
+class ExportHandlers:
+    """Обработчики выгрузки клиентов в файлы"""
+    
+    @staticmethod
+    @index.callback("clients_export")
+    async def clients_export(callback: CallbackQuery, state: FSMContext):
+        """Выбор формата выгрузки"""
+        handler = BotHandler(callback.bot)
+        
+        manager = await db.get_manager(callback.from_user.id)
+        if not manager:
+            await callback.answer("❌ Ошибка: пользователь не найден")
+            return
+        
+        await handler._render_callback(
+            callback,
+            Messages.EXPORT_MENU,
+            Keyboards.get_export_menu(with_xlsx=xlsx_available())
+        )
+        await callback.answer()
+    
+    @staticmethod
+    @index.callback("export_clients_csv", "export_reminders_csv", "export_all_xlsx")
+    async def process_export(callback: CallbackQuery, state: FSMContext):
+        """Выгрузка клиентов/напоминаний документом"""
+        handler = BotHandler(callback.bot)
+        
+        manager = await db.get_manager(callback.from_user.id)
+        if not manager:
+            await callback.answer("❌ Ошибка: пользователь не найден")
+            return
+        
+        if callback.data == "export_all_xlsx" and not xlsx_available():
+            await callback.answer(Messages.EXPORT_XLSX_UNAVAILABLE, show_alert=True)
+            return
+        
+        await callback.answer()
+        chat_id = callback.message.chat.id
+        await handler._render_callback(callback, Messages.EXPORT_STARTED)
+        
+        date = datetime.now().strftime('%Y-%m-%d')
+        if callback.data == "export_all_xlsx":
+            buffer, rows = await client_exporter.export_xlsx(manager['id'])
+            filename = f"clients_{date}.xlsx"
+        else:
+            kind = callback.data.split("_")[1]
+            buffer, rows = await client_exporter.export_csv(manager['id'], kind)
+            filename = f"{kind}_{date}.csv"
+        
+        with buffer:
+            await handler.bot.send_document(
+                chat_id=chat_id,
+                document=SpooledInputFile(buffer, filename),
+                caption=Messages.EXPORT_DONE.format(rows=rows)
+            )
+        logger.info(f"📤 Выгрузка {filename} для менеджера ID {manager['id']}: {rows} строк")
+        
+        # Документ остаётся в чате, меню отправляем под ним
+        await handler._send_and_save_message(
+            chat_id,
+            Messages.EXPORT_MENU,
+            Keyboards.get_export_menu(with_xlsx=xlsx_available())
+        )
+
+
+class ClientActionHandlers:
+    """Действия с клиентом: кнопки несут ID клиента, клиент читается по первичному ключу"""
+    
+    @staticmethod
+    async def _get_client(callback: CallbackQuery, client_id: int):
+        """Менеджер и его клиент по ID (None, None — если не найдены, с ответом на кнопку)"""
+        manager = await db.get_manager(callback.from_user.id)
+        if not manager:
+            await callback.answer("❌ Ошибка: пользователь не найден")
+            return None, None
+        
+        client = await db.get_client_by_id(manager['id'], client_id)
+        if not client:
+            await callback.answer(Messages.CLIENT_NOT_FOUND, show_alert=True)
+            return manager, None
+        return manager, client
+    
+    @staticmethod
+    @actions.on(CLIENT_CARD)
+    async def client_card(callback: CallbackQuery, state: FSMContext, payload):
+        """Карточка клиента"""
+        handler = BotHandler(callback.bot)
+        
+        manager, client = await ClientActionHandlers._get_client(callback, payload.client_id)
+        if not client:
+            return
+        
+        await handler._render_callback(
+            callback,
+            ClientHandlers._card_text(client),
+            Keyboards.get_client_actions(client['id'])
+        )
+        await callback.answer()
+    
+    @staticmethod
+    @actions.on(CLIENT_SEND_CARD)
+    async def client_send_card(callback: CallbackQuery, state: FSMContext, payload):
+        """Визитка для клиента по шаблону менеджера"""
+        handler = BotHandler(callback.bot)
+        
+        manager, client = await ClientActionHandlers._get_client(callback, payload.client_id)
+        if not client:
+            return
+        
+        templates = await template_engine.get_templates(manager['id'])
+        if not templates:
+            await callback.answer(Messages.TEMPLATE_MISSING, show_alert=True)
+            return
+        
+        # Шаблон «Первичный контакт», а если его нет — первый по имени
+        template = next(
+            (t for t in templates.values() if t.name == "Первичный контакт"),
+            next(iter(templates.values()))
+        )
+        text = template.render({
+            'имя_клиента': client['name'],
+            'ваше_имя': manager['full_name'],
+            'ваша_компания': MessageUtils.industry_label(manager['industry'], manager['industry_custom']),
+        })
+        
+        await handler._render_callback(
+            callback,
+            Messages.BUSINESS_CARD.format(
+                phone=PhoneUtils.format_phone_display(client['phone']),
+                client_name=client['name']
+            ),
+            Keyboards.get_business_card_actions(client['id'])
+        )
+        # Текст визитки — отдельным сообщением без разметки, чтобы его можно было переслать
+        await handler.bot.send_message(chat_id=callback.message.chat.id, text=text)
+        await callback.answer()
+    
+    @staticmethod
+    @actions.on(CLIENT_DELETE)
+    async def client_delete(callback: CallbackQuery, state: FSMContext, payload):
+        """Запрос подтверждения удаления"""
+        handler = BotHandler(callback.bot)
+        
+        manager, client = await ClientActionHandlers._get_client(callback, payload.client_id)
+        if not client:
+            return
+        
+        await handler._render_callback(
+            callback,
+            Messages.CLIENT_DELETE_CONFIRM.format(
+                name=client['name'],
+                phone=PhoneUtils.format_phone_display(client['phone'])
+            ),
+            Keyboards.get_delete_confirm(client['id'])
+        )
+        await callback.answer()
+    
+    @staticmethod
+    @actions.on(CLIENT_DELETE_CONFIRM)
+    async def client_delete_confirm(callback: CallbackQuery, state: FSMContext, payload):
+        """Удаление клиента"""
+        handler = BotHandler(callback.bot)
+        
+        manager, client = await ClientActionHandlers._get_client(callback, payload.client_id)
+        if not client:
+            return
+        
+        await db.delete_client(manager['id'], client['id'])
+        await handler._render_callback(
+            callback,
+            Messages.CLIENT_DELETED.format(name=client['name']),
+            Keyboards.get_clients_menu()
+        )
+        await callback.answer()
+    
+    @staticmethod
+    @actions.on(CLIENT_ADD_NOTE)
+    @actions.on(CLIENT_ADD_REMINDER)
+    @actions.on(CLIENT_EDIT)
+    async def client_in_development(callback: CallbackQuery, state: FSMContext, payload):
+        """Заметки, напоминания и редактирование клиента"""
+        await callback.answer(Messages.IN_DEVELOPMENT, show_alert=True)
+
+
+async def send_reminder(bot, reminder: dict):
+    """Отправить наступившее напоминание менеджеру"""
+    handler = BotHandler(bot)
+    client = reminder['client_name'] or "не указан"
+    if reminder['client_phone']:
+        client += f" ({PhoneUtils.format_phone_display(reminder['client_phone'])})"
+    
+    # Текст и имя вводит пользователь: неэкранированные _ * ` ломают Markdown,
+    # Telegram отклоняет сообщение, и напоминание теряется
+    await handler._send_and_save_message(
+        reminder['telegram_id'],
+        Messages.REMINDER_NOTIFICATION.format(
+            text=MessageUtils.escape_markdown_legacy(reminder['text']),
+            client=MessageUtils.escape_markdown_legacy(client)
+        ),
+        Keyboards.get_back_button("main_menu"),
+        coalesce=False
+    )
+
 # Регистрируем обработчики
 registration_handlers = RegistrationHandlers()
 client_handlers = ClientHandlers()
 menu_handlers = MenuHandlers()
 main_menu_handlers = MainMenuHandlers()  # ← ДОБАВЬТЕ ЭТУ СТРОКУ
+search_handlers = SearchHandlers()
+import_handlers = ImportHandlers()
+export_handlers = ExportHandlers()
+client_action_handlers = ClientActionHandlers()
+actions.register(index)
+index.register(router)
@@ -0,0 +1,191 @@
+import asyncio
+import csv
+import io
+import logging
+import time
+from typing import Awaitable, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from utils import PhoneUtils, TextUtils
+
+logger = logging.getLogger(__name__)
+
+# Заголовки столбцов CSV, по которым ищем имя и телефон
+NAME_HEADERS = ('name', 'full name', 'fn', 'имя', 'фио', 'клиент', 'контакт')
+PHONE_HEADERS = ('phone', 'tel', 'mobile', 'телефон', 'тел', 'мобильный', 'номер')
+
+
+def open_text(binary: IO[bytes]) -> io.TextIOWrapper:
+    """Открыть загруженный файл как текст (UTF-8 или выгрузка Excel в cp1251)"""
+    head = binary.read(65536)
+    binary.seek(0)
+    encoding = 'utf-8-sig'
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Ошибка в последних байтах — просто обрезанный многобайтовый символ
+        if e.start < len(head) - 3:
+            encoding = 'cp1251'
+    return io.TextIOWrapper(binary, encoding=encoding, errors='replace', newline='')
+
+
+def _find_column(header: List[str], candidates: Tuple[str, ...]) -> Optional[int]:
+    for i, title in enumerate(header):
+        title = title.strip().lower()
+        if any(title == c or title.startswith(c) for c in candidates):
+            return i
+    return None
+
+
+def iter_csv_contacts(stream: IO[str]) -> Iterator[Tuple[str, str]]:
+    """Построчно читать контакты (имя, телефон) из CSV.
+
+    Разделитель (запятая, точка с запятой, табуляция) определяется по началу
+    файла; столбцы — по заголовку, а без заголовка берутся первые два.
+    """
+    sample = stream.read(8192)
+    stream.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(stream, dialect)
+    first = next(reader, None)
+    if first is None:
+        return
+
+    name_col = _find_column(first, NAME_HEADERS)
+    phone_col = _find_column(first, PHONE_HEADERS)
+    if name_col is None and phone_col is None:
+        # Заголовка нет: первая строка — уже данные
+        name_col, phone_col = 0, 1
+        rows = _chain_first(first, reader)
+    else:
+        name_col = 0 if name_col is None else name_col
+        phone_col = 1 if phone_col is None else phone_col
+        rows = reader
+
+    width = max(name_col, phone_col)
+    for row in rows:
+        if len(row) > width:
+            yield row[name_col], row[phone_col]
+
+
+def _chain_first(first: List[str], rest: Iterable[List[str]]) -> Iterator[List[str]]:
+    yield first
+    yield from rest
+
+
+def iter_vcard_contacts(stream: IO[str]) -> Iterator[Tuple[str, str]]:
+    """Построчно читать контакты (имя, телефон) из vCard (.vcf).
+
+    Для карточки с несколькими TEL возвращается по контакту на каждый номер.
+    """
+    name = None
+    phones: List[str] = []
+    for line in _unfold(stream):
+        key, _, value = line.partition(':')
+        key = key.split(';', 1)[0].upper()
+        # Группированные свойства: item1.TEL
+        key = key.rsplit('.', 1)[-1]
+
+        if key == 'BEGIN':
+            name, phones = None, []
+        elif key == 'FN':
+            name = value.strip()
+        elif key == 'N' and not name:
+            parts = [p.strip() for p in value.split(';')]
+            name = ' '.join(p for p in (parts[1:2] + parts[:1]) if p)
+        elif key == 'TEL':
+            phones.append(value.strip())
+        elif key == 'END':
+            for phone in phones:
+                yield name or '', phone
+            name, phones = None, []
+
+
+def _unfold(stream: IO[str]) -> Iterator[str]:
+    """Склеить строки vCard, перенесённые с отступом (RFC 6350, 3.2)"""
+    current = None
+    for raw in stream:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+class ImportStats:
+    """Итоги импорта"""
+
+    def __init__(self):
+        self.total = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+
+class ClientImporter:
+    """Потоковый импорт клиентов с пакетной вставкой.
+
+    Контакты читаются лениво, телефоны нормализуются через PhoneUtils,
+    повторы внутри пачки отбрасываются сразу, а с уже существующими
+    клиентами — ограничением UNIQUE(manager_id, phone) при вставке.
+    Разбор пачки выполняется в потоке, чтобы не блокировать event loop.
+    """
+
+    def __init__(self, db, batch_size: int = 5000, progress_interval: float = 2.0):
+        self.db = db
+        self.batch_size = batch_size
+        self.progress_interval = progress_interval
+
+    def _batches(self, contacts: Iterable[Tuple[str, str]], stats: ImportStats) -> Iterator[List[tuple]]:
+        batch: Dict[str, str] = {}
+        for raw_name, raw_phone in contacts:
+            stats.total += 1
+            phone = PhoneUtils.standardize_phone(raw_phone)
+            if not phone:
+                stats.invalid += 1
+                continue
+            if phone in batch:
+                stats.duplicates += 1
+                continue
+            batch[phone] = TextUtils.normalize_name(raw_name) or PhoneUtils.format_phone_display(phone)
+            if len(batch) >= self.batch_size:
+                yield [(name, phone) for phone, name in batch.items()]
+                batch = {}
+        if batch:
+            yield [(name, phone) for phone, name in batch.items()]
+
+    async def run(self, manager_id: int, contacts: Iterable[Tuple[str, str]],
+                  on_progress: Callable[[ImportStats], Awaitable[None]] = None) -> ImportStats:
+        """Импортировать контакты; on_progress вызывается не чаще progress_interval"""
+        stats = ImportStats()
+        batches = self._batches(contacts, stats)
+        last_progress = time.monotonic()
+
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+
+            inserted = await self.db.bulk_insert_clients(manager_id, batch)
+            stats.imported += inserted
+            stats.duplicates += len(batch) - inserted
+
+            if on_progress and time.monotonic() - last_progress >= self.progress_interval:
+                last_progress = time.monotonic()
+                try:
+                    await on_progress(stats)
+                except Exception as e:
+                    logger.warning(f"Не удалось обновить прогресс импорта: {e}")
+
+        logger.info(
+            f"✅ Импорт для менеджера ID {manager_id}: всего {stats.total}, "
+            f"добавлено {stats.imported}, повторов {stats.duplicates}, ошибок {stats.invalid}"
+        )
+        return stats
@@ -1,10 +1,25 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+from callbacks import (
+    CLIENTS_NEXT, CLIENTS_PREV, CLIENT_CARD, CLIENT_SEND_CARD, CLIENT_DELETE, CLIENT_DELETE_CONFIRM,
+    CLIENT_ADD_NOTE, CLIENT_ADD_REMINDER, CLIENT_EDIT
+)
 
 class Keyboards:
-    """Клавиатуры для бота"""
+    """Клавиатуры для бота.
+    
+    Разметка клавиатур в aiogram — неизменяемые (frozen) модели, поэтому
+    статические клавиатуры строятся один раз при первом обращении и затем
+    общие для всех обработчиков. Клавиатуры с параметрами кэшируются по
+    значениям параметров; у списка клиентов заново собирается только строка
+    листания, остальные кнопки общие.
+    """
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def remove_keyboard():
         """Удалить клавиатуру - ПРАВИЛЬНО для aiogram 3.0"""
         return ReplyKeyboardMarkup(
@@ -15,6 +30,7 @@ class Keyboards:
         )
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_phone_keyboard():
         """Клавиатура для получения номера телефона"""
         builder = ReplyKeyboardBuilder()
@@ -29,6 +45,7 @@ class Keyboards:
         )
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_industry_keyboard():
         """Клавиатура для выбора сферы деятельности"""
         builder = InlineKeyboardBuilder()
@@ -43,6 +60,7 @@ class Keyboards:
         return builder.as_markup()
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_terms_keyboard():
         """Клавиатура для принятия правил"""
         builder = InlineKeyboardBuilder()
@@ -56,6 +74,7 @@ class Keyboards:
         return builder.as_markup()
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_main_menu():
         """Главное меню"""
         builder = InlineKeyboardBuilder()
@@ -71,16 +90,88 @@ class Keyboards:
         return builder.as_markup()
     
     @staticmethod
-    def get_client_actions():
+    def get_clients_menu(page: int = 1, prev_id: Optional[int] = None, next_id: Optional[int] = None,
+                         client_buttons: Sequence[Tuple[int, int]] = ()):
+        """Меню списка клиентов.
+        
+        prev_id/next_id — id первого/последнего клиента на странице, если
+        есть предыдущая/следующая страница (курсор keyset-пагинации).
+        client_buttons — пары (номер в списке, id клиента) для кнопок,
+        открывающих карточку клиента.
+        """
+        rows = []
+        for start in range(0, len(client_buttons), 5):
+            rows.append([
+                InlineKeyboardButton(text=str(number), callback_data=CLIENT_CARD.pack(client_id))
+                for number, client_id in client_buttons[start:start + 5]
+            ])
+        
+        navigation = []
+        if prev_id is not None:
+            navigation.append(
+                InlineKeyboardButton(text="⬅️", callback_data=CLIENTS_PREV.pack(prev_id, page - 1))
+            )
+        if next_id is not None:
+            navigation.append(
+                InlineKeyboardButton(text="➡️", callback_data=CLIENTS_NEXT.pack(next_id, page + 1))
+            )
+        if navigation:
+            rows.append(navigation)
+        
+        static_menu = Keyboards._get_clients_menu_static()
+        if not rows:
+            return static_menu
+        return InlineKeyboardMarkup(inline_keyboard=[*rows, *static_menu.inline_keyboard])
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_clients_menu_static():
+        """Постоянная часть меню списка клиентов"""
+        builder = InlineKeyboardBuilder()
+        
+        builder.add(
+            InlineKeyboardButton(text="🔍 Поиск", callback_data="clients_search"),
+            InlineKeyboardButton(text="📥 Импорт контактов", callback_data="clients_import"),
+            InlineKeyboardButton(text="📤 Выгрузка", callback_data="clients_export"),
+            InlineKeyboardButton(text="↩️ Назад", callback_data="main_menu")
+        )
+        
+        builder.adjust(1, 2, 1)
+        return builder.as_markup()
+    
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def get_export_menu(with_xlsx: bool = True):
+        """Выбор формата выгрузки"""
+        builder = InlineKeyboardBuilder()
+        
+        builder.add(
+            InlineKeyboardButton(text="📄 Клиенты (CSV)", callback_data="export_clients_csv"),
+            InlineKeyboardButton(text="⏰ Напоминания (CSV)", callback_data="export_reminders_csv")
+        )
+        if with_xlsx:
+            builder.add(
+                InlineKeyboardButton(text="📊 Всё в Excel", callback_data="export_all_xlsx")
+            )
+        builder.add(
+            InlineKeyboardButton(text="↩️ Назад", callback_data="menu_clients")
+        )
+        
+        builder.adjust(1)
+        return builder.as_markup()
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def get_client_actions(client_id: int):
         """Действия с клиентом"""
         builder = InlineKeyboardBuilder()
         
         builder.add(
-            InlineKeyboardButton(text="📝 Добавить заметку", callback_data="client_add_note"),
-            InlineKeyboardButton(text="🔔 Создать напоминание", callback_data="client_add_reminder"),
-            InlineKeyboardButton(text="📨 Отправить сообщение", callback_data="client_send_message"),
-            InlineKeyboardButton(text="✏️ Редактировать данные", callback_data="client_edit"),
-            InlineKeyboardButton(text="🗑️ Удалить клиента", callback_data="client_delete"),
+            InlineKeyboardButton(text="📝 Добавить заметку", callback_data=CLIENT_ADD_NOTE.pack(client_id)),
+            InlineKeyboardButton(text="🔔 Создать напоминание", callback_data=CLIENT_ADD_REMINDER.pack(client_id)),
+            InlineKeyboardButton(text="📨 Отправить визитку", callback_data=CLIENT_SEND_CARD.pack(client_id)),
+            InlineKeyboardButton(text="✏️ Редактировать данные", callback_data=CLIENT_EDIT.pack(client_id)),
+            InlineKeyboardButton(text="🗑️ Удалить клиента", callback_data=CLIENT_DELETE.pack(client_id)),
             InlineKeyboardButton(text="↩️ Назад к списку", callback_data="menu_clients")
         )
         
@@ -88,14 +179,15 @@ class Keyboards:
         return builder.as_markup()
     
     @staticmethod
-    def get_new_client_actions():
+    @lru_cache(maxsize=256)
+    def get_new_client_actions(client_id: int):
         """Действия для нового клиента"""
         builder = InlineKeyboardBuilder()
         
         builder.add(
-            InlineKeyboardButton(text="✅ Да, отправить визитку", callback_data="new_client_send_card"),
-            InlineKeyboardButton(text="📝 Нет, добавить заметку", callback_data="client_add_note"),
-            InlineKeyboardButton(text="🔔 Создать напоминание", callback_data="client_add_reminder"),
+            InlineKeyboardButton(text="✅ Да, отправить визитку", callback_data=CLIENT_SEND_CARD.pack(client_id)),
+            InlineKeyboardButton(text="📝 Нет, добавить заметку", callback_data=CLIENT_ADD_NOTE.pack(client_id)),
+            InlineKeyboardButton(text="🔔 Создать напоминание", callback_data=CLIENT_ADD_REMINDER.pack(client_id)),
             InlineKeyboardButton(text="↩️ Пропустить", callback_data="menu_clients")
         )
         
@@ -103,6 +195,21 @@ class Keyboards:
         return builder.as_markup()
     
     @staticmethod
+    @lru_cache(maxsize=256)
+    def get_delete_confirm(client_id: int):
+        """Подтверждение удаления клиента"""
+        builder = InlineKeyboardBuilder()
+        
+        builder.add(
+            InlineKeyboardButton(text="🗑️ Да, удалить", callback_data=CLIENT_DELETE_CONFIRM.pack(client_id)),
+            InlineKeyboardButton(text="↩️ Отмена", callback_data=CLIENT_CARD.pack(client_id))
+        )
+        
+        builder.adjust(2)
+        return builder.as_markup()
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
     def get_back_button(callback_data: str = "main_menu"):
         """Кнопка Назад"""
         builder = InlineKeyboardBuilder()
@@ -110,15 +217,15 @@ class Keyboards:
         return builder.as_markup()
     
     @staticmethod
-    def get_business_card_actions():
+    @lru_cache(maxsize=256)
+    def get_business_card_actions(client_id: int):
         """Действия с визиткой"""
         builder = InlineKeyboardBuilder()
         
         builder.add(
-            InlineKeyboardButton(text="📋 Копировать текст визитки", callback_data="card_copy"),
-            InlineKeyboardButton(text="👤 Вернуться к карточке клиента", callback_data="client_card"),
+            InlineKeyboardButton(text="👤 Вернуться к карточке клиента", callback_data=CLIENT_CARD.pack(client_id)),
             InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")
         )
         
-        builder.adjust(1, 2)
+        builder.adjust(1, 1)
         return builder.as_markup()
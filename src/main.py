@@ -23,16 +23,12 @@ async def main():
     try:
         # Импортируем aiogram
         from aiogram import Bot, Dispatcher
-        from aiogram.fsm.storage.memory import MemoryStorage
         logger.info("✅ aiogram импортирован")
         
         # Импортируем наши модули
         from config import Config
         logger.info("✅ config импортирован")
         
-        from handlers import router
-        logger.info("✅ handlers импортирован")
-        
         # Импортируем init_database - ВАЖНО: из папки database
         # Добавляем путь к папке database
         database_path = os.path.join(os.path.dirname(__file__), '..', 'database')
@@ -67,14 +63,15 @@ async def main():
             logger.error("   - DB_PATH (/app/data/sales_assistant.db)")
             return
         
-        # Инициализируем базу данных
-        logger.info(f"🗄️  Инициализация базы данных: {Config.DB_PATH}")
-        try:
-            init_database(Config.DB_PATH)
-            logger.info("✅ База данных инициализирована")
-        except Exception as e:
-            logger.error(f"❌ Ошибка инициализации БД: {e}")
-            return
+        # Инициализируем базу данных (в процессах-обработчиках это уже сделал супервизор)
+        if Config.SHARD_INDEX < 0:
+            logger.info(f"🗄️  Инициализация базы данных: {Config.DB_PATH}")
+            try:
+                init_database(Config.DB_PATH)
+                logger.info("✅ База данных инициализирована")
+            except Exception as e:
+                logger.error(f"❌ Ошибка инициализации БД: {e}")
+                return
         
         # Создаем бота
         logger.info("🤖 Создание экземпляра бота...")
@@ -85,19 +82,82 @@ async def main():
             logger.error(f"❌ Ошибка создания бота: {e}")
             return
         
+        # Несколько процессов: этот принимает апдейты и раздаёт их шардам по telegram_id
+        if Config.WORKERS > 1 and Config.SHARD_INDEX < 0:
+            from sharding import run_supervisor
+            logger.info(f"🧩 Режим супервизора: {Config.WORKERS} процессов-обработчиков")
+            try:
+                await run_supervisor(bot, Config.WORKERS, Config.SHARD_SHUTDOWN_TIMEOUT)
+            finally:
+                await bot.session.close()
+            return
+        
+        from handlers import router, db, message_tracker, message_deleter, outbound, send_reminder, metrics
+        logger.info("✅ handlers импортирован")
+        
+        from fsm_storage import SQLiteStorage
+        from reminders import ReminderScheduler
+        
         # Настраиваем диспетчер
         logger.info("⚙️  Настройка диспетчера...")
-        storage = MemoryStorage()
+        storage = SQLiteStorage(
+            db,
+            flush_interval=Config.FSM_FLUSH_INTERVAL,
+            state_ttl=Config.FSM_STATE_TTL,
+            cache_ttl=Config.FSM_CACHE_TTL,
+            cache_size=Config.FSM_CACHE_SIZE
+        )
         dp = Dispatcher(storage=storage)
         dp.include_router(router)
+        if Config.METRICS_ENABLED:
+            metrics.setup(dp, bot)
+            metrics.start(Config.METRICS_LOG_INTERVAL)
         
         # Запускаем бота
+        if Config.SHARD_INDEX >= 0:
+            logger.info(f"🧩 Шард {Config.SHARD_INDEX} из {Config.SHARD_COUNT}")
         logger.info("=" * 60)
         logger.info("🎉 БОТ УСПЕШНО ЗАПУЩЕН!")
         logger.info("📱 Отправьте /start в Telegram вашему боту")
         logger.info("=" * 60)
         
-        await dp.start_polling(bot)
+        # Загружаем ID последних сообщений бота и запускаем их периодический сброс
+        await message_tracker.load()
+        message_tracker.start()
+        
+        # Запускаем планировщик: невыполненные напоминания он загрузит в фоне.
+        # При нескольких процессах у каждого шарда свой — только для его менеджеров,
+        # чтобы последнее сообщение пользователя отслеживал один процесс. Без шардов
+        # (несколько webhook-процессов) каждое напоминание забирает и отправляет один из них
+        reminder_scheduler = ReminderScheduler(
+            db,
+            notify=lambda reminder: send_reminder(bot, reminder),
+            batch_size=Config.REMINDER_BATCH_SIZE,
+            poll_interval=Config.REMINDER_POLL_INTERVAL,
+            shards=Config.SHARD_COUNT if Config.SHARD_INDEX >= 0 else 1,
+            shard_index=max(Config.SHARD_INDEX, 0)
+        )
+        reminder_scheduler.start()
+        
+        try:
+            if Config.SHARD_INDEX >= 0:
+                from sharding import ShardWorker
+                await ShardWorker(dp, bot, max_concurrency=Config.SHARD_MAX_CONCURRENCY).run()
+            elif Config.RUN_MODE == 'webhook':
+                from webhook import run_webhook
+                await run_webhook(bot, dp, metrics if Config.METRICS_ENABLED else None)
+            else:
+                await dp.start_polling(bot)
+        finally:
+            # Останавливаем планировщик, дожидаемся фоновых удалений,
+            # сохраняем ID сообщений и состояния и закрываем БД
+            await reminder_scheduler.stop()
+            await metrics.stop()
+            await message_deleter.drain()
+            await message_tracker.stop()
+            await storage.close()
+            db.close()
+            logger.info(f"📊 Очередь Bot API: {outbound.stats()}")
         
     except Exception as e:
         logger.error(f"💥 Критическая ошибка: {e}", exc_info=True)
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from typing import Set
+
+from aiogram.exceptions import TelegramRetryAfter, TelegramNetworkError, TelegramServerError
+
+logger = logging.getLogger(__name__)
+
+
+class MessageDeleter:
+    """Фоновое удаление старых сообщений бота.
+
+    Новое сообщение отправляется сразу, а предыдущее удаляется в фоне:
+    не более `max_concurrency` удалений одновременно, с повтором при
+    TelegramRetryAfter и экспоненциальной паузой при сетевых ошибках.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_retries: int = 3, base_delay: float = 0.5):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, bot, chat_id: int, message_id: int):
+        """Поставить сообщение в очередь на удаление"""
+        task = asyncio.create_task(self._delete(bot, chat_id, message_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _delete(self, bot, chat_id: int, message_id: int) -> bool:
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await bot.delete_message(chat_id, message_id)
+                    return True
+                except TelegramRetryAfter as e:
+                    delay = e.retry_after
+                except (TelegramNetworkError, TelegramServerError):
+                    delay = self.base_delay * 2 ** attempt
+                except Exception as e:
+                    # Сообщение уже удалено пользователем или слишком старое
+                    logger.warning(f"Не удалось удалить сообщение {message_id}: {e}")
+                    return False
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(delay)
+
+        logger.warning(f"Не удалось удалить сообщение {message_id}: исчерпаны попытки")
+        return False
+
+    async def drain(self):
+        """Дождаться завершения всех запланированных удалений"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
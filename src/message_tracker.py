@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from typing import Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class LastMessageTracker:
+    """ID последних сообщений бота в памяти с отложенной записью в БД.
+
+    Во время работы источником истины является словарь в памяти. Изменения
+    копятся и сбрасываются в таблицу bot_messages одной транзакцией раз в
+    `flush_interval` секунд и при остановке бота; при запуске словарь
+    загружается из таблицы.
+    """
+
+    def __init__(self, db, flush_interval: float = 5.0):
+        self.db = db
+        self.flush_interval = flush_interval
+        self._messages: Dict[int, int] = {}
+        self._dirty: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self):
+        """Загрузить сохранённые ID сообщений из БД"""
+        self._messages = await self.db.get_all_last_bot_messages()
+        logger.info(f"✅ Загружено ID последних сообщений: {len(self._messages)}")
+
+    def get(self, telegram_id: int) -> Optional[int]:
+        """ID последнего сообщения бота в чате"""
+        return self._messages.get(telegram_id)
+
+    def set(self, telegram_id: int, message_id: int):
+        """Запомнить ID последнего сообщения бота (запись в БД — при сбросе)"""
+        self._messages[telegram_id] = message_id
+        self._dirty[telegram_id] = message_id
+
+    async def flush(self):
+        """Записать накопленные изменения в БД одной транзакцией"""
+        if not self._dirty:
+            return
+
+        pending, self._dirty = self._dirty, {}
+        try:
+            await self.db.save_last_bot_messages(list(pending.items()))
+        except Exception as e:
+            # Возвращаем неудачную пачку, не затирая более свежие значения
+            for telegram_id, message_id in pending.items():
+                self._dirty.setdefault(telegram_id, message_id)
+            logger.error(f"❌ Не удалось сохранить ID сообщений бота: {e}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Запустить периодический сброс в БД"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Остановить периодический сброс и записать остаток"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
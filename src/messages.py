@@ -33,6 +33,12 @@ class Messages:
 
 *Введите текст:*'''
     
+    # Названия сфер по коду из кнопок выбора (industry_<код>)
+    INDUSTRY_LABELS = {
+        "auto": "Автосалон",
+        "real_estate": "Недвижимость"
+    }
+    
     STEP_3_PHONE = '''📝 *Шаг 3 из 4*
 
 *Подтверждение номера телефона*
@@ -102,6 +108,89 @@ class Messages:
 
 👇 *Действия:*'''
     
+    CLIENT_NOT_FOUND = '''⚠️ Клиент не найден — возможно, он уже удалён.'''
+    
+    CLIENT_DELETE_CONFIRM = '''🗑️ *Удалить клиента?*
+
+👤 {name}
+📱 {phone}
+
+Напоминания по клиенту сохранятся.'''
+    
+    CLIENT_DELETED = '''🗑️ Клиент "{name}" удалён.'''
+    
+    TEMPLATE_MISSING = '''⚠️ У вас нет активных шаблонов для визитки.'''
+    
+    BUTTON_EXPIRED = '''⚠️ Эта кнопка устарела. Откройте меню заново.'''
+    
+    IN_DEVELOPMENT = '''⚡ Эта функция находится в разработке.'''
+    
+    # Поиск клиентов
+    SEARCH_PROMPT = '''🔍 *Поиск клиентов*
+
+Введите имя, часть имени или последние цифры номера.'''
+    
+    SEARCH_RESULTS = '''🔍 *Найденные клиенты*
+
+{clients}'''
+    
+    SEARCH_EMPTY = '''🔍 *Поиск клиентов*
+
+Никого не нашлось. Попробуйте другой запрос.'''
+    
+    # Импорт клиентов
+    IMPORT_INSTRUCTIONS = '''📥 *Импорт контактов*
+
+Отправьте файл с контактами:
+• *CSV* — столбцы «Имя» и «Телефон» (разделитель — запятая или точка с запятой)
+• *vCard (.vcf)* — экспорт из телефонной книги или другой CRM
+
+Номера, которые уже есть в вашей базе, будут пропущены.'''
+    
+    IMPORT_BAD_FILE = '''⚠️ *Не удалось принять файл*
+
+Поддерживаются файлы *.csv* и *.vcf* размером до {max_size} МБ.'''
+    
+    IMPORT_STARTED = '''⏳ *Импорт контактов...*'''
+    
+    IMPORT_PROGRESS = '''⏳ *Импорт контактов...*
+
+Обработано строк: {total}
+Добавлено: {imported}'''
+    
+    IMPORT_DONE = '''✅ *Импорт завершён*
+
+Обработано строк: {total}
+➕ Добавлено клиентов: {imported}
+🔁 Уже были в базе: {duplicates}
+⚠️ Неверный номер: {invalid}'''
+    
+    # Выгрузка клиентов
+    EXPORT_MENU = '''📤 *Выгрузка данных*
+
+Выберите, что выгрузить. Файл придёт отдельным сообщением.'''
+    
+    EXPORT_STARTED = '''⏳ *Готовим выгрузку...*'''
+    
+    EXPORT_DONE = '''✅ Выгружено строк: {rows}'''
+    
+    EXPORT_XLSX_UNAVAILABLE = '''⚠️ Выгрузка в Excel сейчас недоступна, воспользуйтесь CSV.'''
+    
+    # Напоминания
+    REMINDER_NOTIFICATION = '''🔔 *Напоминание*
+
+{text}
+
+👤 *Клиент:* {client}'''
+    
+    REMINDERS_EMPTY = '''🔔 *Мои напоминания*
+
+У вас нет запланированных напоминаний.'''
+    
+    REMINDERS_LIST = '''🔔 *Мои напоминания* (ближайшие)
+
+{reminders}'''
+    
     # Ошибки
     INVALID_PHONE = '''❌ *Неверный формат номера*
 
@@ -0,0 +1,262 @@
+import asyncio
+import bisect
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин: время (секунды) и число вызовов за апдейт
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+
+# Имя обработчика для апдейтов, которые никто не обработал
+UNHANDLED = 'unhandled'
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как histogram в Prometheus)"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Последняя корзина — значения больше всех границ (+Inf)
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля: верхняя граница корзины, в которую он попал"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class _UpdateStats:
+    """Обращения к БД и Bot API за время обработки одного апдейта"""
+
+    __slots__ = ('handler', 'db_calls', 'api_calls')
+
+    def __init__(self):
+        self.handler = UNHANDLED
+        self.db_calls = 0
+        self.api_calls = 0
+
+
+_current_update: ContextVar[Optional[_UpdateStats]] = ContextVar('current_update', default=None)
+
+
+class Metrics:
+    """Метрики обработки апдейтов в памяти процесса.
+
+    На каждый обработчик копятся гистограммы времени обработки апдейта и
+    числа обращений к Database и Bot API за апдейт, на каждый метод Database
+    и Bot API — гистограммы времени вызова. Апдейт, его обработчик и вызовы
+    связываются через contextvar, который выставляет UpdateMetricsMiddleware.
+    Метрики отдаются в текстовом формате Prometheus (`render`) или
+    периодически пишутся в лог сводкой по обработчикам (`start`).
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Tuple[str, str]], Histogram] = {}
+        self._errors: Dict[Tuple[str, Tuple[str, str]], int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.started_at = time.time()
+
+    def _observe(self, name: str, label: Tuple[str, str], value: float, bounds=TIME_BUCKETS):
+        key = (name, label)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(bounds)
+        histogram.observe(value)
+
+    def _error(self, name: str, label: Tuple[str, str]):
+        key = (name, label)
+        self._errors[key] = self._errors.get(key, 0) + 1
+
+    # ========== Сбор ==========
+
+    def observe_update(self, stats: _UpdateStats, seconds: float, failed: bool):
+        label = ('handler', stats.handler)
+        self._observe('bot_update_seconds', label, seconds)
+        self._observe('bot_update_db_calls', label, stats.db_calls, COUNT_BUCKETS)
+        self._observe('bot_update_api_calls', label, stats.api_calls, COUNT_BUCKETS)
+        if failed:
+            self._error('bot_update_errors_total', label)
+
+    def observe_db(self, method: str, seconds: float, failed: bool = False):
+        """Вызов метода Database (вызывается из AsyncDatabase)"""
+        stats = _current_update.get()
+        if stats is not None:
+            stats.db_calls += 1
+        label = ('method', method)
+        self._observe('bot_db_call_seconds', label, seconds)
+        if failed:
+            self._error('bot_db_errors_total', label)
+
+    def observe_api(self, method: str, seconds: float, failed: bool = False):
+        """Запрос к Bot API (вызывается из RequestMetricsMiddleware)"""
+        stats = _current_update.get()
+        if stats is not None:
+            stats.api_calls += 1
+        label = ('method', method)
+        self._observe('bot_api_call_seconds', label, seconds)
+        if failed:
+            self._error('bot_api_errors_total', label)
+
+    def setup(self, dispatcher, bot):
+        """Подключить сбор метрик к диспетчеру и сессии бота"""
+        dispatcher.update.outer_middleware(UpdateMetricsMiddleware(self))
+        # Внутренние middleware диспетчера применяются и к вложенным роутерам
+        handler_middleware = HandlerNameMiddleware()
+        for observer in dispatcher.observers.values():
+            if observer.event_name != 'update':
+                observer.middleware(handler_middleware)
+        bot.session.middleware(RequestMetricsMiddleware(self))
+
+    # ========== Вывод ==========
+
+    def render(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+        by_name: Dict[str, list] = {}
+        for (name, label), histogram in sorted(self._histograms.items()):
+            by_name.setdefault(name, []).append((label, histogram))
+
+        for name, items in by_name.items():
+            lines.append(f"# TYPE {name} histogram")
+            for (label_name, label_value), histogram in items:
+                label = f'{label_name}="{label_value}"'
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{{label}}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{{label}}} {histogram.count}')
+
+        names = sorted({name for name, _ in self._errors})
+        for name in names:
+            lines.append(f"# TYPE {name} counter")
+            for (error_name, (label_name, label_value)), count in sorted(self._errors.items()):
+                if error_name == name:
+                    lines.append(f'{name}{{{label_name}="{label_value}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Сводка по обработчикам для лога: число апдейтов, время, обращения к БД и API"""
+        rows = []
+        for (name, (_, handler)), histogram in sorted(self._histograms.items()):
+            if name != 'bot_update_seconds':
+                continue
+            db_calls = self._histograms[('bot_update_db_calls', ('handler', handler))]
+            api_calls = self._histograms[('bot_update_api_calls', ('handler', handler))]
+            errors = self._errors.get(('bot_update_errors_total', ('handler', handler)), 0)
+            rows.append(
+                f"   • {handler}: {histogram.count} апд., "
+                f"ср. {histogram.mean * 1000:.1f} мс, p95 ≤ {histogram.quantile(0.95) * 1000:g} мс, "
+                f"БД {db_calls.mean:.1f}/апд., API {api_calls.mean:.1f}/апд."
+                + (f", ошибок {errors}" if errors else "")
+            )
+        if not rows:
+            return "📈 Метрики: апдейтов пока не было"
+        return "📈 Метрики обработчиков:\n" + "\n".join(rows)
+
+    async def _log_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            logger.info(self.summary())
+
+    def start(self, interval: float):
+        """Периодически писать сводку в лог"""
+        if self._task is None and interval > 0:
+            self._task = asyncio.create_task(self._log_loop(interval))
+
+    async def stop(self):
+        """Остановить периодический вывод и записать итоговую сводку"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info(self.summary())
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Внешний middleware апдейта: время обработки и вызовы за апдейт.
+
+    Стоит снаружи FSM-middleware, поэтому чтение состояния из БД тоже
+    относится к апдейту.
+    """
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+                       event: Any, data: Dict[str, Any]) -> Any:
+        stats = _UpdateStats()
+        token = _current_update.set(stats)
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.metrics.observe_update(stats, time.perf_counter() - started, failed)
+            _current_update.reset(token)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Внутренний middleware: запоминает, какой обработчик выбран для апдейта"""
+
+    async def __call__(self, handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+                       event: Any, data: Dict[str, Any]) -> Any:
+        stats = _current_update.get()
+        handler_object = data.get('handler')
+        if stats is not None and handler_object is not None:
+            # За индексом маршрутов (routing.py) стоит один обработчик — берём найденный маршрут
+            route = data.get('route', handler_object.callback)
+            stats.handler = getattr(route, '__name__', type(route).__name__)
+        return await handler(event, data)
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время и число запросов к Bot API"""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, make_request, bot, method):
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.metrics.observe_api(method.__api_method__, time.perf_counter() - started, failed)
@@ -0,0 +1,161 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def due_timestamp(due_date: str) -> float:
+    """'YYYY-MM-DD HH:MM:SS' (UTC, как CURRENT_TIMESTAMP в SQLite) -> unix time"""
+    dt = datetime.fromisoformat(due_date)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class ReminderScheduler:
+    """Планировщик напоминаний на основе кучи по времени срабатывания.
+
+    При запуске невыполненные напоминания загружаются в кучу (id, due_date)
+    порциями по первичному ключу. Планировщик спит ровно до ближайшего
+    срока (или до добавления более раннего напоминания), отправляет
+    наступившие напоминания пачками. Перед отправкой пачка отмечается
+    выполненной условным UPDATE (`AND is_done = FALSE`), и отправляются
+    только напоминания, которые отметил этот планировщик: если одни и те же
+    напоминания загрузили несколько процессов (например, несколько
+    webhook-процессов за балансировщиком), каждое уйдёт один раз. Новые напоминания попадают в кучу через `add()`, а созданные
+    другими процессами подхватываются опросом `id > последнего известного`.
+
+    При нескольких процессах-обработчиках у каждого свой планировщик:
+    `shards`/`shard_index` ограничивают его напоминаниями менеджеров своего
+    шарда, чтобы сообщения пользователю отправлял только процесс-владелец.
+    """
+
+    def __init__(self, db, notify: Callable[[Dict], Awaitable[None]], batch_size: int = 100,
+                 poll_interval: float = 60.0, load_chunk_size: int = 10000,
+                 retry_delay: float = 30.0, shards: int = 1, shard_index: int = 0):
+        self.db = db
+        self.notify = notify
+        self.shards = shards
+        self.shard_index = shard_index
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.load_chunk_size = load_chunk_size
+        self.retry_delay = retry_delay
+
+        self._heap: List[tuple] = []
+        self._last_seen_id = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.dispatched = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, reminder_id: int, due_date: str):
+        """Добавить напоминание в расписание"""
+        due_at = due_timestamp(due_date)
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (due_at, reminder_id))
+        # Будим цикл, только если новое напоминание раньше ближайшего
+        if earliest is None or due_at < earliest:
+            self._wakeup.set()
+
+    async def poll_new(self) -> int:
+        """Подхватить напоминания, появившиеся в БД после последней загрузки"""
+        loaded = 0
+        while True:
+            keys = await self.db.get_pending_reminder_keys(
+                self._last_seen_id, self.load_chunk_size, self.shards, self.shard_index
+            )
+            for reminder_id, due_date in keys:
+                self.add(reminder_id, due_date)
+            loaded += len(keys)
+            if keys:
+                self._last_seen_id = keys[-1][0]
+            if len(keys) < self.load_chunk_size:
+                return loaded
+
+    async def load(self):
+        """Загрузить все невыполненные напоминания"""
+        started = time.perf_counter()
+        loaded = await self.poll_new()
+        logger.info(f"✅ Загружено напоминаний: {loaded} за {time.perf_counter() - started:.2f} с")
+
+    def _pop_due(self, now: float) -> List[int]:
+        ids = []
+        while self._heap and self._heap[0][0] <= now and len(ids) < self.batch_size:
+            ids.append(heapq.heappop(self._heap)[1])
+        return ids
+
+    async def _dispatch(self, reminder_ids: List[int]):
+        reminders = await self.db.get_reminders_for_dispatch(list(dict.fromkeys(reminder_ids)))
+        if not reminders:
+            return
+
+        # Забираем до отправки: повторная отправка при каждом рестарте или
+        # из соседнего процесса хуже пропуска
+        claimed = set(await self.db.claim_reminders([reminder['id'] for reminder in reminders]))
+        reminders = [reminder for reminder in reminders if reminder['id'] in claimed]
+
+        results = await asyncio.gather(
+            *(self.notify(reminder) for reminder in reminders),
+            return_exceptions=True
+        )
+        for reminder, result in zip(reminders, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Не удалось отправить напоминание {reminder['id']}: {result}")
+        self.dispatched += len(reminders)
+
+    async def run(self):
+        """Основной цикл планировщика (сначала загружает напоминания из БД)"""
+        await self.load()
+        next_poll = time.monotonic() + self.poll_interval
+        while True:
+            now = time.time()
+            due_ids = self._pop_due(now)
+            if due_ids:
+                try:
+                    await self._dispatch(due_ids)
+                except Exception as e:
+                    logger.error(f"❌ Ошибка отправки напоминаний: {e}", exc_info=True)
+                    # Повторим попытку чуть позже
+                    for reminder_id in due_ids:
+                        heapq.heappush(self._heap, (now + self.retry_delay, reminder_id))
+                continue
+
+            if time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + self.poll_interval
+                try:
+                    await self.poll_new()
+                except Exception as e:
+                    logger.error(f"❌ Ошибка опроса напоминаний: {e}")
+                continue
+
+            timeout = next_poll - time.monotonic()
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - now)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Запустить планировщик в фоне (загрузка не задерживает старт бота)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Остановить планировщик"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
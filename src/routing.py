@@ -0,0 +1,164 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.filters import BaseFilter
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery, Message
+
+logger = logging.getLogger(__name__)
+
+Route = Callable[..., Awaitable[Any]]
+
+# Ключ «в любом состоянии», как StateFilter("*")
+ANY_STATE = '*'
+
+
+def _state_key(state: Union[State, str, None]) -> Optional[str]:
+    if isinstance(state, State):
+        return state.state
+    return state
+
+
+def _parse_command(text: str) -> Tuple[str, Optional[str]]:
+    """"/start@bot_name payload" -> ("start", "bot_name")"""
+    command = text[1:].split(maxsplit=1)[0] if len(text) > 1 else ''
+    name, _, mention = command.partition('@')
+    return name, mention or None
+
+
+class _IndexFilter(BaseFilter):
+    """Фильтр единственного обработчика индекса: находит маршрут по словарю"""
+
+    def __init__(self, resolve: Callable[..., Optional[Route]]):
+        self.resolve = resolve
+
+    async def __call__(self, event, raw_state: Optional[str] = None) -> Union[bool, Dict[str, Any]]:
+        route = self.resolve(event, raw_state)
+        if route is None:
+            return False
+        return {'route': route}
+
+
+class _MessageIndexFilter(_IndexFilter):
+    """Фильтр сообщений: для команды с упоминанием (/start@bot_name) узнаёт имя бота"""
+
+    async def __call__(self, message: Message, bot: Bot,
+                       raw_state: Optional[str] = None) -> Union[bool, Dict[str, Any]]:
+        bot_username = None
+        text = message.text
+        if text and text[0] == '/' and _parse_command(text)[1]:
+            bot_username = (await bot.me()).username
+        route = self.resolve(message, raw_state, bot_username)
+        if route is None:
+            return False
+        return {'route': route}
+
+
+async def _call_route(event, state, route: Route):
+    return await route(event, state)
+
+
+class DispatchIndex:
+    """Индекс обработчиков вместо перебора фильтров aiogram.
+
+    aiogram проверяет фильтры обработчиков по очереди, пока какой-нибудь
+    не сработает, поэтому стоимость апдейта растёт с числом обработчиков.
+    Здесь на роутере регистрируется по одному обработчику на тип апдейта,
+    а нужный маршрут ищется в словарях:
+
+    - callback_query — по точному значению callback_data, затем по
+      префиксу (по одной проверке словаря на каждую длину префикса, от
+      длинных к коротким: побеждает самый длинный подходящий префикс);
+    - message — по команде (команда с упоминанием другого бота, как и
+      в фильтре Command, командой не считается), затем по паре (состояние FSM, тип содержимого)
+      с откатом на «любое содержимое» и «любое состояние».
+
+    Маршрут вызывается как `route(event, state)`. Апдейты без маршрута
+    остаются необработанными и идут дальше по роутерам, как раньше.
+    """
+
+    def __init__(self):
+        self._callbacks: Dict[str, Route] = {}
+        self._prefixes: Dict[int, Dict[str, Route]] = {}
+        self._commands: Dict[str, Route] = {}
+        self._messages: Dict[Tuple[Optional[str], Optional[str]], Route] = {}
+
+    @staticmethod
+    def _add(table: dict, key, route: Route):
+        if key in table:
+            raise ValueError(f"Маршрут {key!r} уже занят обработчиком {table[key].__name__}")
+        table[key] = route
+
+    def callback(self, *data: str, prefix: str = None):
+        """Декоратор: обработчик кнопок с callback_data из `data` или начинающихся с `prefix`"""
+        def decorator(route: Route) -> Route:
+            for value in data:
+                self._add(self._callbacks, value, route)
+            if prefix is not None:
+                self._add(self._prefixes.setdefault(len(prefix), {}), prefix, route)
+                # Длинные префиксы проверяются первыми
+                self._prefixes = dict(sorted(self._prefixes.items(), reverse=True))
+            return route
+        return decorator
+
+    def command(self, *commands: str):
+        """Декоратор: обработчик команд (/start) в любом состоянии"""
+        def decorator(route: Route) -> Route:
+            for command in commands:
+                self._add(self._commands, command, route)
+            return route
+        return decorator
+
+    def message(self, state: Union[State, str, None], content_type: str = None):
+        """Декоратор: обработчик сообщений в состоянии FSM (None — без состояния, ANY_STATE — в любом).
+
+        content_type — тип содержимого (text, contact, document…), None — любой.
+        """
+        def decorator(route: Route) -> Route:
+            self._add(self._messages, (_state_key(state), content_type), route)
+            return route
+        return decorator
+
+    def resolve_callback(self, callback: CallbackQuery, raw_state: Optional[str] = None) -> Optional[Route]:
+        data = callback.data
+        if data is None:
+            return None
+        route = self._callbacks.get(data)
+        if route is not None:
+            return route
+        for length, prefixes in self._prefixes.items():
+            route = prefixes.get(data[:length])
+            if route is not None:
+                return route
+        return None
+
+    def resolve_message(self, message: Message, raw_state: Optional[str] = None,
+                        bot_username: Optional[str] = None) -> Optional[Route]:
+        text = message.text
+        if text and text[0] == '/' and self._commands:
+            # "/start payload" и "/start@bot_name" — та же команда, "/start@other_bot" — чужая
+            command, mention = _parse_command(text)
+            if mention is None or (bot_username and mention.lower() == bot_username.lower()):
+                route = self._commands.get(command)
+                if route is not None:
+                    return route
+
+        content_type = message.content_type
+        messages = self._messages
+        for key in ((raw_state, content_type), (raw_state, None),
+                    (ANY_STATE, content_type), (ANY_STATE, None)):
+            route = messages.get(key)
+            if route is not None:
+                return route
+        return None
+
+    def __len__(self):
+        return (len(self._callbacks) + sum(map(len, self._prefixes.values()))
+                + len(self._commands) + len(self._messages))
+
+    def register(self, router):
+        """Подключить индекс к роутеру: по одному обработчику на message и callback_query"""
+        router.message(_MessageIndexFilter(self.resolve_message))(_call_route)
+        router.callback_query(_IndexFilter(self.resolve_callback))(_call_route)
+        logger.info(f"🧭 Индекс маршрутов: {len(self)} обработчиков")
@@ -0,0 +1,352 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Окружение процесса-обработчика: номер шарда и их число
+SHARD_INDEX_ENV = 'SHARD_INDEX'
+SHARD_COUNT_ENV = 'SHARD_COUNT'
+
+
+def shard_of(telegram_id: int, shards: int) -> int:
+    """Шард пользователя: один и тот же при любом перезапуске"""
+    return telegram_id % shards
+
+
+def update_owner(update: Dict[str, Any]) -> int:
+    """telegram_id пользователя, от которого пришёл апдейт (0 — если его нет)"""
+    for key, event in update.items():
+        if key == 'update_id' or not isinstance(event, dict):
+            continue
+        user = event.get('from') or event.get('user')
+        if user:
+            return user['id']
+        chat = event.get('chat') or (event.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+    return 0
+
+
+class _WorkerProcess:
+    """Процесс-обработчик одного шарда и его очередь апдейтов"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # Держит запись в stdin процесса; перезапуск забирает его, чтобы
+        # апдейты шарда ждали новый процесс в очереди, а не терялись
+        self.lock = asyncio.Lock()
+        # Процесс, остановленный супервизором: его завершение — не падение
+        self.retired: Optional[asyncio.subprocess.Process] = None
+        self.restarts = 0
+        self.routed = 0
+        self.started_at = 0.0
+
+
+class ShardSupervisor:
+    """Супервизор процессов-обработчиков, разделённых по telegram_id.
+
+    Запускает `shards` процессов командой `command`; процесс знает свой
+    шард из переменных окружения SHARD_INDEX/SHARD_COUNT. Апдейты приходят
+    в один процесс (polling или webhook) и через `route()` попадают в stdin
+    процесса-владельца построчно в JSON. У каждого шарда своя очередь и
+    своя задача записи, поэтому занятый шард не задерживает остальные, а
+    апдейты одного пользователя доходят до него в порядке получения.
+
+    `restart()` перезапускает процессы по одному: пока шард перезапускается,
+    его апдейты копятся в очереди, старый процесс дорабатывает полученное и
+    сохраняет состояние, и только потом запускается новый. Упавший процесс
+    перезапускается автоматически через `restart_delay` секунд.
+    """
+
+    def __init__(self, shards: int, command: Sequence[str], env: Dict[str, str] = None,
+                 shutdown_timeout: float = 30.0, restart_delay: float = 1.0):
+        self.shards = shards
+        self.command = list(command)
+        self.env = env or {}
+        self.shutdown_timeout = shutdown_timeout
+        self.restart_delay = restart_delay
+        self.lost = 0
+        self._workers: List[_WorkerProcess] = [_WorkerProcess(index) for index in range(shards)]
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def start(self):
+        for worker in self._workers:
+            await self._spawn(worker)
+            self._tasks.append(asyncio.create_task(self._writer(worker)))
+        logger.info(f"🧩 Запущено процессов-обработчиков: {self.shards}")
+
+    def route(self, update: Dict[str, Any]):
+        """Передать апдейт процессу, владеющему шардом пользователя"""
+        worker = self._workers[shard_of(update_owner(update), self.shards)]
+        worker.routed += 1
+        worker.queue.put_nowait(json.dumps(update, ensure_ascii=False).encode() + b'\n')
+
+    async def _spawn(self, worker: _WorkerProcess):
+        env = dict(os.environ, **self.env)
+        env[SHARD_INDEX_ENV] = str(worker.index)
+        env[SHARD_COUNT_ENV] = str(self.shards)
+        worker.process = await asyncio.create_subprocess_exec(
+            *self.command, stdin=asyncio.subprocess.PIPE, env=env
+        )
+        worker.started_at = time.monotonic()
+        asyncio.create_task(self._watch(worker, worker.process))
+        logger.info(f"▶️ Шард {worker.index}: процесс {worker.process.pid}")
+
+    async def _watch(self, worker: _WorkerProcess, process: asyncio.subprocess.Process):
+        """Перезапустить процесс, если он завершился сам"""
+        code = await process.wait()
+        if self._stopping or worker.process is not process or worker.retired is process:
+            return
+        logger.error(f"💥 Шард {worker.index}: процесс {process.pid} завершился с кодом {code}")
+        async with worker.lock:
+            if self._stopping or worker.process is not process:
+                return
+            await asyncio.sleep(self.restart_delay)
+            worker.restarts += 1
+            await self._spawn(worker)
+
+    async def _writer(self, worker: _WorkerProcess):
+        while True:
+            line = await worker.queue.get()
+            try:
+                async with worker.lock:
+                    worker.process.stdin.write(line)
+                    await worker.process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # Процесс упал: апдейт потерян, следующие дождутся перезапуска
+                self.lost += 1
+                logger.warning(f"⚠️ Шард {worker.index}: апдейт потерян, процесс недоступен")
+            finally:
+                worker.queue.task_done()
+
+    async def _finish(self, worker: _WorkerProcess):
+        """Закрыть stdin и дождаться, пока процесс доработает и завершится"""
+        process = worker.process
+        if process.returncode is not None:
+            return
+        worker.retired = process
+        process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Шард {worker.index}: процесс {process.pid} не завершился, останавливаем")
+            process.kill()
+            await process.wait()
+
+    async def restart(self):
+        """Перезапустить процессы по одному, не теряя апдейтов"""
+        logger.info("🔄 Поочерёдный перезапуск процессов-обработчиков...")
+        for worker in self._workers:
+            async with worker.lock:
+                if self._stopping:
+                    return
+                await self._finish(worker)
+                worker.restarts += 1
+                await self._spawn(worker)
+        logger.info("✅ Все процессы-обработчики перезапущены")
+
+    async def stop(self):
+        """Доставить накопленные апдейты и остановить процессы"""
+        for worker in self._workers:
+            await worker.queue.join()
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*(self._finish(worker) for worker in self._workers))
+        logger.info(f"🛑 Процессы-обработчики остановлены: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            'lost': self.lost,
+            'shards': [
+                {
+                    'shard': worker.index,
+                    'pid': worker.process.pid if worker.process else None,
+                    'alive': worker.process is not None and worker.process.returncode is None,
+                    'routed': worker.routed,
+                    'queued': worker.queue.qsize(),
+                    'restarts': worker.restarts,
+                    'uptime': round(now - worker.started_at, 1),
+                }
+                for worker in self._workers
+            ],
+        }
+
+
+class ShardWorker:
+    """Приём апдейтов процессом-обработчиком: строки JSON из stdin.
+
+    Апдейты обрабатываются параллельно (не больше `max_concurrency`), но
+    апдейты одного пользователя — строго по очереди, в порядке получения.
+    Конец stdin означает остановку: обработчик дорабатывает полученные
+    апдейты и возвращает управление, после чего main.py сохраняет состояние.
+    """
+
+    def __init__(self, dispatcher, bot, max_concurrency: int = 100):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.max_concurrency = max_concurrency
+        self.processed = 0
+        self.failed = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Последняя задача каждого пользователя: следующая ждёт её завершения
+        self._tails: Dict[int, asyncio.Task] = {}
+
+    async def run(self, stream=None):
+        loop = asyncio.get_running_loop()
+        # Останавливает и перезапускает процесс только супервизор, закрывая stdin:
+        # сигналы всей группе процессов (Ctrl+C, systemd) обрабатывает он
+        for sig in (signal.SIGINT, signal.SIGTERM, getattr(signal, 'SIGHUP', None)):
+            if sig is None:
+                continue
+            try:
+                loop.add_signal_handler(sig, lambda: None)
+            except NotImplementedError:
+                pass
+
+        reader = asyncio.StreamReader(limit=2 ** 24)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stream or sys.stdin)
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            await self._semaphore.acquire()
+            update = json.loads(line)
+            user_id = update_owner(update)
+            task = asyncio.create_task(self._process(update, self._tails.get(user_id)))
+            self._tails[user_id] = task
+            task.add_done_callback(lambda done, key=user_id: self._release(key, done))
+
+        if self._tails:
+            logger.info(f"⏳ Ожидание {len(self._tails)} пользователей с апдейтами в обработке...")
+            await asyncio.wait(set(self._tails.values()))
+        logger.info(f"📊 Шард обработал апдейтов: {self.processed}, с ошибкой: {self.failed}")
+
+    def _release(self, user_id: int, task: asyncio.Task):
+        self._semaphore.release()
+        if self._tails.get(user_id) is task:
+            del self._tails[user_id]
+
+    async def _process(self, update: Dict[str, Any], previous: Optional[asyncio.Task]):
+        if previous is not None:
+            await asyncio.wait((previous,))
+        try:
+            await self.dispatcher.feed_raw_update(self.bot, update)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"❌ Ошибка обработки апдейта: {e}", exc_info=True)
+
+
+async def _poll(bot, supervisor: ShardSupervisor, timeout: int = 30):
+    """Long polling в процессе-супервизоре: апдейты раздаются шардам"""
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ошибка getUpdates: {e}")
+            await asyncio.sleep(5)
+            continue
+        for update in updates:
+            supervisor.route(update.model_dump(mode='json', by_alias=True, exclude_none=True))
+            offset = update.update_id + 1
+
+
+async def _serve_webhook(bot, supervisor: ShardSupervisor):
+    """Webhook в процессе-супервизоре: апдейт подтверждается сразу после передачи шарду"""
+    from aiohttp import web
+    from config import Config
+
+    async def receive(request: web.Request) -> web.Response:
+        if Config.WEBHOOK_SECRET and \
+                request.headers.get('X-Telegram-Bot-Api-Secret-Token') != Config.WEBHOOK_SECRET:
+            return web.Response(status=401, text="Unauthorized")
+        supervisor.route(await request.json())
+        return web.json_response({})
+
+    async def health(request: web.Request) -> web.Response:
+        """GET /health — состояние шардов для балансировщика"""
+        return web.json_response(supervisor.stats())
+
+    app = web.Application()
+    app.router.add_post(Config.WEBHOOK_PATH, receive)
+    app.router.add_get('/health', health)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=Config.WEBHOOK_HOST, port=Config.WEBHOOK_PORT).start()
+    logger.info(f"🌐 Webhook слушает {Config.WEBHOOK_HOST}:{Config.WEBHOOK_PORT}{Config.WEBHOOK_PATH}")
+
+    if Config.WEBHOOK_URL:
+        await bot.set_webhook(
+            url=Config.WEBHOOK_URL.rstrip('/') + Config.WEBHOOK_PATH,
+            secret_token=Config.WEBHOOK_SECRET
+        )
+        logger.info(f"✅ Webhook зарегистрирован: {Config.WEBHOOK_URL}")
+    return runner
+
+
+async def run_supervisor(bot, shards: int, shutdown_timeout: float = 30.0):
+    """Режим нескольких процессов: приём апдейтов здесь, обработка — в шардах.
+
+    SIGHUP — поочерёдный перезапуск шардов (например, после обновления кода),
+    SIGINT/SIGTERM — остановка.
+    """
+    from config import Config
+
+    supervisor = ShardSupervisor(
+        shards,
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')],
+        shutdown_timeout=shutdown_timeout
+    )
+    await supervisor.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    restarts = set()
+
+    def rolling_restart():
+        task = asyncio.create_task(supervisor.restart())
+        restarts.add(task)
+        task.add_done_callback(restarts.discard)
+
+    for sig, callback in ((signal.SIGINT, stop.set), (signal.SIGTERM, stop.set),
+                          (getattr(signal, 'SIGHUP', None), rolling_restart)):
+        if sig is None:
+            continue
+        try:
+            loop.add_signal_handler(sig, callback)
+        except NotImplementedError:
+            pass
+
+    runner = None
+    polling = None
+    try:
+        if Config.RUN_MODE == 'webhook':
+            runner = await _serve_webhook(bot, supervisor)
+        else:
+            polling = asyncio.create_task(_poll(bot, supervisor))
+        await stop.wait()
+    finally:
+        logger.info("🛑 Остановка приёма апдейтов...")
+        if polling is not None:
+            polling.cancel()
+            await asyncio.gather(polling, return_exceptions=True)
+        if runner is not None:
+            await runner.cleanup()
+        if restarts:
+            await asyncio.gather(*restarts, return_exceptions=True)
+        await supervisor.stop()
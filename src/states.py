@@ -14,6 +14,8 @@ class ClientStates(StatesGroup):
     waiting_for_client_phone = State()
     waiting_for_client_note = State()
     waiting_for_client_edit = State()
+    waiting_for_import_file = State()
+    waiting_for_search_query = State()
 
 class TemplateStates(StatesGroup):
     """Состояния работы с шаблонами"""
@@ -0,0 +1,167 @@
+import json
+import logging
+import operator
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# {имя_клиента}; {{ и }} — литеральные фигурные скобки, как в str.format
+_TOKEN = re.compile(r'\{\{|\}\}|\{(\w+)\}|[{}]')
+
+
+class TemplateError(ValueError):
+    """Ошибка в тексте шаблона или в значениях переменных"""
+
+
+class CompiledTemplate:
+    """Шаблон, разобранный на литеральные куски и слоты переменных.
+
+    Разбор выполняется один раз: куски склеиваются в строку формата
+    `%`, где каждый слот — `%s`, а значения слотов достаёт один
+    itemgetter. `render` — одна операция форматирования без повторного
+    разбора текста.
+    """
+
+    __slots__ = ('id', 'name', 'source', 'declared', 'variables', '_format', '_getter')
+
+    def __init__(self, source: str, template_id: int = None, name: str = None,
+                 declared: frozenset = None):
+        self.id = template_id
+        self.name = name
+        self.source = source
+        self.declared = declared
+
+        parts: List[str] = []
+        slots: List[str] = []
+        position = 0
+        for match in _TOKEN.finditer(source):
+            parts.append(source[position:match.start()].replace('%', '%%'))
+            position = match.end()
+            token = match.group(0)
+            if match.group(1):
+                slots.append(match.group(1))
+                parts.append('%s')
+            elif token in ('{{', '}}'):
+                parts.append(token[0])
+            else:
+                raise TemplateError(f"Непарная фигурная скобка в позиции {match.start()}")
+        parts.append(source[position:].replace('%', '%%'))
+
+        # Переменные в порядке первого появления
+        self.variables = tuple(dict.fromkeys(slots))
+        if declared is not None:
+            unknown = [name for name in self.variables if name not in declared]
+            if unknown:
+                raise TemplateError(f"Неизвестные переменные: {', '.join(unknown)}")
+
+        self._format = ''.join(parts)
+        if len(slots) > 1:
+            self._getter = operator.itemgetter(*slots)
+        elif slots:
+            # itemgetter от одного ключа возвращает значение, а не кортеж
+            name = slots[0]
+            self._getter = lambda values: (values[name],)
+        else:
+            self._getter = lambda values: ()
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """Подставить значения переменных"""
+        try:
+            return self._format % self._getter(values)
+        except KeyError as e:
+            raise TemplateError(f"Не задана переменная {e.args[0]}") from None
+
+    def render_many(self, rows: Iterable[Mapping[str, Any]]) -> List[str]:
+        """Отрендерить шаблон для каждого набора значений (массовая рассылка)"""
+        fmt = self._format
+        getter = self._getter
+        try:
+            return [fmt % getter(values) for values in rows]
+        except KeyError as e:
+            raise TemplateError(f"Не задана переменная {e.args[0]}") from None
+
+    def __repr__(self):
+        return f"<CompiledTemplate {self.name or self.id!r} {list(self.variables)}>"
+
+
+def compile_template(source: str, variables: Iterable[str] = None) -> CompiledTemplate:
+    """Разобрать текст шаблона (переменные проверяются по списку, если он задан)"""
+    return CompiledTemplate(source, declared=None if variables is None else frozenset(variables))
+
+
+def _declared_variables(raw: Optional[str]) -> Optional[frozenset]:
+    """Список переменных из столбца templates.variables (JSON-массив)"""
+    if not raw:
+        return None
+    try:
+        names = json.loads(raw)
+    except ValueError:
+        return None
+    return frozenset(names) if isinstance(names, list) else None
+
+
+class TemplateEngine:
+    """Шаблоны сообщений менеджеров, разобранные заранее.
+
+    Активные шаблоны менеджера читаются из БД и компилируются при первом
+    обращении, а затем берутся из LRU-кэша. Изменение шаблона через
+    `update_template` сбрасывает кэш менеджера. Шаблон с ошибкой (например,
+    переменная, которой нет в столбце variables) пропускается с
+    предупреждением в логе, чтобы не ломать остальные.
+    """
+
+    def __init__(self, db, cache_size: int = 1024, cache_ttl: float = 3600.0):
+        self.db = db
+        self.cache = LRUCache(max_size=cache_size, ttl=cache_ttl)
+
+    async def get_templates(self, manager_id: int) -> Dict[int, CompiledTemplate]:
+        """Скомпилированные активные шаблоны менеджера {id: шаблон} в порядке имени"""
+        cached = self.cache.get(manager_id)
+        if cached is not LRUCache.MISSING:
+            return cached
+
+        generation = self.cache.generation
+        compiled: Dict[int, CompiledTemplate] = {}
+        for row in await self.db.get_templates(manager_id):
+            try:
+                compiled[row['id']] = CompiledTemplate(
+                    row['content'],
+                    template_id=row['id'],
+                    name=row['name'],
+                    declared=_declared_variables(row['variables'])
+                )
+            except TemplateError as e:
+                logger.warning(f"⚠️ Шаблон {row['id']} менеджера ID {manager_id} пропущен: {e}")
+        self.cache.set(manager_id, compiled, generation)
+        return compiled
+
+    async def get_template(self, manager_id: int, template_id: int) -> Optional[CompiledTemplate]:
+        """Скомпилированный шаблон менеджера по ID"""
+        return (await self.get_templates(manager_id)).get(template_id)
+
+    async def render(self, manager_id: int, template_id: int, values: Mapping[str, Any]) -> Optional[str]:
+        """Отрендерить шаблон менеджера (None, если шаблона нет)"""
+        template = await self.get_template(manager_id, template_id)
+        return template.render(values) if template else None
+
+    async def update_template(self, manager_id: int, template_id: int, content: str) -> bool:
+        """Изменить текст активного шаблона и сбросить кэш менеджера.
+
+        Новый текст проверяется по тем же объявленным переменным; при ошибке
+        выбрасывается TemplateError, и шаблон не меняется.
+        """
+        current = await self.get_template(manager_id, template_id)
+        if current is None:
+            return False
+        CompiledTemplate(content, declared=current.declared)
+
+        updated = await self.db.update_template(manager_id, template_id, content)
+        self.invalidate(manager_id)
+        return updated
+
+    def invalidate(self, manager_id: int):
+        """Сбросить скомпилированные шаблоны менеджера"""
+        self.cache.invalidate(manager_id)
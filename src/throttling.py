@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram.exceptions import TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Ведро токенов: `rate` токенов в секунду, не более `capacity` подряд"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self._tokens >= self.capacity
+
+    async def acquire(self):
+        """Дождаться токена (ожидающие обслуживаются по очереди)"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class _PendingSend:
+    """Отправка, ожидающая очереди; может быть вытеснена более новой"""
+
+    __slots__ = ('future', 'superseded_by')
+
+    def __init__(self):
+        self.future = asyncio.get_running_loop().create_future()
+        self.superseded_by: Optional['_PendingSend'] = None
+
+
+class OutboundScheduler:
+    """Планировщик исходящих запросов к Bot API.
+
+    Соблюдает глобальный лимит Telegram (~30 сообщений/с) и лимит на чат,
+    ставит лишние вызовы в очередь, выполняет запросы одного чата по порядку,
+    повторяет их после TelegramRetryAfter и схлопывает отправки экранов меню
+    (`coalesce=True`), которые ещё ждут очереди, когда в тот же чат
+    отправляется более новый экран (в чате всё равно остаётся только
+    последний экран бота). Остальные сообщения отправляются всегда.
+    """
+
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0,
+                 chat_burst: float = 3.0, max_retries: int = 3, max_chats: int = 10000):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+
+        self._chat_buckets: OrderedDict = OrderedDict()
+        # chat_id -> [asyncio.Lock, число ожидающих]
+        self._chat_locks: Dict[int, list] = {}
+        self._pending_sends: Dict[int, _PendingSend] = {}
+
+        # Метрики
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+            # Забываем давно неактивные чаты: их ведро уже полное
+            while len(self._chat_buckets) > self.max_chats:
+                old_chat_id, old_bucket = next(iter(self._chat_buckets.items()))
+                if not old_bucket.is_full:
+                    break
+                del self._chat_buckets[old_chat_id]
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def submit(self, chat_id: int, call: Callable[[], Awaitable[Any]],
+                     per_chat_limit: bool = True, coalesce: bool = False) -> Any:
+        """Выполнить запрос к API с учётом лимитов.
+
+        `coalesce=True` — отправку можно заменить более новой отправкой в тот же
+        чат, пока она ждёт очереди; тогда вызывающий получит результат новой.
+        """
+        if not coalesce:
+            await self._wait_turn(chat_id, per_chat_limit)
+            return await self._call_with_retry(call)
+
+        pending = _PendingSend()
+        previous = self._pending_sends.get(chat_id)
+        if previous is not None:
+            previous.superseded_by = pending
+        self._pending_sends[chat_id] = pending
+
+        try:
+            await self._wait_turn(chat_id, per_chat_limit, pending)
+            if self._pending_sends.get(chat_id) is pending:
+                del self._pending_sends[chat_id]
+
+            if pending.superseded_by is not None:
+                # Пока ждали очереди, в чат ушла более новая отправка
+                self.coalesced += 1
+                result = await asyncio.shield(pending.superseded_by.future)
+            else:
+                result = await self._call_with_retry(call)
+        except BaseException as e:
+            if self._pending_sends.get(chat_id) is pending:
+                del self._pending_sends[chat_id]
+            # Передаём ошибку тем, чьи отправки были вытеснены этой
+            if isinstance(e, asyncio.CancelledError):
+                pending.future.cancel()
+            else:
+                pending.future.set_exception(e)
+                pending.future.exception()
+            raise
+
+        pending.future.set_result(result)
+        return result
+
+    async def _wait_turn(self, chat_id: int, per_chat_limit: bool, pending: _PendingSend = None):
+        """Дождаться очереди чата и токенов (вытесненной отправке токены не нужны)"""
+        enqueued_at = time.monotonic()
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        entry = self._chat_locks.get(chat_id)
+        if entry is None:
+            entry = self._chat_locks[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                if pending is None or pending.superseded_by is None:
+                    if per_chat_limit:
+                        await self._chat_bucket(chat_id).acquire()
+                    await self.global_bucket.acquire()
+        finally:
+            self.queue_depth -= 1
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[chat_id]
+
+        waited = time.monotonic() - enqueued_at
+        self.waits += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+
+    async def _call_with_retry(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await call()
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                logger.warning(f"⏳ Лимит Telegram, повтор через {e.retry_after} с")
+                await asyncio.sleep(e.retry_after)
+
+    def stats(self) -> dict:
+        """Метрики очереди"""
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'retries': self.retries,
+            'wait_time_avg': self.wait_time_total / self.waits if self.waits else 0.0,
+            'wait_time_max': self.wait_time_max,
+        }
+
+
+class ThrottledBot:
+    """Обёртка над aiogram Bot: отправка, редактирование и удаление сообщений
+    идут через OutboundScheduler, остальные атрибуты проксируются как есть"""
+
+    def __init__(self, bot, scheduler: OutboundScheduler):
+        self._bot = bot
+        self._scheduler = scheduler
+
+    def __getattr__(self, name):
+        return getattr(self._bot, name)
+
+    async def send_message(self, chat_id: int, text: str, coalesce: bool = False, **kwargs):
+        """Отправить сообщение; `coalesce=True` — только для экранов меню, которые
+        можно заменить более новым экраном (визитки, напоминания и т.п. — нельзя)"""
+        return await self._scheduler.submit(
+            chat_id,
+            lambda: self._bot.send_message(chat_id=chat_id, text=text, **kwargs),
+            coalesce=coalesce
+        )
+
+    async def edit_message_text(self, text: str, chat_id: int = None, message_id: int = None, **kwargs):
+        return await self._scheduler.submit(
+            chat_id,
+            lambda: self._bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id, **kwargs)
+        )
+
+    async def delete_message(self, chat_id: int, message_id: int, **kwargs):
+        return await self._scheduler.submit(
+            chat_id,
+            lambda: self._bot.delete_message(chat_id=chat_id, message_id=message_id, **kwargs),
+            per_chat_limit=False
+        )
@@ -1,21 +1,51 @@
 import re
-import phonenumbers
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
+from messages import Messages
+
+# Всё, кроме цифр и +
+_NON_PHONE_CHARS = re.compile(r'[^\d+]')
+# Российский мобильный номер после очистки: 89161234567, +79161234567, 79161234567, 9161234567
+_RU_MOBILE = re.compile(r'(?:\+7|7|8)?(9\d{9})')
+
 class PhoneUtils:
     """Утилиты для работы с телефонами"""
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def standardize_phone(phone_input: str) -> Optional[str]:
-        """Стандартизация номера телефона в формат +79991234567"""
+        """Стандартизация номера телефона в формат +79991234567
+        
+        Результаты кэшируются по исходной строке (validate_phone и повторные
+        вводы не пересчитываются).
+        """
         if not phone_input:
             return None
         
+        # Убираем все нецифровые символы, кроме +
+        cleaned = _NON_PHONE_CHARS.sub('', phone_input)
+        
+        # Быстрый путь: российские мобильные номера (9XX) всегда валидны
+        match = _RU_MOBILE.fullmatch(cleaned)
+        if match:
+            return '+7' + match.group(1)
+        
+        # Без кода страны короче 10 цифр номер не бывает валидным (обычный текст)
+        if len(cleaned) < 10 and '+' not in cleaned:
+            return None
+        
+        return PhoneUtils._standardize_with_phonenumbers(cleaned)
+    
+    @staticmethod
+    def _standardize_with_phonenumbers(cleaned: str) -> Optional[str]:
+        """Медленный путь для необычных номеров: разбор через phonenumbers"""
+        # phonenumbers и метаданные регионов загружаются только при первом
+        # необычном номере, а не при старте бота
+        import phonenumbers
+        
         try:
-            # Убираем все нецифровые символы, кроме +
-            cleaned = re.sub(r'[^\d+]', '', phone_input)
-            
             # Если номер начинается с 8 или 7, добавляем +
             if cleaned.startswith('8'):
                 cleaned = '+7' + cleaned[1:]
@@ -24,11 +54,7 @@ class PhoneUtils:
             
             # Если номер не начинается с +, добавляем +7
             if not cleaned.startswith('+'):
-                # Если номер из 10 цифр, добавляем +7
-                if len(cleaned) == 10:
-                    cleaned = '+7' + cleaned
-                else:
-                    cleaned = '+7' + cleaned
+                cleaned = '+7' + cleaned
             
             # Парсим номер с помощью phonenumbers
             parsed = phonenumbers.parse(cleaned, None)
@@ -71,6 +97,21 @@ class MessageUtils:
             text = text.replace(char, f'\\{char}')
         return text
     
+    @staticmethod
+    def escape_markdown_legacy(text: str) -> str:
+        """Экранирование пользовательского текста для parse_mode="Markdown" (не V2)"""
+        if not text:
+            return ""
+        
+        for char in '_*`[':
+            text = text.replace(char, f'\\{char}')
+        return text
+    
+    @staticmethod
+    def industry_label(industry: str, industry_custom: Optional[str] = None) -> str:
+        """Название сферы для показа: своя формулировка или название по коду (auto -> Автосалон)"""
+        return industry_custom or Messages.INDUSTRY_LABELS.get(industry, "Другое")
+    
     @staticmethod
     def format_datetime(dt_str: str) -> str:
         """Форматирование даты для отображения"""
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import signal
+import time
+from typing import Any, Dict, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookRequestHandler(SimpleRequestHandler):
+    """Приём апдейтов через webhook с ограниченной параллельностью.
+
+    Апдейт подтверждается Telegram сразу, а обрабатывается в фоне; одновременно
+    выполняется не более `max_concurrency` апдейтов. Если все слоты заняты,
+    ответ задерживается, и Telegram притормаживает доставку.
+
+    Процесс держит состояние пользователей в памяти (кэши FSM и профилей,
+    ID последних сообщений бота), поэтому несколько таких процессов за
+    балансировщиком допустимы только с привязкой пользователя к процессу
+    (см. WEBHOOK_INSTANCES и WEBHOOK_STICKY_ROUTING в config.py).
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_concurrency: int = 100, **kwargs: Any):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self.max_concurrency = max_concurrency
+        self.accepting = True
+        self.processed = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if not self.accepting:
+            return web.Response(status=503, text="Shutting down")
+
+        update = await request.json(loads=bot.session.json_loads)
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._process_update(bot, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _process_update(self, bot: Bot, update: Dict[str, Any]):
+        try:
+            await self._background_feed_update(bot=bot, update=update)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"❌ Ошибка обработки апдейта: {e}", exc_info=True)
+        finally:
+            self._semaphore.release()
+
+    async def health(self, request: web.Request) -> web.Response:
+        """GET /health — состояние процесса для балансировщика"""
+        status = 200 if self.accepting else 503
+        return web.json_response({
+            'status': 'ok' if self.accepting else 'shutting_down',
+            'in_flight': len(self._tasks),
+            'processed': self.processed,
+            'failed': self.failed,
+            'uptime': round(time.monotonic() - self.started_at, 1),
+        }, status=status)
+
+    async def drain(self, timeout: float):
+        """Перестать принимать апдейты и дождаться обрабатываемых"""
+        self.accepting = False
+        if self._tasks:
+            logger.info(f"⏳ Ожидание {len(self._tasks)} апдейтов в обработке...")
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, metrics=None):
+    """Запустить приём апдейтов через webhook (aiohttp)"""
+    app = web.Application()
+    handler = WebhookRequestHandler(
+        dp,
+        bot,
+        max_concurrency=Config.WEBHOOK_MAX_CONCURRENCY,
+        secret_token=Config.WEBHOOK_SECRET
+    )
+    handler.register(app, path=Config.WEBHOOK_PATH)
+    app.router.add_get('/health', handler.health)
+    if metrics is not None:
+        async def metrics_endpoint(request: web.Request) -> web.Response:
+            """GET /metrics — метрики обработчиков в формате Prometheus"""
+            return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8')
+        
+        app.router.add_get(Config.METRICS_PATH, metrics_endpoint)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=Config.WEBHOOK_HOST, port=Config.WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"🌐 Webhook слушает {Config.WEBHOOK_HOST}:{Config.WEBHOOK_PORT}{Config.WEBHOOK_PATH}")
+
+    if Config.WEBHOOK_URL:
+        await bot.set_webhook(
+            url=Config.WEBHOOK_URL.rstrip('/') + Config.WEBHOOK_PATH,
+            secret_token=Config.WEBHOOK_SECRET
+        )
+        logger.info(f"✅ Webhook зарегистрирован: {Config.WEBHOOK_URL}")
+
+    # Ждём сигнала остановки
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    try:
+        await stop.wait()
+    finally:
+        logger.info("🛑 Остановка webhook-сервера...")
+        await handler.drain(Config.WEBHOOK_SHUTDOWN_TIMEOUT)
+        await runner.cleanup()